@@ -13,12 +13,15 @@
 #  limitations under the License.
 
 from Ldap3Library.connection_manager import Ldap3ConnectionManager
+from Ldap3Library.journal import GLOBAL, Ldap3JournalListener
+from Ldap3Library.metrics import Ldap3MetricsKeywords, Ldap3MetricsListener
 from Ldap3Library.query import Ldap3Query
 from Ldap3Library.version import VERSION
+from typing import Optional
 
 __version__ = VERSION
 
-class Ldap3Library(Ldap3ConnectionManager, Ldap3Query):
+class Ldap3Library(Ldap3ConnectionManager, Ldap3Query, Ldap3MetricsKeywords):
     """Ldap3Library is a [https://robotframework.org|Robot Framework] library for LDAP operations using [https://github.com/cannatag/ldap3/|ldap3].
 
     This library provides keywords to interact with LDAP servers, including
@@ -72,7 +75,33 @@ class Ldap3Library(Ldap3ConnectionManager, Ldap3Query):
     ROBOT_LIBRARY_SCOPE = 'GLOBAL'
     ROBOT_LIBRARY_VERSION = __version__
 
-    def __init__(self):
+    def __init__(self, page_size: int = 0, cache_ttl: float = 0, cache_size: int = 1024, journal_scope: str = GLOBAL,
+                 metrics: bool = False, metrics_export: Optional[str] = None,
+                 slow_query_ms: float = 0, slow_query_log: Optional[str] = None):
+        """Ldap3Library can be imported with optional arguments.
+
+        - page_size: Entries per page for searches using the Simple Paged Results control (RFC 2696). 0 disables paging.
+        - cache_ttl: Seconds search results are served from the result cache, see `Set Result Cache`. 0 disables the cache.
+        - cache_size: Maximum number of cached search results.
+        - journal_scope: GLOBAL, SUITE or TEST. Scope of the created objects deleted by `Rollback Created Objects`.
+        - metrics: Records latency and volume metrics of the keywords, see `Enable Metrics`.
+          When the execution ends, they are summarized as metadata "Ldap3Library Metrics" of the top level suite.
+        - metrics_export: Directory the metrics are written to as ldap3library_metrics.json and ldap3library_metrics.prom
+          when the execution ends. Enables the metrics.
+        - slow_query_ms: Searches taking longer are logged as warning and to the slow query log, see `Set Slow Query Threshold`. 0 disables the log.
+        - slow_query_log: Path of the slow query log. Defaults to ldap3library_slow_queries.log in the output directory.
+
+        | Library    Ldap3Library    page_size=500
+        | Library    Ldap3Library    cache_ttl=30    cache_size=4096
+        | Library    Ldap3Library    journal_scope=TEST
+        | Library    Ldap3Library    metrics_export=${OUTPUT_DIR}
+        | Library    Ldap3Library    slow_query_ms=200
+        """
         Ldap3ConnectionManager.__init__(self)
-        Ldap3Query.__init__(self)
+        Ldap3Query.__init__(self, page_size=page_size, cache_ttl=cache_ttl, cache_size=cache_size,
+                            slow_query_ms=slow_query_ms, slow_query_log=slow_query_log)
+        Ldap3MetricsKeywords.__init__(self, self.metrics)
+        self.metrics.enabled = bool(metrics or metrics_export)
+        self.ROBOT_LIBRARY_LISTENER = [Ldap3JournalListener(self.journal, journal_scope),
+                                       Ldap3MetricsListener(self.metrics, metrics_export)]
         
\ No newline at end of file
@@ -12,53 +12,339 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from typing import Optional,Dict
-from ldap3 import Server, Connection, Tls, ALL, SYNC, BASE
+from typing import Any, Iterator, List, Optional, Dict, NamedTuple, Tuple, Union
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from functools import lru_cache
+from urllib.parse import unquote
+from ldap3 import Server, Connection, Tls, ALL, DSA, SCHEMA, NONE as NO_INFO, SYNC, MOCK_SYNC, BASE, OFFLINE_SLAPD_2_4, DsaInfo, SchemaInfo
+from ldap3.core.exceptions import LDAPException, LDAPBindError, LDAPCommunicationError
 from ldap3.utils.uri import parse_uri as ldap3_parse_uri
+from ldif import LDIFParser
 from robot.api import logger
+from Ldap3Library.metrics import Ldap3Metrics, measured
 
-import os, ssl, errno
+import os, ssl, errno, threading, time
+
+URL_CACHE_SIZE = 4096
+
+class Ldap3Url(NamedTuple):
+    """Immutable parsed LDAP URL.
+
+    Fields can also be accessed by name like a dictionary, e.g. ``${url}[host]`` in Robot Framework."""
+    host: str
+    port: Optional[int]
+    base: str
+    attributes: Optional[Tuple[str, ...]]
+    scope: str
+    filter: str
+    ssl: bool
+    extensions: Optional[Tuple[str, ...]]
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+    def extension(self, name: str) -> Optional[str]:
+        """Value of the URL extension ``name`` or ``!name``, None if not present."""
+        for extension in self.extensions or ():
+            extype, _, exvalue = extension.lstrip('!').partition('=')
+            if extype.lower() == name.lower():
+                return exvalue
+        return None
+
+    @property
+    def bind_name(self) -> Optional[str]:
+        """Bind DN of the RFC 4516 ``bindname`` extension."""
+        return self.extension('bindname')
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def _parse_uri(ldap_url: str) -> Ldap3Url:
+    parsed_url = ldap3_parse_uri(ldap_url)
+    if parsed_url is None:
+        raise ValueError(f"Invalid LDAP URL: {ldap_url}")
+    # ldap3 splits the extensions after unquoting, which breaks percent-encoded commas in DN values
+    parts = ldap_url.split('?')
+    extensions = tuple(unquote(extension) for extension in parts[4].split(',') if extension) if len(parts) > 4 else ()
+    return Ldap3Url(host=parsed_url['host'],
+                    port=parsed_url['port'],
+                    base=parsed_url['base'],
+                    attributes=tuple(parsed_url['attributes']) if parsed_url['attributes'] else None,
+                    scope=parsed_url['scope'] or BASE,
+                    filter=parsed_url['filter'] or '(objectClass=*)',
+                    ssl=parsed_url['ssl'],
+                    extensions=extensions or None)
+
+class Ldap3PoolKey(NamedTuple):
+    host: str
+    port: Optional[int]
+    bind_dn: Optional[str]
+
+class Ldap3PooledConnections():
+    """Connections of one bind identity on one server.
+
+    Connections are checked out per keyword and returned afterwards. Idle connections
+    are evicted after ``idle_timeout`` seconds and checked for liveness before reuse
+    when they were idle longer than ``liveness_interval`` seconds."""
+
+    def __init__(self, template: Connection,
+                 max_size: int = 8,
+                 idle_timeout: float = 300,
+                 liveness_interval: float = 30,
+                 acquire_timeout: float = 60,
+                 lazy_info: bool = False):
+        self.template = template
+        self.lazy_info = lazy_info
+        self.max_size = max(1, int(max_size))
+        self.idle_timeout = float(idle_timeout)
+        self.liveness_interval = float(liveness_interval)
+        self.acquire_timeout = float(acquire_timeout)
+        self._idle = deque([(template, time.monotonic())])
+        self._size = 1
+        self._closed = False
+        self._condition = threading.Condition()
+        # reads the deferred server info once, without blocking checkouts and releases of the pool
+        self._info_lock = threading.Lock()
+
+    def _create(self) -> Connection:
+        """Opens and binds a new connection with the settings of the template connection."""
+        connection = Connection(server=self.template.server,
+                                user=self.template.user,
+                                password=self.template.password,
+                                authentication=self.template.authentication,
+                                client_strategy=self.template.strategy_type,
+                                raise_exceptions=self.template.raise_exceptions,
+                                collect_usage=self.template.usage is not None)
+        # the server info is already known from the template connection
+        if not connection.bind(read_server_info=False):
+            raise LDAPBindError(f"Bind as {connection.user} to {connection.server.host} failed: {connection.result['description']}")
+        return connection
+
+    @staticmethod
+    def _is_alive(connection: Connection) -> bool:
+        """Probes the connection with a cheap root DSE read."""
+        if connection.closed:
+            return False
+        try:
+            connection.search('', '(objectClass=*)', BASE, attributes=['1.1'])
+        except LDAPException:
+            return False
+        return True
+
+    def _evict_idle(self) -> None:
+        """Unbinds idle connections, except the template, that exceeded the idle timeout. Caller holds the lock."""
+        now = time.monotonic()
+        for idle in [idle for idle in self._idle
+                     if idle[0] is not self.template and now - idle[1] > self.idle_timeout]:
+            self._idle.remove(idle)
+            self._size -= 1
+            self._unbind(idle[0])
+
+    @staticmethod
+    def _unbind(connection: Connection) -> None:
+        try:
+            connection.unbind()
+        except LDAPException as e:
+            logger.debug(f"Ignoring error while unbinding {connection}: {e}")
+
+    def acquire(self) -> Connection:
+        """Checks out an idle connection or opens a new one if the pool is not exhausted.
+        Raises:
+        - ValueError: If the pool is closed or no connection got free within the acquire timeout."""
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise ValueError("Connection pool is closed.")
+                self._evict_idle()
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    connection, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._condition.wait(remaining):
+                    raise ValueError(f"No free connection within {self.acquire_timeout}s. All {self.max_size} connections are in use.")
+        try:
+            if connection is None:
+                connection = self._create()
+                if self.template.closed:
+                    self.template = connection
+            elif (connection.closed or time.monotonic() - last_used > self.liveness_interval) and not self._is_alive(connection):
+                logger.info(f"Reconnecting stale connection to {connection.server.host}.")
+                self._unbind(connection)
+                stale, connection = connection, self._create()
+                if stale is self.template:
+                    self.template = connection
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        return connection
+
+    def release(self, connection: Connection, discard: bool = False) -> None:
+        """Returns a checked out connection to the pool, broken or closed connections are dropped."""
+        with self._condition:
+            if discard or self._closed or connection.closed:
+                self._size -= 1
+                self._unbind(connection)
+                if connection is self.template and self._idle:
+                    self.template = self._idle[-1][0]
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def close(self) -> None:
+        """Unbinds all idle connections, checked out connections are unbound on release."""
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                connection, _ = self._idle.pop()
+                self._size -= 1
+                self._unbind(connection)
+            self._condition.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed or self.template.closed
+
+    def load_server_info(self, connection: Connection) -> Server:
+        """Reads root DSE and schema with the given connection if they were deferred with get_info LAZY."""
+        server = connection.server
+        if self.lazy_info:
+            with self._info_lock:
+                if self.lazy_info:
+                    logger.info(f"Reading server info of {server.host}.")
+                    server.get_info = ALL
+                    server.get_info_from_server(connection)
+                    self.lazy_info = False
+        return server
 
 class Ldap3ConnectionPool():
-    
+    """Pool of connections keyed by host, port and bind DN.
+
+    The host is used as alias, the latest connected bind identity of a host is its default.
+    Connects running in the background are pending for their host until they are registered."""
+
     def __init__(self):
-        self.connections: Dict[str, Connection] = {}
+        self.connections: Dict[Ldap3PoolKey, Ldap3PooledConnections] = {}
+        self._pending: Dict[str, List[Future]] = {}
+        self._lock = threading.RLock()
+
+    def add_pending(self, host: str, future: Future) -> None:
+        """Registers a background connect, lookups of the host wait for it."""
+        with self._lock:
+            self._pending.setdefault(host, []).append(future)
 
-    def register_connection(self, host: str, connection: Connection) -> None:
-        """Register a connection with an alias."""
-        if host in self.connections:
-            logger.warn(f"Connection with alias '{host}' already exists. Skip.")
+    def wait_pending(self, host: Optional[str] = None, raise_errors: bool = True) -> None:
+        """Waits for the background connects of a host, of all hosts without host.
+
+        Raises the error of the first failed connect, it is reported once."""
+        if not self._pending:
             return
-        self.connections[host] = connection
-
-    def get_connection(self, host: Optional[str]=None) -> Optional[Connection]:
-        """Get a connection by its alias."""
-        if not self.connections:
-            raise ValueError("No connections registered. Please register a connection first.")
-        if not host:
-            return list(self.connections.values())[-1]  # Return the last connection if no alias is provided
-        if host not in self.connections:
-            raise ValueError(f"Connection with alias '{host}' not found. Available aliases: {list(self.connections.keys())}")
-        return self.connections[host]
-    
-    def pop_connection(self, host: str) -> Optional[Connection]:
-        """Pop a connection by its alias."""
-        if not self.connections:
-            logger.warn("No connections registered. Please register a connection first.")
-            return None
-        if host not in self.connections:
-            logger.warn(f"Connection with alias '{host}' not found. Available aliases: {list(self.connections.keys())}")
-            raise ValueError(f"Connection with alias '{host}' not found.")
-        return self.connections.pop(host, None)
-    
+        with self._lock:
+            futures = [future for alias, pending in self._pending.items() if not host or alias == host for future in pending]
+        wait(futures)
+        with self._lock:
+            for alias in list(self._pending):
+                self._pending[alias] = [future for future in self._pending[alias] if future not in futures]
+                if not self._pending[alias]:
+                    del self._pending[alias]
+        errors = [future.exception() for future in futures if future.exception()]
+        if errors and raise_errors:
+            raise errors[0]
+
+    def register_connection(self, host: str, connection: Connection, **pool_options) -> None:
+        """Register a bound connection with an alias. It is used as template for further connections of its identity."""
+        key = Ldap3PoolKey(host, connection.server.port, connection.user)
+        existing = replaced = None
+        with self._lock:
+            if key in self.connections and not self.connections[key].closed:
+                logger.warn(f"Connection with alias '{host}' and bind DN '{connection.user}' already exists. Skip.")
+                existing = self.connections[key]
+            else:
+                # re-insert to make the identity the default of the host
+                replaced = self.connections.pop(key, None)
+                self.connections[key] = Ldap3PooledConnections(connection, **pool_options)
+        if existing is not None and existing.template is not connection:
+            # the skipped connection is not pooled, nothing else would unbind it
+            Ldap3PooledConnections._unbind(connection)
+        if replaced is not None:
+            # a closed template leaves the idle connections of the pool bound
+            replaced.close()
+
+    def _keys(self, host: Optional[str] = None, bind_dn: Optional[str] = None) -> List[Ldap3PoolKey]:
+        return [key for key in self.connections
+                if (not host or key.host == host)
+                and (not bind_dn or (key.bind_dn or '').lower() == bind_dn.lower())]
+
+    def get_pool(self, host: Optional[str] = None, bind_dn: Optional[str] = None) -> Ldap3PooledConnections:
+        """Get the pooled connections of an alias and optional bind DN."""
+        self.wait_pending(host)
+        with self._lock:
+            if not self.connections:
+                raise ValueError("No connections registered. Please register a connection first.")
+            keys = self._keys(host, bind_dn)
+            if not keys:
+                raise ValueError(f"Connection with alias '{host}' not found. Available aliases: {self.aliases}")
+            return self.connections[keys[-1]]  # Return the latest connection if no alias is provided
+
+    def get_connection(self, host: Optional[str] = None, bind_dn: Optional[str] = None) -> Optional[Connection]:
+        """Get the initial connection of an alias. Use `connection` to check out a connection for an operation."""
+        return self.get_pool(host, bind_dn).template
+
+    @contextmanager
+    def connection(self, host: Optional[str] = None, bind_dn: Optional[str] = None) -> Iterator[Connection]:
+        """Checks out a connection of an alias for the duration of the with block."""
+        pool = self.get_pool(host, bind_dn)
+        connection = pool.acquire()
+        discard = False
+        try:
+            yield connection
+        except LDAPCommunicationError:
+            # the socket is broken, do not hand the connection out again
+            discard = True
+            raise
+        finally:
+            pool.release(connection, discard=discard)
+
+    def pop_connection(self, host: str, bind_dn: Optional[str] = None) -> Optional[Connection]:
+        """Pop the connections of an alias and closes them. Returns the initial connection."""
+        self.wait_pending(host, raise_errors=False)
+        with self._lock:
+            if not self.connections:
+                logger.warn("No connections registered. Please register a connection first.")
+                return None
+            keys = self._keys(host, bind_dn)
+            if not keys:
+                logger.warn(f"Connection with alias '{host}' not found. Available aliases: {self.aliases}")
+                raise ValueError(f"Connection with alias '{host}' not found.")
+            pools = [self.connections.pop(key) for key in keys]
+        for pool in pools:
+            pool.close()
+        return pools[-1].template
+
+    @property
+    def aliases(self) -> List[str]:
+        return list(dict.fromkeys(key.host for key in self.connections))
+
     def clear(self):
         """Clear all connections."""
-        self.connections = {}
+        self.wait_pending(raise_errors=False)
+        with self._lock:
+            pools, self.connections = list(self.connections.values()), {}
+        for pool in pools:
+            pool.close()
         logger.info("All connections cleared.")
     
     def __iter__(self):
-        """Iterate over the connections."""
-        return iter(self.connections.values())
+        """Iterate over the initial connections."""
+        return iter([pool.template for pool in self.connections.values()])
 
 class Ldap3ConnectionManager():
     """
@@ -69,30 +355,77 @@ class Ldap3ConnectionManager():
     """
     
     connection_pool = Ldap3ConnectionPool()
+    metrics = Ldap3Metrics()
+    _mock_lock = threading.Lock()
+
+    LAZY = "LAZY"
+    GET_INFO = (ALL, DSA, SCHEMA, NO_INFO, LAZY)
+
+    LDAP_BACKEND = "ldap"
+    MOCK_BACKEND = "mock"
+    BACKENDS = (LDAP_BACKEND, MOCK_BACKEND)
 
     
     def __init__(self):
         pass
 
     @staticmethod
-    def parse_uri(ldap_url: str):
-        parsed_url = ldap3_parse_uri(ldap_url)
-        if parsed_url['scope'] == '':
-            parsed_url['scope'] = BASE
-        return parsed_url
+    def parse_uri(ldap_url: str) -> Ldap3Url:
+        """Parses a LDAP URL.
+
+        Parsed URLs are cached, so repeated keywords with the same URL are not parsed again.
+        Parameters:
+        - ldap_url: <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+        Returns:
+        - The parsed URL with host, port, base, attributes, scope, filter, ssl and extensions.
+        Raises:
+        - ValueError: If the URL is not a valid LDAP URL.
+        Example:
+        | ${url}=    Parse Uri    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)
+        | Should Be Equal    ${url}[host]    localhost
+        """
+        return _parse_uri(ldap_url)
 
+    @measured
     def connect(self, ldap_url: str = None, 
                 bind_dn: str = None, 
                 password: str = None, 
-                cert_path: Optional[str] = None) -> None:
+                cert_path: Optional[str] = None,
+                pool_size: int = 8,
+                idle_timeout: float = 300,
+                get_info: str = ALL,
+                schema_cache: Optional[str] = None,
+                backend: str = LDAP_BACKEND,
+                mock_data: Optional[Union[str, List[str]]] = None) -> None:
         """Connect to an LDAP server.
         Parameters:
         - ldap_url: The LDAP URL to connect to.
         - bind_dn: The bind DN to use for authentication.
         - password: The password to use for authentication.
         - cert_path: The path to the root certificate for secure connection (optional).
-        
+        - pool_size: Maximum number of connections opened for this host and bind DN (optional).
+        - idle_timeout: Seconds after which idle pooled connections are closed (optional).
+        - get_info: Server information read on connect, one of ALL, DSA, SCHEMA, NO_INFO or LAZY (optional).
+          LAZY reads the root DSE and schema when a keyword needs them for the first time.
+        - schema_cache: Directory to persist the root DSE and schema of the server to, as far as read with get_info (optional).
+          Later connects to the same host and port load them from there instead of the server.
+          Delete the files to refresh them after schema changes.
+        - backend: ldap connects to the server, mock to an in-memory directory without network access (optional).
+          A ldap_url with the scheme mock:// selects the mock backend as well.
+        - mock_data: LDIF file or list of LDIF files loaded into the in-memory directory on connect (optional).
+
+        The mock backend uses the ldap3 MOCK_SYNC strategy with the offline schema of OpenLDAP 2.4 and is registered
+        with the host of the URL as alias, so all keywords run unchanged with their ldap:// URLs. Connects to the same
+        host share one directory. The bind DN is added with the password if the LDIF files do not contain it.
+        cert_path, get_info and schema_cache are ignored.
+
         Registers the connection with the host as an alias in the connection pool.
+        Further connections with the same bind DN are opened on demand, e.g. by concurrent keywords,
+        and idle connections are checked for liveness and reconnected transparently before reuse.
+        Connecting to the same host with another bind DN adds a second identity, which becomes the default
+        for the host. Keywords can select an identity with the bindname extension of the LDAP URL,
+        commas in the DN have to be percent-encoded:
+        | ldap://localhost:389/ou=users,dc=example,dc=com??sub?(objectClass=*)?bindname=cn=admin%2Cdc=example%2Cdc=com
         Raises:
         - ValueError: If ldap_url, bind_dn, or password is not provided.
         - FileNotFoundError: If the root certificate is not found.
@@ -103,13 +436,51 @@ class Ldap3ConnectionManager():
         | ...  ldap_url=${LDAP_URL}
         | ...  bind_dn=${BIND_DN}
         | ...  password=${PASSWORD}        
+        | Connect    ${LDAP_URL}    ${BIND_DN}    ${PASSWORD}    get_info=NO_INFO
+        | Connect    ${LDAP_URL}    ${BIND_DN}    ${PASSWORD}    schema_cache=${TEMPDIR}${/}ldap_schema
+        | Connect    ${LDAP_URL}    ${BIND_DN}    ${PASSWORD}    backend=mock    mock_data=${CURDIR}${/}data.ldif
+        | Connect    mock://localhost:389/dc=example,dc=com    ${BIND_DN}    ${PASSWORD}    mock_data=${LDIF_FILES}
         """
+        self._connect(ldap_url, bind_dn, password, cert_path=cert_path, pool_size=pool_size, idle_timeout=idle_timeout,
+                      get_info=get_info, schema_cache=schema_cache, backend=backend, mock_data=mock_data)
+
+    def _connect(self, ldap_url: str = None,
+                 bind_dn: str = None,
+                 password: str = None,
+                 cert_path: Optional[str] = None,
+                 pool_size: int = 8,
+                 idle_timeout: float = 300,
+                 get_info: str = ALL,
+                 schema_cache: Optional[str] = None,
+                 backend: str = LDAP_BACKEND,
+                 mock_data: Optional[Union[str, List[str]]] = None) -> None:
+        """Connects and registers the connection, see `Connect`. Safe to run in worker threads."""
         if not ldap_url or not bind_dn or not password:
             raise ValueError("Ldap_url, bind_dn and password are required to connect.")
+        if ldap_url.lower().startswith(f"{self.MOCK_BACKEND}://"):
+            backend, ldap_url = self.MOCK_BACKEND, f"{self.LDAP_BACKEND}://{ldap_url.split('://', 1)[1]}"
+        backend = backend.lower()
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Invalid backend: {backend}. Must be one of {', '.join(self.BACKENDS)}.")
+        if backend == self.MOCK_BACKEND:
+            _url = Ldap3ConnectionManager.parse_uri(ldap_url)
+            con = self._connect_mock(_url, bind_dn, password, mock_data)
+            self.metrics.add_usage(con)
+            self.connection_pool.register_connection(_url.host, con,
+                                                     max_size=pool_size,
+                                                     idle_timeout=idle_timeout)
+            return
+        get_info = get_info.upper()
+        if get_info not in self.GET_INFO:
+            raise ValueError(f"Invalid get_info: {get_info}. Must be one of {', '.join(self.GET_INFO)}.")
         
         _url = Ldap3ConnectionManager.parse_uri(ldap_url)
-        logger.info(f"Connecting to LDAP server: {_url['host']}")
-        if (_url['ssl']):
+        cached_info = None
+        if schema_cache and get_info not in (NO_INFO, self.LAZY):
+            cached_info = self._load_server_info(schema_cache, _url, get_info)
+        server_get_info = NO_INFO if cached_info or get_info == self.LAZY else get_info
+        logger.info(f"Connecting to LDAP server: {_url.host}")
+        if (_url.ssl):
             if cert_path is None:
                 raise ValueError(f"Missing root certificate for {ldap_url} connection.")
             ca = os.path.abspath(cert_path) 
@@ -122,25 +493,165 @@ class Ldap3ConnectionManager():
                 version=ssl.PROTOCOL_TLSv1_2
                 )
             if tls.ca_certs_file == None: raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), )
-            s = Server(host=_url['host'],
-                    port=_url['port'],
-                    use_ssl= _url['ssl'],
-                    get_info=ALL,
+            s = Server(host=_url.host,
+                    port=_url.port,
+                    use_ssl= _url.ssl,
+                    get_info=server_get_info,
                     tls=tls
                     )
         else:
-            s = Server(host=_url['host'],
-                    port=_url['port'],
-                    use_ssl= _url['ssl'],
-                    get_info=ALL,
+            s = Server(host=_url.host,
+                    port=_url.port,
+                    use_ssl= _url.ssl,
+                    get_info=server_get_info,
                     )
         con = Connection(server=s, 
                         user=bind_dn, 
                         password=password,
                         auto_bind=True,
-                        client_strategy=SYNC
+                        client_strategy=SYNC,
+                        collect_usage=True
                         )
-        self.connection_pool.register_connection(_url['host'], con)
+        self.metrics.add_usage(con)
+        if cached_info:
+            if cached_info[0]:
+                s.attach_dsa_info(cached_info[0])
+            if cached_info[1]:
+                s.attach_schema_info(cached_info[1])
+        elif schema_cache and (s.info or s.schema):
+            self._save_server_info(schema_cache, _url, s)
+        self.connection_pool.register_connection(_url.host, con,
+                                                 max_size=pool_size,
+                                                 idle_timeout=idle_timeout,
+                                                 lazy_info=get_info == self.LAZY)
+
+    @measured
+    def connect_many(self, connections: List[Union[str, Dict[str, Any]]],
+                     bind_dn: Optional[str] = None,
+                     password: Optional[str] = None,
+                     wait: bool = True,
+                     workers: int = 8,
+                     **options) -> List[str]:
+        """Connect to several LDAP servers concurrently.
+        Parameters:
+        - connections: LDAP URLs or dictionaries with the arguments of `Connect`, at least the ldap_url.
+        - bind_dn: The bind DN of the connections not stating one (optional).
+        - password: The password of the connections not stating one (optional).
+        - wait: Waits until all connections are bound. Otherwise returns immediately and the first keyword
+          using a host waits for the connection of that host only (optional).
+        - workers: Maximum number of concurrent connects (optional).
+        - options: Further arguments of `Connect` for all connections, e.g. get_info or schema_cache.
+
+        Every connection is established, bound and its server information read in a worker thread.
+        Without waiting, a failed connect raises its error in the first keyword using the host.
+        Returns:
+        - The hosts of the connections in the given order.
+        Raises:
+        - ValueError: If a connection has no ldap_url, or if connections failed while waiting for them.
+
+        Example:
+        | @{urls}=    Create List    ldap://ldap1:389/    ldap://ldap2:389/    ldap://ldap3:389/
+        | Connect Many    ${urls}    ${BIND_DN}    ${PASSWORD}
+        | Connect Many    ${urls}    ${BIND_DN}    ${PASSWORD}    wait=False    schema_cache=${TEMPDIR}${/}ldap_schema
+        | &{reader}=    Create Dictionary    ldap_url=ldap://ldap1:389/    bind_dn=cn=reader,dc=example,dc=com    password=secret
+        | Connect Many    ${{[$reader]}}
+        """
+        arguments = []
+        for connection in connections:
+            arguments.append({"bind_dn": bind_dn, "password": password, **options,
+                              **({"ldap_url": connection} if isinstance(connection, str) else connection)})
+            if not arguments[-1].get("ldap_url"):
+                raise ValueError(f"Ldap_url is required to connect: {connection}")
+        hosts = [Ldap3ConnectionManager.parse_uri(
+                    f"{self.LDAP_BACKEND}://{kwargs['ldap_url'].split('://', 1)[-1]}").host for kwargs in arguments]
+        executor = ThreadPoolExecutor(max_workers=max(1, min(int(workers), len(arguments) or 1)),
+                                      thread_name_prefix="ldap3-connect")
+        futures = []
+        for host, kwargs in zip(hosts, arguments):
+            futures.append(executor.submit(self._connect, **kwargs))
+            self.connection_pool.add_pending(host, futures[-1])
+        executor.shutdown(wait=False)
+        if not wait:
+            logger.info(f"Connecting to {len(futures)} LDAP servers in the background.")
+            return hosts
+        errors = {}
+        for host in dict.fromkeys(hosts):
+            try:
+                self.connection_pool.wait_pending(host)
+            except Exception as error:
+                errors[host] = error
+        if errors:
+            raise ValueError(f"{len(errors)} of {len(set(hosts))} hosts failed to connect: "
+                             + "; ".join(f"{host}: {error}" for host, error in errors.items()))
+        logger.info(f"Connected to {len(futures)} LDAP servers.")
+        return hosts
+
+    def _connect_mock(self, _url: Ldap3Url, bind_dn: str, password: str,
+                      mock_data: Optional[Union[str, List[str]]] = None) -> Connection:
+        """Binds to the in-memory directory of a host, created on the first connect, after loading the LDIF files."""
+        with self._mock_lock:
+            # registered connections are looked up without waiting for background connects of the host
+            server = next((template.server for template in self.connection_pool
+                           if template.server.host == _url.host and template.strategy_type == MOCK_SYNC), None)
+            if server is None:
+                logger.info(f"Creating in-memory directory for {_url.host}.")
+                server = Server(host=_url.host, port=_url.port, get_info=OFFLINE_SLAPD_2_4)
+            return self._bind_mock(server, _url, bind_dn, password, mock_data)
+
+    @staticmethod
+    def _bind_mock(server: Server, _url: Ldap3Url, bind_dn: str, password: str,
+                   mock_data: Optional[Union[str, List[str]]] = None) -> Connection:
+        connection = Connection(server=server,
+                                user=bind_dn,
+                                password=password,
+                                client_strategy=MOCK_SYNC,
+                                collect_usage=True)
+        for ldif_file in [mock_data] if isinstance(mock_data, str) else mock_data or []:
+            count = 0
+            with open(ldif_file, "rb") as ldif:
+                for dn, record in LDIFParser(ldif).parse():
+                    # the root DSE is provided by the offline server info
+                    if dn and connection.strategy.add_entry(dn, record):
+                        count += 1
+            logger.info(f"Loaded {count} entries from {ldif_file} into the in-memory directory of {_url.host}.")
+        connection.strategy.add_entry(bind_dn, {"objectClass": ["top"], "userPassword": [password]})
+        # the mock strategy ignores auto_bind
+        if not connection.bind():
+            raise LDAPBindError(f"Bind as {bind_dn} to the in-memory directory of {_url.host} failed: {connection.result['description']}")
+        return connection
+
+    @staticmethod
+    def _server_info_files(schema_cache: str, _url: Ldap3Url) -> Tuple[str, str]:
+        prefix = os.path.join(os.path.abspath(schema_cache), f"{_url.host}_{_url.port or 389}")
+        return f"{prefix}.info.json", f"{prefix}.schema.json"
+
+    @staticmethod
+    def _load_server_info(schema_cache: str, _url: Ldap3Url,
+                          get_info: str = ALL) -> Optional[Tuple[Optional[DsaInfo], Optional[SchemaInfo]]]:
+        """Loads the root DSE and schema of a server requested by get_info from the schema cache.
+
+        Returns None if a requested part is not cached yet, the part not requested is None."""
+        info_file, schema_file = Ldap3ConnectionManager._server_info_files(schema_cache, _url)
+        load_info, load_schema = get_info in (ALL, DSA), get_info in (ALL, SCHEMA)
+        if (load_info and not os.path.isfile(info_file)) or (load_schema and not os.path.isfile(schema_file)):
+            return None
+        logger.info(f"Loading server info of {_url.host} from {schema_cache}.")
+        return (DsaInfo.from_file(info_file) if load_info else None,
+                SchemaInfo.from_file(schema_file) if load_schema else None)
+
+    @staticmethod
+    def _save_server_info(schema_cache: str, _url: Ldap3Url, server: Server) -> None:
+        """Writes the root DSE and schema of a server to the schema cache, as far as they were read."""
+        os.makedirs(os.path.abspath(schema_cache), exist_ok=True)
+        for info, target in zip((server.info, server.schema),
+                                Ldap3ConnectionManager._server_info_files(schema_cache, _url)):
+            if info is None:
+                continue
+            # write to a temporary file first, parallel workers must never read a partial file
+            temporary = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+            info.to_file(temporary)
+            os.replace(temporary, target)
+        logger.info(f"Saved server info of {_url.host} to {schema_cache}.")
     
     def disconnect(self, ldap_url: str = None):
         """Disconnect from an LDAP server.
@@ -149,27 +660,26 @@ class Ldap3ConnectionManager():
         Raises:
         - ValueError: If ldap_url is not provided.
         
-        Unbinds the connection stated with the URL and removes it from the connection pool.
+        Unbinds all pooled connections of the host stated with the URL and removes them from the connection pool.
+        With a bindname extension in the URL only the connections of that bind DN are closed.
         Example:
         | Disconnect ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)
         """
-        _url = Ldap3ConnectionManager.parse_uri(ldap_url)
         if not ldap_url:
             raise ValueError("Ldap_url is required to disconnect.")
-        connection = self.connection_pool.pop_connection(_url['host'])
+        _url = Ldap3ConnectionManager.parse_uri(ldap_url)
+        connection = self.connection_pool.pop_connection(_url.host, _url.bind_name)
         if connection:
-            connection.unbind()
-            logger.info(f"Disconnected from LDAP server: {_url['host']}")
+            logger.info(f"Disconnected from LDAP server: {_url.host}")
         else:
-            logger.warn(f"No connection found for: {_url['host']}")
+            logger.warn(f"No connection found for: {_url.host}")
     
     def disconnect_all(self):
         """Unbinds all LDAP connections and cleares the connection pool.
         Example:
         | Disconnect all
         """
-        for alias, connection in self.connection_pool.connections.items():
-            connection.unbind()
+        for alias in self.connection_pool.aliases:
             logger.info(f"Disconnected from LDAP server with alias: {alias}")
         self.connection_pool.clear()
 
@@ -186,11 +696,11 @@ class Ldap3ConnectionManager():
         """
         if not ldap_url:
             logger.warn("Ldap_url not provided, return status of latest connection.")
-            connection = self.connection_pool.get_connection()
+            pool = self.connection_pool.get_pool()
         else:
             _url = Ldap3ConnectionManager.parse_uri(ldap_url)
-            connection = self.connection_pool.get_connection(_url['host'])
+            pool = self.connection_pool.get_pool(_url.host, _url.bind_name)
         # if alias not in self.connection_pool.connections:
         #     logger.warn(f"Connection with alias '{alias}' not found. Available aliases: {list(self.connection_pool.connections.keys())}")
         #     raise ValueError(f"Connection with alias '{alias}' not found.")
-        return connection.closed
\ No newline at end of file
+        return pool.closed
\ No newline at end of file
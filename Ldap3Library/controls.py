@@ -0,0 +1,178 @@
+#  Copyright (c) 2010 Franz Allan Valencia See
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Server-side sort (RFC 2891) and Virtual List View (draft-ietf-ldapext-ldapv3-vlv) request controls."""
+
+from functools import cmp_to_key
+from typing import List, NamedTuple, Optional, Tuple
+from pyasn1.codec.ber import decoder, encoder
+from pyasn1.type import namedtype, tag, univ
+
+import re
+
+SORT_CONTROL = "1.2.840.113556.1.4.473"
+SORT_RESPONSE_CONTROL = "1.2.840.113556.1.4.474"
+VLV_CONTROL = "2.16.840.1.113730.3.4.9"
+VLV_RESPONSE_CONTROL = "2.16.840.1.113730.3.4.10"
+
+SORT_EXTENSION = "x-sort"
+VLV_EXTENSION = "x-vlv"
+
+
+class _SortKey(univ.Sequence):
+    componentType = namedtype.NamedTypes(
+        namedtype.NamedType("attributeType", univ.OctetString()),
+        namedtype.OptionalNamedType("orderingRule", univ.OctetString().subtype(
+            implicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 0))),
+        namedtype.DefaultedNamedType("reverseOrder", univ.Boolean(False).subtype(
+            implicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 1))))
+
+
+class _SortKeyList(univ.SequenceOf):
+    componentType = _SortKey()
+
+
+class _SortResult(univ.Sequence):
+    componentType = namedtype.NamedTypes(
+        namedtype.NamedType("sortResult", univ.Enumerated()),
+        namedtype.OptionalNamedType("attributeType", univ.OctetString().subtype(
+            implicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 0))))
+
+
+class _ByOffset(univ.Sequence):
+    tagSet = univ.Sequence.tagSet.tagImplicitly(tag.Tag(tag.tagClassContext, tag.tagFormatConstructed, 0))
+    componentType = namedtype.NamedTypes(
+        namedtype.NamedType("offset", univ.Integer()),
+        namedtype.NamedType("contentCount", univ.Integer()))
+
+
+class _Target(univ.Choice):
+    componentType = namedtype.NamedTypes(
+        namedtype.NamedType("byOffset", _ByOffset()),
+        namedtype.NamedType("greaterThanOrEqual", univ.OctetString().subtype(
+            implicitTag=tag.Tag(tag.tagClassContext, tag.tagFormatSimple, 1))))
+
+
+class _VirtualListViewRequest(univ.Sequence):
+    componentType = namedtype.NamedTypes(
+        namedtype.NamedType("beforeCount", univ.Integer()),
+        namedtype.NamedType("afterCount", univ.Integer()),
+        namedtype.NamedType("target", _Target()),
+        namedtype.OptionalNamedType("contextID", univ.OctetString()))
+
+
+class _VirtualListViewResponse(univ.Sequence):
+    componentType = namedtype.NamedTypes(
+        namedtype.NamedType("targetPosition", univ.Integer()),
+        namedtype.NamedType("contentCount", univ.Integer()),
+        namedtype.NamedType("virtualListViewResult", univ.Enumerated()),
+        namedtype.OptionalNamedType("contextID", univ.OctetString()))
+
+
+class SortKey(NamedTuple):
+    attribute: str
+    reverse: bool = False
+
+
+class VlvWindow(NamedTuple):
+    """Entries ``offset`` (1-based) to ``offset + count - 1`` of the sorted result."""
+    offset: int
+    count: int
+
+
+def parse_sort_keys(value: str) -> List[SortKey]:
+    """Parses sort keys like ``sn,-givenName``, a leading ``-`` sorts descending.
+
+    Raises:
+        ValueError: If no sort key is given."""
+    keys = [SortKey(key.lstrip("-+"), key.startswith("-")) for key in re.split(r"[,\s]+", value or "") if key.lstrip("-+")]
+    if not keys:
+        raise ValueError(f"Invalid sort keys: {value}. Must be attribute names separated by commas.")
+    return keys
+
+
+def parse_vlv_window(value: str) -> VlvWindow:
+    """Parses a window like ``1,50`` of offset and count.
+
+    Raises:
+        ValueError: If the window is not two positive numbers."""
+    try:
+        offset, count = (int(part) for part in re.split(r"[,\s]+", value.strip()))
+        if offset < 1 or count < 1:
+            raise ValueError
+    except ValueError as e:
+        raise ValueError(f"Invalid VLV window: {value}. Must be a positive offset and count separated by a comma.") from e
+    return VlvWindow(offset, count)
+
+
+def sort_control(keys: List[SortKey], criticality: bool = False) -> Tuple[str, bool, bytes]:
+    """Server-side sort request control in the ldap3 controls format."""
+    key_list = _SortKeyList()
+    for position, key in enumerate(keys):
+        sort_key = _SortKey()
+        sort_key["attributeType"] = key.attribute
+        if key.reverse:
+            sort_key["reverseOrder"] = True
+        key_list.setComponentByPosition(position, sort_key)
+    return SORT_CONTROL, criticality, encoder.encode(key_list)
+
+
+def vlv_control(window: VlvWindow, criticality: bool = False) -> Tuple[str, bool, bytes]:
+    """Virtual List View request control for a window, the content count is estimated by the server."""
+    request = _VirtualListViewRequest()
+    request["beforeCount"] = 0
+    request["afterCount"] = window.count - 1
+    by_offset = request["target"]["byOffset"]
+    by_offset["offset"] = window.offset
+    by_offset["contentCount"] = 0
+    return VLV_CONTROL, criticality, encoder.encode(request)
+
+
+def decode_sort_response(value: bytes) -> int:
+    """Result code of a sort response control, 0 if the result is sorted."""
+    return int(decoder.decode(value, asn1Spec=_SortResult())[0]["sortResult"])
+
+
+def decode_vlv_response(value: bytes) -> Tuple[int, int, int]:
+    """Target position, content count and result code of a VLV response control."""
+    response = decoder.decode(value, asn1Spec=_VirtualListViewResponse())[0]
+    return int(response["targetPosition"]), int(response["contentCount"]), int(response["virtualListViewResult"])
+
+
+def _compare_values(left: Optional[str], right: Optional[str]) -> int:
+    # entries without a value sort after all others, see RFC 2891
+    if left is None or right is None:
+        return (left is None) - (right is None)
+    left, right = left.lower(), right.lower()
+    return (left > right) - (left < right)
+
+
+def sort_responses(responses: List[dict], keys: List[SortKey]) -> List[dict]:
+    """Sorts search responses on the client by the first value of the sort attributes, case-insensitively."""
+    def value(response: dict, attribute: str) -> Optional[str]:
+        attributes = response.get("attributes", {})
+        name = next((name for name in attributes if name.lower() == attribute.lower()), None)
+        values = attributes.get(name) if name else None
+        if isinstance(values, list):
+            values = values[0] if values else None
+        return None if values is None else str(values)
+
+    def compare(left: dict, right: dict) -> int:
+        for key in keys:
+            result = _compare_values(value(left, key.attribute), value(right, key.attribute))
+            if result:
+                return -result if key.reverse else result
+        return 0
+
+    return sorted(responses, key=cmp_to_key(compare))
@@ -0,0 +1,86 @@
+#  Copyright (c) 2010 Franz Allan Valencia See
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Helpers to split, compare and order distinguished names."""
+
+from typing import List, Optional, Tuple
+from ldap3.utils.conv import escape_filter_chars
+from ldap3.utils.dn import parse_dn
+
+import re
+
+_DN_ESCAPE = re.compile(r"\\([0-9a-fA-F]{2}|.)")
+
+
+def _unescape_value(value: str) -> str:
+    """Removes the RFC 4514 escaping of an attribute value."""
+    raw = bytearray()
+    position = 0
+    for match in _DN_ESCAPE.finditer(value):
+        raw += value[position:match.start()].encode("utf-8")
+        escaped = match.group(1)
+        raw += bytes.fromhex(escaped) if len(escaped) == 2 else escaped.encode("utf-8")
+        position = match.end()
+    raw += value[position:].encode("utf-8")
+    return raw.decode("utf-8")
+
+
+def split_dn(dn: str) -> List[List[Tuple[str, str]]]:
+    """Splits a DN into its RDNs, each a list of (attribute type, escaped value) pairs."""
+    rdns = [[]]
+    for attribute_type, value, separator in parse_dn(dn):
+        rdns[-1].append((attribute_type, value))
+        if separator == ",":
+            rdns.append([])
+    return rdns if rdns[0] else []
+
+
+def parent_dn(dn: str) -> str:
+    """DN of the parent entry, an empty string for top level entries."""
+    return ",".join("+".join(f"{t}={v}" for t, v in rdn) for rdn in split_dn(dn)[1:])
+
+
+def renamed_dn(dn: str, new_rdn: str, new_superior: Optional[str] = None) -> str:
+    """DN of an entry after a modrdn to ``new_rdn``, below ``new_superior`` or its old parent."""
+    superior = parent_dn(dn) if new_superior is None else new_superior
+    return f"{new_rdn},{superior}" if superior else new_rdn
+
+
+def moved_dn(dn: str, ancestor: str, new_ancestor: str) -> str:
+    """DN of an entry below or equal to ``ancestor`` after the ancestor was renamed to ``new_ancestor``."""
+    rdns = split_dn(dn)[:dn_depth(dn) - dn_depth(ancestor)]
+    return ",".join(["+".join(f"{t}={v}" for t, v in rdn) for rdn in rdns] + [new_ancestor])
+
+
+def dn_depth(dn: str) -> int:
+    """Number of RDNs of a DN."""
+    return len(split_dn(dn))
+
+
+def normalize_dn(dn: str) -> str:
+    """Case-insensitive comparable form of a DN."""
+    return ",".join("+".join(sorted(f"{t.strip().lower()}={_unescape_value(v.strip()).lower()}" for t, v in rdn))
+                    for rdn in split_dn(dn))
+
+
+def is_descendant(dn: str, ancestor: str) -> bool:
+    """True if ``dn`` is below or equal to ``ancestor``."""
+    dn, ancestor = normalize_dn(dn), normalize_dn(ancestor)
+    return not ancestor or dn == ancestor or dn.endswith("," + ancestor)
+
+
+def rdn_filter(dn: str) -> str:
+    """Search filter matching the RDN of a DN."""
+    assertions = [f"({t}={escape_filter_chars(_unescape_value(v))})" for t, v in split_dn(dn)[0]]
+    return assertions[0] if len(assertions) == 1 else f"(&{''.join(assertions)})"
@@ -0,0 +1,114 @@
+#  Copyright (c) 2010 Franz Allan Valencia See
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Journal of the objects created by the library, scoped per suite or test by a listener."""
+
+from typing import Dict, List, Tuple
+from Ldap3Library.connection_manager import Ldap3Url
+from Ldap3Library.dn import is_descendant, moved_dn, normalize_dn
+
+import threading
+
+GLOBAL = "GLOBAL"
+SUITE = "SUITE"
+TEST = "TEST"
+JOURNAL_SCOPES = (GLOBAL, SUITE, TEST)
+
+
+class Ldap3Journal():
+    """DNs of created objects in creation order, keyed by host and normalized DN.
+
+    Scopes are stacked, objects not rolled back when a scope ends are handed to the enclosing scope."""
+
+    def __init__(self):
+        self._scopes: List[Dict[Tuple[str, str], Tuple[Ldap3Url, str]]] = [{}]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(map(len, self._scopes))
+
+    def record(self, _url: Ldap3Url, dn: str) -> None:
+        """Adds a created object to the current scope, ``_url`` defines the connection to delete it with."""
+        with self._lock:
+            self._scopes[-1][(_url.host, normalize_dn(dn))] = (_url, dn)
+
+    def forget(self, host: str, dn: str) -> None:
+        """Removes a deleted object and the objects below it from all scopes."""
+        with self._lock:
+            for scope in self._scopes:
+                for key in [key for key in scope if key[0] == host and is_descendant(key[1], dn)]:
+                    del scope[key]
+
+    def rename(self, host: str, dn: str, new_dn: str) -> None:
+        """Moves a renamed object and the objects below it to their new DNs, keeping their scope and order."""
+        with self._lock:
+            for scope in self._scopes:
+                if not any(key[0] == host and is_descendant(key[1], dn) for key in scope):
+                    continue
+                objects = list(scope.items())
+                scope.clear()
+                for key, (_url, object_dn) in objects:
+                    if key[0] == host and is_descendant(key[1], dn):
+                        object_dn = moved_dn(object_dn, dn, new_dn)
+                        key = (host, normalize_dn(object_dn))
+                    scope[key] = (_url, object_dn)
+
+    def push(self) -> None:
+        with self._lock:
+            self._scopes.append({})
+
+    def pop(self) -> None:
+        with self._lock:
+            if len(self._scopes) > 1:
+                remaining = self._scopes.pop()
+                self._scopes[-1].update(remaining)
+
+    def take(self, all_scopes: bool = False) -> List[Tuple[Ldap3Url, str]]:
+        """Removes and returns the objects of the current scope, or of all scopes."""
+        with self._lock:
+            scopes = self._scopes if all_scopes else self._scopes[-1:]
+            objects = [value for scope in scopes for value in scope.values()]
+            for scope in scopes:
+                scope.clear()
+        return objects
+
+
+class Ldap3JournalListener():
+    """Library listener opening a journal scope for every suite or test."""
+
+    ROBOT_LISTENER_API_VERSION = 3
+
+    def __init__(self, journal: Ldap3Journal, scope: str = GLOBAL):
+        scope = scope.upper()
+        if scope not in JOURNAL_SCOPES:
+            raise ValueError(
+                f"Invalid journal scope: {scope}. Must be one of {', '.join(JOURNAL_SCOPES)}.")
+        self.journal = journal
+        self.scope = scope
+
+    def start_suite(self, data, result):
+        if self.scope == SUITE:
+            self.journal.push()
+
+    def end_suite(self, data, result):
+        if self.scope == SUITE:
+            self.journal.pop()
+
+    def start_test(self, data, result):
+        if self.scope == TEST:
+            self.journal.push()
+
+    def end_test(self, data, result):
+        if self.scope == TEST:
+            self.journal.pop()
@@ -0,0 +1,120 @@
+#  Copyright (c) 2010 Franz Allan Valencia See
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Streaming parser for LDIF change records (RFC 2849)."""
+
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from ldap3 import MODIFY_ADD, MODIFY_DELETE, MODIFY_REPLACE, MODIFY_INCREMENT
+from ldif import LDIFParser
+
+ADD = "add"
+DELETE = "delete"
+MODIFY = "modify"
+MODRDN = "modrdn"
+
+MODIFY_OPERATIONS = {
+    "add": MODIFY_ADD,
+    "delete": MODIFY_DELETE,
+    "replace": MODIFY_REPLACE,
+    "increment": MODIFY_INCREMENT,
+}
+
+
+class LDIFChange(NamedTuple):
+    """A change record.
+
+    ``changes`` holds the attributes for ``add``, the ldap3 modify changes
+    ``{attribute: [(operation, values), ...]}`` for ``modify``, the keys
+    ``newrdn``, ``deleteoldrdn`` and ``newsuperior`` for ``modrdn`` and is
+    empty for ``delete``."""
+    dn: str
+    changetype: str
+    changes: Dict[str, Any]
+
+
+def merge_modify_changes(changes: Dict[str, List[Tuple[str, list]]],
+                         more: Dict[str, List[Tuple[str, list]]]) -> Dict[str, List[Tuple[str, list]]]:
+    """Appends the modify changes ``more`` to ``changes``, keeping the order per attribute."""
+    for attribute, operations in more.items():
+        changes.setdefault(attribute, []).extend(operations)
+    return changes
+
+
+class LDIFChangeParser(LDIFParser):
+    """Iterates the change records of a LDIF file, content records are returned as ``add``."""
+
+    def parse(self) -> Iterator[LDIFChange]:
+        for block in self._iter_blocks():
+            change = self._parse_change_record(block)
+            if change:
+                yield change
+
+    def _parse_change_record(self, lines: List[bytes]) -> Optional[LDIFChange]:
+        dn = None
+        changetype = None
+        attributes: List[Tuple[str, Any]] = []
+        for line in lines:
+            if line.strip() == b"-":
+                attributes.append(("-", None))
+                continue
+            attr_type, attr_value = self._parse_attr(line)
+            if attr_type == "version" and dn is None:
+                continue
+            if attr_type == "dn":
+                self._check_dn(dn, attr_value)
+                dn = attr_value
+            elif dn is None:
+                self._error(f"First line of record does not start with 'dn:': {attr_type}")
+            elif attr_type == "changetype":
+                self._check_changetype(dn, changetype, attr_value)
+                changetype = attr_value
+            elif attr_type.lower() not in self._ignored_attr_types:
+                attributes.append((attr_type, attr_value))
+        if dn is None:
+            return None
+        changetype = MODRDN if changetype == "moddn" else changetype or ADD
+        if changetype == ADD:
+            entry: Dict[str, list] = {}
+            for attr_type, attr_value in attributes:
+                entry.setdefault(attr_type, []).append(attr_value)
+            return LDIFChange(dn, ADD, entry)
+        if changetype == DELETE:
+            return LDIFChange(dn, DELETE, {})
+        if changetype == MODRDN:
+            values = {attr_type.lower(): attr_value for attr_type, attr_value in attributes}
+            return LDIFChange(dn, MODRDN, {"newrdn": values.get("newrdn"),
+                                           "deleteoldrdn": values.get("deleteoldrdn", "1") == "1",
+                                           "newsuperior": values.get("newsuperior")})
+        return LDIFChange(dn, MODIFY, self._parse_modifications(dn, attributes))
+
+    def _parse_modifications(self, dn: str, attributes: List[Tuple[str, Any]]) -> Dict[str, List[Tuple[str, list]]]:
+        changes: Dict[str, List[Tuple[str, list]]] = {}
+        operation = attribute = None
+        values: list = []
+        for attr_type, attr_value in attributes + [("-", None)]:
+            if attr_type == "-":
+                if operation:
+                    changes.setdefault(attribute, []).append((operation, values))
+                operation = attribute = None
+                values = []
+            elif operation is None:
+                if attr_type.lower() not in MODIFY_OPERATIONS:
+                    self._error(f"Invalid modify operation {attr_type} for {dn}.")
+                    continue
+                operation, attribute = MODIFY_OPERATIONS[attr_type.lower()], attr_value
+            elif attr_type.lower() == attribute.lower():
+                values.append(attr_value)
+            else:
+                self._error(f"Attribute {attr_type} does not match {attribute} of the modify operation for {dn}.")
+        return changes
@@ -0,0 +1,333 @@
+#  Copyright (c) 2010 Franz Allan Valencia See
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Per keyword and host latency and volume metrics with JSON and Prometheus export."""
+
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from html import escape
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+from ldap3 import Connection
+from robot.api import logger
+
+import json, os, threading, time
+
+JSON = "json"
+PROMETHEUS = "prometheus"
+EXPORT_FORMATS = (JSON, PROMETHEUS)
+QUANTILES = (0.5, 0.95, 0.99)
+MAX_SAMPLES = 10000
+REPORT_COLUMNS = ("keyword", "host", "count", "errors", "p50_ms", "p95_ms", "p99_ms", "max_ms",
+                  "seconds", "round_trips", "entries", "bytes")
+METRICS_METADATA = "Ldap3Library Metrics"
+
+
+class Ldap3KeywordMetrics():
+    """Calls of one keyword on one host. Percentiles are computed from the latest ``MAX_SAMPLES`` calls."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.round_trips = 0
+        self.entries = 0
+        self.bytes = 0
+        self.samples: Deque[float] = deque(maxlen=MAX_SAMPLES)
+
+    def quantile(self, quantile: float) -> float:
+        samples = sorted(self.samples)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(quantile * len(samples)))]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count,
+                "errors": self.errors,
+                "seconds": round(self.seconds, 6),
+                **{f"p{int(q * 100)}_ms": round(self.quantile(q) * 1000, 3) for q in QUANTILES},
+                "max_ms": round(max(self.samples, default=0.0) * 1000, 3),
+                "round_trips": self.round_trips,
+                "entries": self.entries,
+                "bytes": self.bytes}
+
+
+class Ldap3Metrics():
+    """Metrics of the keywords, keyed by keyword name and host.
+
+    Robot Framework runs keywords one after another, so the outermost running keyword is charged
+    with the round trips, bytes and entries of all connections, also of the worker threads it starts.
+    Keywords called by other keywords are not recorded separately."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.keywords: Dict[Tuple[str, str], Ldap3KeywordMetrics] = {}
+        self._active: Optional[Ldap3KeywordMetrics] = None
+        self._depth = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, keyword: str, host: str) -> Iterator[None]:
+        """Records the wall time of a keyword call and charges it with the usage added meanwhile."""
+        with self._lock:
+            self._depth += 1
+            outermost = self._depth == 1
+            if outermost:
+                self._active = Ldap3KeywordMetrics()
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                self._depth -= 1
+                if outermost:
+                    call, self._active = self._active, None
+                    metrics = self.keywords.setdefault((keyword, host), Ldap3KeywordMetrics())
+                    metrics.count += 1
+                    metrics.errors += failed
+                    metrics.seconds += seconds
+                    metrics.samples.append(seconds)
+                    metrics.round_trips += call.round_trips
+                    metrics.entries += call.entries
+                    metrics.bytes += call.bytes
+
+    def add(self, round_trips: int = 0, entries: int = 0, transferred: int = 0) -> None:
+        """Charges the running keyword, ignored outside of keywords."""
+        with self._lock:
+            if self._active is not None:
+                self._active.round_trips += round_trips
+                self._active.entries += entries
+                self._active.bytes += transferred
+
+    @staticmethod
+    def usage(connection: Connection) -> Tuple[int, int]:
+        """Operations and transferred bytes of a connection, 0 if it does not collect usage."""
+        if connection.usage is None:
+            return 0, 0
+        return connection.usage.operations, connection.usage.bytes_transmitted + connection.usage.bytes_received
+
+    def add_usage(self, connection: Connection) -> None:
+        """Charges the running keyword with all round trips and bytes of a new connection."""
+        round_trips, transferred = self.usage(connection)
+        self.add(round_trips=round_trips, transferred=transferred)
+
+    @contextmanager
+    def track(self, connection: Connection) -> Iterator[Connection]:
+        """Charges the running keyword with the round trips and bytes of a connection within the with block."""
+        if not self.enabled:
+            yield connection
+            return
+        operations, transferred = self.usage(connection)
+        try:
+            yield connection
+        finally:
+            now_operations, now_transferred = self.usage(connection)
+            self.add(round_trips=now_operations - operations, transferred=now_transferred - transferred)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.keywords.clear()
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Metrics per keyword and host, slowest total time first."""
+        with self._lock:
+            items = [(keyword, host, metrics.to_dict()) for (keyword, host), metrics in self.keywords.items()]
+        return [{"keyword": keyword, "host": host, **values}
+                for keyword, host, values in sorted(items, key=lambda item: -item[2]["seconds"])]
+
+    def to_json(self) -> str:
+        return json.dumps({"keywords": self.report()}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format, the latency as summary with quantiles."""
+        lines = ["# HELP ldap3library_keyword_duration_seconds Wall time of the keyword calls.",
+                 "# TYPE ldap3library_keyword_duration_seconds summary"]
+        counters = [("errors", "Failed keyword calls."),
+                    ("round_trips", "LDAP operations sent by the keyword calls."),
+                    ("entries", "Search result entries received by the keyword calls."),
+                    ("bytes", "Bytes transferred by the keyword calls.")]
+        with self._lock:
+            items = sorted(self.keywords.items())
+            for (keyword, host), metrics in items:
+                labels = f'keyword="{_label(keyword)}",host="{_label(host)}"'
+                for quantile in QUANTILES:
+                    lines.append(f'ldap3library_keyword_duration_seconds{{{labels},quantile="{quantile}"}} {metrics.quantile(quantile):.6f}')
+                lines.append(f"ldap3library_keyword_duration_seconds_sum{{{labels}}} {metrics.seconds:.6f}")
+                lines.append(f"ldap3library_keyword_duration_seconds_count{{{labels}}} {metrics.count}")
+            for name, help_text in counters:
+                lines.append(f"# HELP ldap3library_keyword_{name}_total {help_text}")
+                lines.append(f"# TYPE ldap3library_keyword_{name}_total counter")
+                for (keyword, host), metrics in items:
+                    lines.append(f'ldap3library_keyword_{name}_total{{keyword="{_label(keyword)}",host="{_label(host)}"}} '
+                                 f'{getattr(metrics, name)}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: str, export_format: str = JSON) -> str:
+        """Writes the metrics to a file. Returns the absolute path."""
+        export_format = export_format.lower()
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(
+                f"Invalid export format: {export_format}. Must be one of {', '.join(EXPORT_FORMATS)}.")
+        path = os.path.abspath(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as export:
+            export.write(self.to_json() if export_format == JSON else self.to_prometheus())
+        return path
+
+    def to_html(self) -> str:
+        """The report as HTML table for the Robot Framework log."""
+        report = self.report()
+        rows = "".join("<tr>" + "".join(f"<td>{escape(str(row[column]))}</td>" for column in REPORT_COLUMNS) + "</tr>"
+                       for row in report)
+        header = "".join(f"<th>{column}</th>" for column in REPORT_COLUMNS)
+        return f"<table><tr>{header}</tr>{rows}</table>"
+
+    def to_table(self) -> str:
+        """The report as table in the Robot Framework documentation syntax, e.g. for suite metadata."""
+        lines = ["| " + " | ".join(f"={column}=" for column in REPORT_COLUMNS) + " |"]
+        lines += ["| " + " | ".join(str(row[column]).replace("|", "\\|") for column in REPORT_COLUMNS) + " |"
+                  for row in self.report()]
+        return "\n".join(lines)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _host(value: Any) -> str:
+    """Host of an LDAP URL, parsed URL or snapshot argument, empty if unknown."""
+    value = getattr(value, "url", value)
+    if isinstance(value, str):
+        try:
+            return urlsplit(value).hostname or ""
+        except ValueError:
+            return ""
+    return getattr(value, "host", "") or ""
+
+
+def measured(keyword: Callable) -> Callable:
+    """Records the calls of a keyword method in the library metrics, keyed by the host of its ``ldap_url``."""
+    @wraps(keyword)
+    def wrapper(self, *args, **kwargs):
+        if not self.metrics.enabled:
+            return keyword(self, *args, **kwargs)
+        ldap_url = kwargs.get("ldap_url", args[0] if args else None)
+        if isinstance(ldap_url, (list, tuple)):
+            ldap_url = ldap_url[0] if len(set(map(_host, ldap_url))) == 1 else None
+        with self.metrics.measure(keyword.__name__, _host(ldap_url)):
+            return keyword(self, *args, **kwargs)
+    return wrapper
+
+
+class Ldap3MetricsListener():
+    """Library listener exporting the metrics and summarizing them when the top level suite ends.
+
+    Robot Framework drops messages logged when a suite ends, so the summary and the exported files
+    are added as metadata of the top level suite, shown in the log and report."""
+
+    ROBOT_LISTENER_API_VERSION = 3
+
+    def __init__(self, metrics: Ldap3Metrics, export_dir: Optional[str] = None):
+        self.metrics = metrics
+        self.export_dir = export_dir
+
+    def end_suite(self, data, result):
+        if not self.metrics.enabled or result.parent is not None:
+            return
+        summary = self.metrics.to_table()
+        if self.export_dir:
+            paths = [self.metrics.export(os.path.join(self.export_dir, f"ldap3library_metrics.{extension}"), export_format)
+                     for export_format, extension in ((JSON, "json"), (PROMETHEUS, "prom"))]
+            summary += "\n\nWritten to " + " and ".join(f"[file://{path}|{os.path.basename(path)}]" for path in paths) + "."
+        result.metadata[METRICS_METADATA] = summary
+
+
+class Ldap3MetricsKeywords():
+    """Keywords to inspect and export the latency and volume metrics of the keywords."""
+
+    def __init__(self, metrics: Ldap3Metrics):
+        self.metrics = metrics
+
+    def enable_metrics(self, enabled: bool = True) -> bool:
+        """Enables or disables recording the metrics of the keywords.
+
+        Every keyword call is recorded per keyword and host with its wall time, LDAP round trips,
+        search result entries and transferred bytes. Keywords called by other keywords are charged to the calling keyword.
+        Args:
+            enabled (bool, optional): Record metrics. Defaults to True.
+        Returns:
+            bool: Whether metrics were recorded before.
+        Example:
+        | Enable Metrics
+        | Search    ldap://localhost:389/ou=users,dc=example,dc=com??sub?(objectClass=*)
+        | Log Metrics
+        """
+        previous = self.metrics.enabled
+        self.metrics.enabled = bool(enabled)
+        return previous
+
+    def get_metrics(self) -> List[Dict[str, Any]]:
+        """Returns the metrics per keyword and host, the slowest in total first.
+
+        Each item has the ``keyword``, the ``host``, the ``count`` of calls and ``errors``, the latency
+        percentiles ``p50_ms``, ``p95_ms``, ``p99_ms`` and ``max_ms``, the total ``seconds`` and the
+        ``round_trips``, ``entries`` and ``bytes`` of all calls.
+        Returns:
+            List[Dict[str, Any]]: The metrics.
+        Example:
+        | ${metrics}=    Get Metrics
+        | Should Be True    ${metrics}[0][p95_ms] < 100
+        """
+        return self.metrics.report()
+
+    def log_metrics(self) -> List[Dict[str, Any]]:
+        """Logs the metrics as table and returns them, see `Get Metrics`.
+
+        Example:
+        | Log Metrics
+        """
+        logger.info(self.metrics.to_html(), html=True)
+        return self.metrics.report()
+
+    def export_metrics(self, path: str, export_format: str = JSON) -> str:
+        """Writes the metrics to a file as JSON or in the Prometheus text format.
+
+        Args:
+            path (str): Path of the file to write. Existing files are overwritten.
+            export_format (str, optional): Can be JSON or PROMETHEUS. Defaults to JSON.
+        Raises:
+            ValueError: Invalid export format:*
+        Returns:
+            str: The absolute path of the file.
+        Example:
+        | Export Metrics    ${OUTPUT_DIR}${/}ldap_metrics.json
+        | Export Metrics    ${OUTPUT_DIR}${/}ldap_metrics.prom    PROMETHEUS
+        """
+        path = self.metrics.export(path, export_format)
+        logger.info(f"Metrics written to {path}.")
+        return path
+
+    def reset_metrics(self) -> None:
+        """Discards the recorded metrics.
+
+        Example:
+        | Reset Metrics
+        """
+        self.metrics.reset()
@@ -13,11 +13,53 @@
 #  limitations under the License.
 
 from robot.api import logger
-from ldap3 import Connection, MODIFY_ADD, MODIFY_DELETE, MODIFY_REPLACE, BASE, Entry
-from Ldap3Library.connection_manager import Ldap3ConnectionManager
+from ldap3 import Connection, Server, MODIFY_ADD, MODIFY_DELETE, MODIFY_REPLACE, BASE, LEVEL, SUBTREE, NO_ATTRIBUTES, ALL_ATTRIBUTES, Entry, ASYNC_STREAM, MOCK_SYNC
+from Ldap3Library.connection_manager import Ldap3ConnectionManager, Ldap3Url
+from Ldap3Library.controls import (SORT_CONTROL, SORT_EXTENSION, SORT_RESPONSE_CONTROL, VLV_CONTROL, VLV_EXTENSION,
+                                   VLV_RESPONSE_CONTROL, SortKey, VlvWindow, decode_sort_response, decode_vlv_response,
+                                   parse_sort_keys, parse_vlv_window, sort_control, sort_responses, vlv_control)
+from Ldap3Library.dn import dn_depth, is_descendant, normalize_dn, parent_dn, rdn_filter, renamed_dn
+from Ldap3Library.ldif_changes import LDIFChange, LDIFChangeParser, ADD, DELETE, MODIFY, MODRDN, MODIFY_OPERATIONS, merge_modify_changes
+from Ldap3Library.journal import Ldap3Journal
+from Ldap3Library.metrics import measured
+from Ldap3Library.result_cache import Ldap3ResultCache, _MISSING
+from Ldap3Library.slow_queries import Ldap3SlowQueryLog
+from Ldap3Library.subtree_diff import DiffRecord, LDIFChangeWriter, SORT_CHUNK_SIZE, diff_record, external_sort, merge_join
 from assertionengine import AssertionOperator, verify_assertion
-from typing import Any, Optional, List, Union
+from ldap3.core.exceptions import LDAPException
+from ldap3.protocol.rfc2849 import operation_to_ldif
+from ldap3.utils.conv import format_json
+from typing import Any, Dict, FrozenSet, Iterator, Optional, List, Tuple, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from itertools import chain
 from ldif import LDIFParser
+import json, os, tempfile, threading, time
+
+
+@dataclass(frozen=True)
+class Ldap3Snapshot():
+    """Entries of a search, taken once to be asserted locally by the keywords accepting an LDAP URL.
+
+    Iterating a snapshot, also with ``FOR ... IN @{snapshot}``, yields its entries. An empty snapshot is true."""
+    ldap_url: str
+    url: Ldap3Url
+    entries: Tuple[Entry, ...]
+    taken: float
+
+    def __str__(self) -> str:
+        return self.ldap_url
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[Entry]:
+        return iter(self.entries)
+
+    def __bool__(self) -> bool:
+        return True
 
 
 class Ldap3Query():
@@ -26,10 +68,35 @@ class Ldap3Query():
     JSON = "json"
     ENTRIES = "entries"
 
+    STREAM_PAGE_SIZE = 1000
+    MAX_FILTER_DNS = 100
+    WRITE_BUFFER_SIZE = 1024 * 1024
+    DELETE_CHUNK_SIZE = 100
+    TREE_DELETE_CONTROL = "1.2.840.113556.1.4.805"
+    PERSISTENT_SEARCH_CONTROL = "2.16.840.1.113730.3.4.3"
+    SHOW_DELETED_CONTROL = "1.2.840.113556.1.4.417"
+    AD_CAPABILITY = "1.2.840.113556.1.4.800"
+    AUTO = "AUTO"
+    MODIFY_TIMESTAMP = "modifyTimestamp"
+    USN_CHANGED = "uSNChanged"
+    ENTRY_CSN = "entryCSN"
+    WATERMARKS = (MODIFY_TIMESTAMP, USN_CHANGED, ENTRY_CSN)
+
     """Class to handle LDAP queries."""
 
-    def __init__(self):
+    def __init__(self, page_size: int = 0, cache_ttl: float = 0, cache_size: int = 1024,
+                 slow_query_ms: float = 0, slow_query_log: Optional[str] = None):
         self.connection_pool = Ldap3ConnectionManager.connection_pool
+        self.page_size = int(page_size)
+        self.result_cache = Ldap3ResultCache(ttl=cache_ttl, max_entries=cache_size)
+        self.journal = Ldap3Journal()
+        self.metrics = Ldap3ConnectionManager.metrics
+        self.slow_queries = Ldap3SlowQueryLog(threshold_ms=slow_query_ms, path=slow_query_log)
+        # highest watermark value seen per URL and watermark attribute, with the DNs found at that value
+        self.watermarks: Dict[Tuple[Ldap3Url, str], Tuple[str, FrozenSet[str]]] = {}
+
+    # longest first, so "not contains" is not read as "not" and "should be" not as "should"
+    _assertion_operator_names = sorted(AssertionOperator.__members__, key=len, reverse=True)
 
     _multi_value_assertions = [
         AssertionOperator["*="],
@@ -37,28 +104,253 @@ class Ldap3Query():
         AssertionOperator["not contains"]
     ]
 
-    def _is_base_scope(self, ldap_url: str) -> Any:
+    _count_decidable_assertions = [
+        AssertionOperator["=="],
+        AssertionOperator["!="],
+        AssertionOperator["<"],
+        AssertionOperator["<="],
+        AssertionOperator[">"],
+        AssertionOperator[">="]
+    ]
+
+    @staticmethod
+    def _parse(ldap_url: Union[str, Ldap3Snapshot]) -> Ldap3Url:
+        """Parses an LDAP URL, snapshots return the URL they were taken with."""
+        if isinstance(ldap_url, Ldap3Snapshot):
+            return ldap_url.url
+        return Ldap3ConnectionManager.parse_uri(ldap_url)
+
+    def _entries(self, ldap_url: Union[str, Ldap3Snapshot]) -> List[Entry]:
+        """Searches the entries of an LDAP URL, snapshots return their entries without a request."""
+        if isinstance(ldap_url, Ldap3Snapshot):
+            return list(ldap_url.entries)
+        return self.search(ldap_url, self.ENTRIES)
+
+    def _is_base_scope(self, ldap_url: Union[str, Ldap3Snapshot]) -> Ldap3Url:
         """Check if the scope is BASE.
         Args:
-            ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            ldap_url (Union[str, Ldap3Snapshot]): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter> or a snapshot
         Raises:
             ValueError: ScopeError: Scope must be BASE for single object actions
         Returns:
-            dict: Parsed LDAP URL."""
-        _url = Ldap3ConnectionManager.parse_uri(ldap_url)
-        if not _url["scope"] == BASE:
+            Ldap3Url: Parsed LDAP URL."""
+        _url = self._parse(ldap_url)
+        if not _url.scope == BASE:
             logger.error(
-                f"ScopeError: Scope must be BASE for single object actions. Current scope: {_url['scope']}")
+                f"ScopeError: Scope must be BASE for single object actions. Current scope: {_url.scope}")
             raise ValueError(
-                f"ScopeError: Scope must be BASE for single object actions. Current scope: {_url['scope']}")
+                f"ScopeError: Scope must be BASE for single object actions. Current scope: {_url.scope}")
         return _url
 
-    def search(self, ldap_url: str, return_type: str = LDIF) -> Union[List[dict], List[str], str]:
+    @contextmanager
+    def _connection(self, _url: Ldap3Url) -> Iterator[Connection]:
+        """Checks out a pooled connection for the host and bind DN of a parsed LDAP URL."""
+        with self.connection_pool.connection(_url.host, _url.bind_name) as connection, self.metrics.track(connection):
+            yield connection
+
+    def _invalidate(self, _url: Ldap3Url, dn: Optional[str] = None) -> None:
+        """Drops the cached search results a write to the DN may have changed, all of the host without DN."""
+        dropped = self.result_cache.invalidate(_url.host, dn)
+        if dropped:
+            logger.debug(f"Dropped {dropped} cached search results of {_url.host}.")
+
+    def _server_info(self, _url: Ldap3Url, connection: Connection) -> Server:
+        """Returns the server of a connection with root DSE and schema read, also if they were deferred on connect."""
+        return self.connection_pool.get_pool(_url.host, _url.bind_name).load_server_info(connection)
+
+    def _iter_search(self, connection: Connection, _url: Ldap3Url,
+                     attributes: Any = None,
+                     page_size: Optional[int] = None,
+                     size_limit: int = 0) -> Iterator[dict]:
+        """Yields the search result entries of a parsed LDAP URL one by one.
+
+        With a page size greater than 0 the Simple Paged Results control (RFC 2696)
+        is used and only one page is held in memory at a time.
+        Args:
+            connection (Connection): The connection to search with.
+            _url (Ldap3Url): Parsed LDAP URL.
+            attributes (Any, optional): Attributes to request. Defaults to the attributes of the URL.
+            page_size (int, optional): Entries per page, 0 disables paging. Defaults to the library page size.
+            size_limit (int, optional): Maximum number of entries the server returns, 0 for no limit. Defaults to 0.
+        Returns:
+            Iterator[dict]: ldap3 search responses of type searchResEntry."""
+        if attributes is None:
+            attributes = _url.attributes
+        if page_size is None:
+            page_size = self.page_size
+        page_size = int(page_size)
+        sort_keys, window, controls = self._sort_controls(_url, connection)
+        if controls:
+            # the server sorts the complete result, paging is not combined with sort or VLV
+            # and the pages of the paged search generator would be yielded in reverse order
+            page_size = 0
+        if sort_keys and not controls and attributes and ALL_ATTRIBUTES not in attributes:
+            # sorting on the client needs the values of the sort attributes
+            attributes = tuple(dict.fromkeys(chain(attributes, (key.attribute for key in sort_keys))))
+        count = 0
+        # the time the caller spends between two entries is not part of the search
+        seconds = 0.0
+        started = time.perf_counter()
+        try:
+            if page_size > 0:
+                responses = connection.extend.standard.paged_search(search_base=_url.base,
+                                                                    search_filter=_url.filter,
+                                                                    search_scope=_url.scope,
+                                                                    attributes=attributes,
+                                                                    size_limit=size_limit,
+                                                                    controls=controls,
+                                                                    paged_size=page_size,
+                                                                    generator=True)
+            else:
+                connection.search(search_base=_url.base,
+                                  search_filter=_url.filter,
+                                  search_scope=_url.scope,
+                                  attributes=attributes,
+                                  size_limit=size_limit,
+                                  controls=controls)
+                responses = connection.response or []
+            if sort_keys:
+                responses = self._sorted_window(_url, connection, responses, sort_keys, window, bool(controls))
+            for response in responses:
+                if response["type"] == "searchResEntry":
+                    count += 1
+                    seconds += time.perf_counter() - started
+                    started = None
+                    yield response
+                    started = time.perf_counter()
+        finally:
+            if started is not None:
+                seconds += time.perf_counter() - started
+            self.metrics.add(entries=count)
+            self.slow_queries.record(_url, attributes, count, seconds, page_size)
+
+    def set_page_size(self, page_size: int) -> int:
+        """Sets the page size used by all keywords searching the directory.
+
+        A page size greater than 0 enables the Simple Paged Results control (RFC 2696),
+        so large result sets are fetched page by page instead of hitting the server size limit.
+        Args:
+            page_size (int): Entries per page, 0 disables paging.
+        Returns:
+            int: The previous page size.
+        Example:
+        | ${old}=    Set Page Size    500
+        | Search    ldap://localhost:389/ou=users,dc=example,dc=com??sub?(objectClass=*)
+        | Set Page Size    ${old}
+        """
+        previous = self.page_size
+        self.page_size = int(page_size)
+        logger.info(f"Page size set to {self.page_size}, was {previous}.")
+        return previous
+
+    def set_slow_query_threshold(self, threshold_ms: float, log_file: Optional[str] = None) -> float:
+        """Sets the duration above which searches are logged as slow.
+
+        Every search of the keywords taking longer is logged as warning and appended as JSON line
+        with host, base, scope, filter, attributes, page size, entries and duration to the log file.
+        The duration excludes the time spent on processing the results, so the slow searches point
+        to unindexed filters and oversized subtree scopes.
+        Args:
+            threshold_ms (float): Threshold in milliseconds, 0 disables the log.
+            log_file (str, optional): Path of the log file. Defaults to ldap3library_slow_queries.log in the output directory.
+        Returns:
+            float: The previous threshold.
+        Example:
+        | Set Slow Query Threshold    200
+        | Set Slow Query Threshold    50    ${OUTPUT_DIR}${/}slow_searches.log
+        """
+        previous = self.slow_queries.threshold_ms
+        self.slow_queries.threshold_ms = float(threshold_ms)
+        if log_file:
+            self.slow_queries.path = log_file
+        logger.info(f"Slow query threshold set to {self.slow_queries.threshold_ms:g} ms, was {previous:g} ms.")
+        return previous
+
+    def _sort_controls(self, _url: Ldap3Url, connection: Connection) -> Tuple[Optional[List[SortKey]], Optional[VlvWindow], Optional[list]]:
+        """Sort keys, VLV window and the request controls of the x-sort and x-vlv extensions of a parsed LDAP URL.
+
+        The controls are None if the server does not advertise them.
+        Raises:
+            ValueError: If a VLV window is requested without sort keys."""
+        sort = _url.extension(SORT_EXTENSION)
+        vlv = _url.extension(VLV_EXTENSION)
+        if sort is None and vlv is None:
+            return None, None, None
+        if sort is None:
+            raise ValueError(f"A VLV window requires sort keys: {_url.base}")
+        sort_keys = parse_sort_keys(sort)
+        window = parse_vlv_window(vlv) if vlv is not None else None
+        info = self._server_info(_url, connection).info
+        supported = {control[0] for control in info.supported_controls} if info else set()
+        if SORT_CONTROL not in supported or (window and VLV_CONTROL not in supported):
+            logger.warn(f"{_url.host} does not support server-side sort{' and VLV' if window else ''}, "
+                        f"the result of {_url.base} is sorted on the client.")
+            return sort_keys, window, None
+        return sort_keys, window, [sort_control(sort_keys)] + ([vlv_control(window)] if window else [])
+
+    @staticmethod
+    def _sorted_window(_url: Ldap3Url, connection: Connection, responses: List[dict],
+                       sort_keys: List[SortKey], window: Optional[VlvWindow], sent: bool) -> List[dict]:
+        """Sorts and cuts the responses on the client if the server did not, see `Search`."""
+        result_controls = (connection.result or {}).get("controls") or {} if sent else {}
+        sorted_by_server = sent and SORT_RESPONSE_CONTROL in result_controls \
+            and decode_sort_response(result_controls[SORT_RESPONSE_CONTROL]["value"]) == 0
+        windowed_by_server = sent and VLV_RESPONSE_CONTROL in result_controls
+        if windowed_by_server:
+            position, content_count, result = decode_vlv_response(result_controls[VLV_RESPONSE_CONTROL]["value"])
+            logger.info(f"VLV window of {_url.base} at position {position} of {content_count} entries, result code {result}.")
+        if sorted_by_server and (windowed_by_server or not window):
+            return responses
+        if sent:
+            logger.warn(f"{_url.host} ignored the sort or VLV control, the result of {_url.base} is sorted on the client.")
+        entries = [response for response in responses if response["type"] == "searchResEntry"]
+        if not sorted_by_server:
+            entries = sort_responses(entries, sort_keys)
+        if window and not windowed_by_server:
+            entries = entries[window.offset - 1:window.offset - 1 + window.count]
+        return entries
+
+    @staticmethod
+    def _with_sort(_url: Ldap3Url, sort_by: Optional[str], vlv_offset: Optional[int], vlv_count: Optional[int]) -> Ldap3Url:
+        """Replaces the x-sort and x-vlv extensions of a parsed LDAP URL with keyword arguments."""
+        if not sort_by and vlv_offset is None and vlv_count is None:
+            return _url
+        extensions = [extension for extension in _url.extensions or ()
+                      if extension.lstrip("!").partition("=")[0].lower() not in (SORT_EXTENSION, VLV_EXTENSION)]
+        sort = sort_by or _url.extension(SORT_EXTENSION)
+        if sort:
+            extensions.append(f"{SORT_EXTENSION}={sort}")
+        if vlv_offset is not None or vlv_count is not None:
+            if vlv_count is None:
+                raise ValueError("A VLV window requires vlv_count.")
+            extensions.append(f"{VLV_EXTENSION}={1 if vlv_offset is None else int(vlv_offset)},{int(vlv_count)}")
+        elif _url.extension(VLV_EXTENSION) is not None:
+            extensions.append(f"{VLV_EXTENSION}={_url.extension(VLV_EXTENSION)}")
+        return _url._replace(extensions=tuple(extensions))
+
+    @measured
+    def search(self, ldap_url: str, return_type: str = LDIF, page_size: Optional[int] = None,
+               incremental: bool = False,
+               sort_by: Optional[str] = None,
+               vlv_offset: Optional[int] = None,
+               vlv_count: Optional[int] = None) -> Union[List[dict], List[str], str]:
         """Searches the LDAP directory using the provided URL.
 
         Args:
             ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
             return_type (str, optional): Can be LDIF, JSON or ENTRIES. Defaults to LDIF.
+            page_size (int, optional): Entries per page for a paged search, 0 disables paging. Defaults to the library page size.
+            incremental (bool, optional): Returns only the entries created or modified since the last incremental
+                search of the URL, see `Search Changes`. Defaults to False.
+            sort_by (str, optional): Attributes to sort by with the server-side sort control (RFC 2891), separated
+                by commas, a leading - sorts descending. Overrides the x-sort URL extension. Defaults to None.
+            vlv_offset (int, optional): Position of the first entry of a Virtual List View window, starting at 1. Defaults to 1.
+            vlv_count (int, optional): Number of entries of the VLV window. Overrides the x-vlv URL extension. Defaults to None.
+
+        Sorting and windows can also be part of the URL as extensions ``x-sort=<keys>`` and ``x-vlv=<offset>,<count>``,
+        commas have to be percent-encoded. They apply to all keywords searching the URL.
+        Sorted searches are not paged, with VLV only the window is transferred. If the server does not support
+        the controls, the entries are sorted and cut on the client and a warning is logged.
 
         Raises:
             ValueError: Invalid return type:*
@@ -70,31 +362,432 @@ class Ldap3Query():
         | Search ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)  
         | Search ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)  LDIF
         | Search ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)  JSON
+        | Search ldap://localhost:389/ou=users,dc=example,dc=com??sub?(objectClass=*)  ENTRIES  page_size=500
+        | Search ldap://localhost:389/ou=users,dc=example,dc=com??sub?(objectClass=*)  ENTRIES  incremental=True
+        | Search ldap://localhost:389/ou=users,dc=example,dc=com?cn,sn?sub?(objectClass=person)  ENTRIES  sort_by=sn  vlv_count=50
+        | Search ldap://localhost:389/ou=users,dc=example,dc=com?cn,sn?sub?(objectClass=person)?x-sort=-sn%2Ccn,x-vlv=101%2C50
         """
-        _url = Ldap3ConnectionManager.parse_uri(ldap_url)
-        connection: Connection = self.connection_pool.get_connection(
-            _url["host"])
-        connection.search(search_base=_url["base"],
-                          search_filter=_url["filter"],
-                          search_scope=_url["scope"],
-                          attributes=_url["attributes"])
-        logger.info(
-            f"Search results: {len(connection.entries)} entries found.")
+        if return_type not in (self.LDIF, self.JSON, self.ENTRIES):
+            raise ValueError(
+                f"Invalid return type: {return_type}. Must be one of {self.LDIF}, {self.JSON}, or {self.ENTRIES}.")
+        if incremental:
+            return self.search_changes(ldap_url, return_type, page_size=page_size)["changed"]
+        _url = self._with_sort(Ldap3ConnectionManager.parse_uri(ldap_url), sort_by, vlv_offset, vlv_count)
+        return self._search(_url, return_type, page_size)
+
+    def _search(self, _url: Ldap3Url, return_type: str, page_size: Optional[int] = None,
+                cache: bool = True) -> Union[List[dict], List[str], str]:
+        """Searches a parsed LDAP URL and formats the results, see `Search`. Without cache the server is always asked."""
+        result = self.result_cache.get(_url, return_type) if cache else _MISSING
+        if result is not _MISSING:
+            logger.info("Search results: served from the result cache.")
+            return list(result) if return_type == self.ENTRIES else result
+        with self._connection(_url) as connection:
+            # the paged generator resets the response, so the collected pages are put back for the formatters
+            start = time.perf_counter()
+            connection.response = list(self._iter_search(connection, _url, page_size=page_size))
+            logger.info(
+                f"Search results: {len(connection.response)} entries found in {(time.perf_counter() - start) * 1000:.1f} ms.")
+            result = self._format(_url, connection, return_type)
+        self.result_cache.put(_url, return_type, result)
+        return list(result) if return_type == self.ENTRIES else result
+
+    def _format(self, _url: Ldap3Url, connection: Connection, return_type: str) -> Union[List[Entry], str]:
+        """Formats the response of a connection as LDIF, JSON or entries."""
         match return_type:
             case self.LDIF:
                 return connection.response_to_ldif()
             case self.JSON:
                 return connection.response_to_json()
             case self.ENTRIES:
+                # entries are formatted with the schema
+                self._server_info(_url, connection)
                 return connection.entries
-            case _:
+
+    def set_result_cache(self, ttl: float, max_entries: Optional[int] = None) -> float:
+        """Enables, changes or disables the cache of search results.
+
+        Results of `Search` and of the keywords based on it, e.g. `Check Object Exists`, `Check Attribute Value`
+        and `Get Attribute Value Count`, are cached per LDAP URL and return type. The write keywords of this
+        library drop the cached results of the changed entry, of the entries below it and the one level and
+        subtree searches of its ancestors. Changes made by other clients are visible after the TTL at the latest.
+        Changing the cache clears it.
+        Args:
+            ttl (float): Seconds a result is served from the cache, 0 disables the cache.
+            max_entries (int, optional): Maximum number of cached results. Defaults to the current maximum.
+        Returns:
+            float: The previous TTL.
+        Example:
+        | ${old}=    Set Result Cache    30
+        | Check Attribute Value    ldap://localhost:389/cn=admin,dc=example,dc=com?cn??(objectClass=*)    cn    ==    admin
+        | Set Result Cache    ${old}
+        """
+        previous = self.result_cache.ttl
+        self.result_cache.ttl = float(ttl)
+        if max_entries is not None:
+            self.result_cache.max_entries = int(max_entries)
+        self.result_cache.clear()
+        logger.info(f"Result cache TTL set to {self.result_cache.ttl}s for {self.result_cache.max_entries} results, was {previous}s.")
+        return previous
+
+    def clear_result_cache(self) -> None:
+        """Drops all cached search results, e.g. after the directory was changed by another client.
+
+        Example:
+        | Clear Result Cache
+        """
+        logger.info(f"Cleared {len(self.result_cache)} cached search results "
+                    f"({self.result_cache.hits} hits, {self.result_cache.misses} misses).")
+        self.result_cache.clear()
+
+    @measured
+    def get_entry_snapshot(self, ldap_url: str, page_size: Optional[int] = None) -> Ldap3Snapshot:
+        """Fetches an entry, or all entries of a search, once to assert them locally.
+
+        The snapshot can be passed instead of the LDAP URL to `Check Object Exists`, `Check Object Count`,
+        `Check Attribute Value`, `Check Attribute Value Count` and `Get Attribute Value Count`, which then
+        send no request. Later changes of the directory are not reflected, take a new snapshot after writes.
+        The URL has to list all attributes that are checked.
+        Args:
+            ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            page_size (int, optional): Entries per page for a paged search, 0 disables paging. Defaults to the library page size.
+        Returns:
+            Ldap3Snapshot: The URL, the entries and the time the snapshot was taken.
+        Example:
+        | ${admin}=    Get Entry Snapshot    ldap://localhost:389/cn=admin,dc=example,dc=com?cn,sn,description??(objectClass=*)
+        | Check Attribute Value    ${admin}    cn    ==    admin
+        | Check Attribute Value    ${admin}    sn    ==    admin
+        | Check Attribute Value Count    ${admin}    description    ==    1
+        """
+        _url = Ldap3ConnectionManager.parse_uri(ldap_url)
+        snapshot = Ldap3Snapshot(ldap_url=ldap_url,
+                                 url=_url,
+                                 entries=tuple(self.search(ldap_url, self.ENTRIES, page_size=page_size)),
+                                 taken=time.time())
+        logger.info(f"Snapshot of {len(snapshot)} entries taken from {ldap_url}.")
+        return snapshot
+
+    @measured
+    def search_many(self, ldap_urls: List[str],
+                    return_type: str = LDIF,
+                    workers: int = 4,
+                    page_size: Optional[int] = None) -> Dict[str, Union[List[dict], List[str], str]]:
+        """Runs several searches concurrently, e.g. the same search on every replica or below many base DNs.
+
+        Every search checks out its own pooled connection of the host, so all hosts have to be connected
+        before. The searches take about as long as the slowest one instead of the sum of all of them.
+        Args:
+            ldap_urls (List[str]): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            return_type (str, optional): Can be LDIF, JSON or ENTRIES. Defaults to LDIF.
+            workers (int, optional): Maximum number of concurrent searches. Defaults to 4.
+            page_size (int, optional): Entries per page for a paged search, 0 disables paging. Defaults to the library page size.
+        Raises:
+            ValueError: Invalid return type:*
+        Returns:
+            Dict[str, Union[List[dict], List[str], str]]: The search results of each URL in the specified format, in the order of the given URLs.
+        Example:
+        | ${results}=    Search Many    ${REPLICA_URLS}    JSON
+        | ${results}=    Search Many    ${OU_URLS}    ENTRIES    workers=8
+        """
+        if return_type not in (self.LDIF, self.JSON, self.ENTRIES):
+            raise ValueError(
+                f"Invalid return type: {return_type}. Must be one of {self.LDIF}, {self.JSON}, or {self.ENTRIES}.")
+        ldap_urls = list(dict.fromkeys(ldap_urls))
+        search = partial(self.search, return_type=return_type, page_size=page_size)
+        started = time.monotonic()
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(int(workers), len(ldap_urls) or 1))) as executor:
+                results = dict(zip(ldap_urls, executor.map(search, ldap_urls)))
+        finally:
+            self.slow_queries.log_pending()
+        logger.info(f"{len(results)} searches finished in {time.monotonic() - started:.3f}s.")
+        return results
+
+    def _watermark_attribute(self, _url: Ldap3Url, connection: Connection, watermark: str) -> str:
+        """Resolves AUTO to uSNChanged on Active Directory, entryCSN if the schema has it, modifyTimestamp otherwise."""
+        if watermark.upper() != self.AUTO:
+            attribute = next((name for name in self.WATERMARKS if name.lower() == watermark.lower()), None)
+            if attribute is None:
                 raise ValueError(
-                    f"Invalid return type: {return_type}. Must be one of {self.LDIF}, {self.JSON}, or {self.ENTRIES}.")
+                    f"Invalid watermark: {watermark}. Must be one of {self.AUTO}, {', '.join(self.WATERMARKS)}.")
+            return attribute
+        server = self._server_info(_url, connection)
+        if server.info and self.AD_CAPABILITY in server.info.other.get("supportedCapabilities", []):
+            return self.USN_CHANGED
+        if server.schema and self.ENTRY_CSN in server.schema.attribute_types:
+            return self.ENTRY_CSN
+        return self.MODIFY_TIMESTAMP
 
-    def check_object_exists(self, ldap_url: str):
-        """Check if an object exists in the LDAP directory.
+    @staticmethod
+    def _pop_attribute(response: dict, attribute: str, keep: bool) -> Optional[str]:
+        """Returns the raw value of an attribute of a search response, removes it unless it was requested."""
+        value = None
+        for attributes in ("raw_attributes", "attributes"):
+            key = next((key for key in response.get(attributes, {}) if key.lower() == attribute.lower()), None)
+            if key is not None:
+                values = response[attributes][key] if keep else response[attributes].pop(key)
+                if attributes == "raw_attributes" and values:
+                    value = values[0].decode("utf-8") if isinstance(values[0], bytes) else str(values[0])
+        return value
+
+    @staticmethod
+    def _watermark_key(attribute: str, value: str) -> Any:
+        """Sort key of watermark values, update sequence numbers are compared as numbers."""
+        return int(value) if attribute == Ldap3Query.USN_CHANGED else value
+
+    def _deleted_since(self, _url: Ldap3Url, connection: Connection, usn: str) -> List[str]:
+        """DNs of the tombstones of Active Directory below the URL base deleted after an update sequence number."""
+        naming_context = self._server_info(_url, connection).info.other.get("defaultNamingContext", [""])[0]
+        connection.search(search_base=f"CN=Deleted Objects,{naming_context}",
+                          search_filter=f"(&(isDeleted=TRUE)(uSNChanged>={usn}))",
+                          search_scope=LEVEL,
+                          attributes=["lastKnownParent", "msDS-LastKnownRDN"],
+                          controls=[(self.SHOW_DELETED_CONTROL, True, None)])
+        deleted = []
+        for response in connection.response or []:
+            if response["type"] != "searchResEntry":
+                continue
+            parent = self._pop_attribute(response, "lastKnownParent", keep=True)
+            rdn = self._pop_attribute(response, "msDS-LastKnownRDN", keep=True)
+            if parent is None or rdn is None:
+                continue
+            dn = f"{response['dn'].split('=', 1)[0]}={rdn},{parent}"
+            if (_url.scope == SUBTREE and is_descendant(dn, _url.base)
+                    or _url.scope == LEVEL and normalize_dn(parent) == normalize_dn(_url.base)
+                    or normalize_dn(dn) == normalize_dn(_url.base)):
+                deleted.append(dn)
+        return deleted
+
+    @measured
+    def search_changes(self, ldap_url: str,
+                       return_type: str = LDIF,
+                       watermark: str = AUTO,
+                       page_size: Optional[int] = None) -> Dict[str, Any]:
+        """Searches the entries created or modified since the last search of the URL.
+
+        The library remembers the highest value of the watermark attribute found per URL, later searches
+        add it to the filter, so the server only returns the changed entries. The first search of a URL
+        returns all entries. The watermark attributes are:
+        - uSNChanged: the update sequence number of Active Directory
+        - entryCSN: the change sequence number of OpenLDAP, stored in the contextCSN of the naming context
+        - modifyTimestamp: the modification time every RFC 4512 server maintains, with a resolution of one second
+        AUTO selects uSNChanged on Active Directory, entryCSN if the schema has it and modifyTimestamp otherwise.
+        Entries found at the watermark value again are not returned twice.
+
+        Deleted entries are detected on Active Directory only, by searching the tombstones with the
+        Show Deleted control. Other servers return ``None`` as deleted entries.
         Args:
             ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            return_type (str, optional): Can be LDIF, JSON or ENTRIES. Defaults to LDIF.
+            watermark (str, optional): AUTO, uSNChanged, entryCSN or modifyTimestamp. Defaults to AUTO.
+            page_size (int, optional): Entries per page for a paged search, 0 disables paging. Defaults to the library page size.
+        Raises:
+            ValueError: Invalid return type:*
+            ValueError: Invalid watermark:*
+        Returns:
+            Dict[str, Any]: The ``changed`` entries in the return type, the ``deleted`` DNs or None,
+            the ``watermark`` attribute and its new ``value``, and whether it was the ``initial`` search.
+        Example:
+        | Search Changes    ldap://localhost:389/ou=users,dc=example,dc=com??sub?(objectClass=person)
+        | Run Provisioning
+        | ${changes}=    Search Changes    ldap://localhost:389/ou=users,dc=example,dc=com??sub?(objectClass=person)    ENTRIES
+        | Length Should Be    ${changes}[changed]    2
+        """
+        if return_type not in (self.LDIF, self.JSON, self.ENTRIES):
+            raise ValueError(
+                f"Invalid return type: {return_type}. Must be one of {self.LDIF}, {self.JSON}, or {self.ENTRIES}.")
+        _url = Ldap3ConnectionManager.parse_uri(ldap_url)
+        with self._connection(_url) as connection:
+            attribute = self._watermark_attribute(_url, connection, watermark)
+            value, seen = self.watermarks.get((_url, attribute), (None, frozenset()))
+            # the watermark attribute is operational, so it is requested in addition to the user attributes
+            search_url = _url._replace(attributes=tuple(_url.attributes or ("*",)) + (attribute,))
+            if value is not None:
+                search_url = search_url._replace(filter=f"(&{_url.filter}({attribute}>={value}))")
+            keep = any(name.lower() in (attribute.lower(), "+") for name in _url.attributes or ())
+            changed, new_value, at_value = [], value, set()
+            for response in self._iter_search(connection, search_url, page_size=page_size):
+                entry_value = self._pop_attribute(response, attribute, keep)
+                dn = normalize_dn(response["dn"])
+                # entries of the last watermark value were returned before unless modified again within it
+                if entry_value is not None and entry_value == value and dn in seen:
+                    continue
+                changed.append(response)
+                if entry_value is None:
+                    continue
+                if new_value is None or self._watermark_key(attribute, entry_value) > self._watermark_key(attribute, new_value):
+                    new_value, at_value = entry_value, set()
+                if entry_value == new_value:
+                    at_value.add(dn)
+            if new_value != value:
+                seen = frozenset()
+            self.watermarks[(_url, attribute)] = (new_value, frozenset(seen | at_value))
+            deleted = None
+            if attribute == self.USN_CHANGED:
+                deleted = self._deleted_since(_url, connection, value) if value is not None else []
+            connection.response = changed
+            result = self._format(_url, connection, return_type)
+        logger.info(f"Search changes: {len(changed)} changed and {len(deleted or [])} deleted entries "
+                    f"since {attribute} {value}, watermark now {new_value}.")
+        return {"changed": list(result) if return_type == self.ENTRIES else result,
+                "deleted": deleted,
+                "watermark": attribute,
+                "value": new_value,
+                "initial": value is None}
+
+    def reset_watermarks(self, ldap_url: Optional[str] = None) -> int:
+        """Forgets the watermarks of `Search Changes`, so the next search returns all entries again.
+
+        Args:
+            ldap_url (str, optional): Forget the watermarks of this URL only. Defaults to all URLs.
+        Returns:
+            int: Number of forgotten watermarks.
+        Example:
+        | Reset Watermarks
+        | Reset Watermarks    ldap://localhost:389/ou=users,dc=example,dc=com??sub?(objectClass=person)
+        """
+        _url = Ldap3ConnectionManager.parse_uri(ldap_url) if ldap_url else None
+        keys = [key for key in self.watermarks if _url is None or key[0] == _url]
+        for key in keys:
+            del self.watermarks[key]
+        return len(keys)
+
+    @measured
+    def search_to_file(self, ldap_url: str,
+                       output_file: str,
+                       file_format: str = LDIF,
+                       page_size: Optional[int] = None) -> Tuple[int, str]:
+        """Searches the LDAP directory and writes the results to a file entry by entry.
+
+        The search is always paged, so neither the results nor the export are held in memory.
+        Args:
+            ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            output_file (str): Path of the file to write. Existing files are overwritten.
+            file_format (str, optional): Can be LDIF or JSON. Defaults to LDIF.
+            page_size (int, optional): Entries per page. Defaults to the library page size or 1000 if paging is disabled.
+        Raises:
+            ValueError: Invalid file format:*
+        Returns:
+            Tuple[int, str]: The number of entries written and the absolute path of the file.
+        Example:
+        | ${count}    ${path}=    Search To File    ldap://localhost:389/ou=users,dc=example,dc=com??sub?(objectClass=*)    ${OUTPUT_DIR}${/}users.ldif
+        | ${count}    ${path}=    Search To File    ldap://localhost:389/ou=users,dc=example,dc=com??sub?(objectClass=*)    ${OUTPUT_DIR}${/}users.json    JSON
+        """
+        file_format = file_format.lower()
+        if file_format not in (self.LDIF, self.JSON):
+            raise ValueError(
+                f"Invalid file format: {file_format}. Must be one of {self.LDIF} or {self.JSON}.")
+        _url = Ldap3ConnectionManager.parse_uri(ldap_url)
+        page_size = page_size or self.page_size or self.STREAM_PAGE_SIZE
+        path = os.path.abspath(output_file)
+        count = 0
+        with self._connection(_url) as connection:
+            with open(path, "w", encoding="utf-8", newline="", buffering=self.WRITE_BUFFER_SIZE) as stream:
+                if file_format == self.LDIF:
+                    stream.write("version: 1" + os.linesep)
+                else:
+                    stream.write('{"entries": [')
+                for response in self._iter_search(connection, _url, page_size=page_size):
+                    if file_format == self.LDIF:
+                        # drop the trailing "# total number of entries" comment of the single entry record
+                        stream.write(os.linesep.join(operation_to_ldif("searchResponse", [response])[:-1]) + os.linesep)
+                    else:
+                        stream.write("," if count else "")
+                        stream.write(os.linesep + json.dumps({"dn": response["dn"], "attributes": dict(response["attributes"])},
+                                                             ensure_ascii=True, sort_keys=True, default=format_json))
+                    count += 1
+                if file_format == self.LDIF:
+                    stream.write(f"# total number of entries: {count}" + os.linesep)
+                else:
+                    stream.write(os.linesep + "]}" + os.linesep)
+        logger.info(f"Search results: {count} entries written to {path}.")
+        return count, path
+
+    def _diff_source(self, side: str, base: Optional[str], ignore_attributes: List[str],
+                     page_size: Optional[int] = None) -> Iterator[DiffRecord]:
+        """Yields the entries of an LDAP URL or a LDIF file for `Diff Subtrees`, LDIF entries only below ``base``."""
+        if "://" in side:
+            _url = Ldap3ConnectionManager.parse_uri(side)
+            with self._connection(_url) as connection:
+                for response in self._iter_search(connection, _url, attributes=_url.attributes or [ALL_ATTRIBUTES],
+                                                  page_size=page_size or self.page_size or self.STREAM_PAGE_SIZE):
+                    yield diff_record(response["dn"], response["raw_attributes"], ignore_attributes)
+            return
+        with open(side, "rb") as ldif:
+            for dn, entry in LDIFParser(ldif).parse():
+                if dn and (base is None or is_descendant(dn, base)):
+                    yield diff_record(dn, entry, ignore_attributes)
+
+    @measured
+    def diff_subtrees(self, left: str, right: str,
+                      output_file: str,
+                      ignore_attributes: Optional[List[str]] = None,
+                      page_size: Optional[int] = None,
+                      chunk_size: int = SORT_CHUNK_SIZE) -> Dict[str, Any]:
+        """Compares two subtrees and writes the differences as LDIF change records.
+
+        Each side is an LDAP URL or the path of a LDIF file, e.g. a golden export. Entries are matched by DN,
+        so both sides have to use the same base. With a LDIF file and an LDAP URL, only the entries of the
+        file below the base of the URL are compared.
+
+        Both sides are streamed, sorted by DN with an external sort that keeps at most ``chunk_size``
+        entries in memory and spills sorted runs to temporary files next to the output file, and
+        merge-joined. Entries are compared by a hash of their attributes, attribute names case-insensitively
+        and values in any order. The change records turn the left side into the right side and can be
+        applied with `Apply LDIF Changes`: adds and modifies parents first, then deletes children first.
+        Args:
+            left (str): LDAP URL or LDIF file of the side to change, e.g. the migrated directory.
+            right (str): LDAP URL or LDIF file of the expected side.
+            output_file (str): Path of the LDIF change file. Existing files are overwritten.
+            ignore_attributes (List[str], optional): Attributes not compared, e.g. operational attributes of an export. Defaults to None.
+            page_size (int, optional): Entries per page of the searches. Defaults to the library page size or 1000 if paging is disabled.
+            chunk_size (int, optional): Entries per sorted run. Defaults to 100000.
+        Returns:
+            Dict[str, Any]: The number of ``added``, ``deleted``, ``modified`` and ``unchanged`` entries,
+            whether the subtrees are ``equal`` and the absolute ``path`` of the change file.
+        Example:
+        | ${diff}=    Diff Subtrees    ldap://old:389/ou=users,dc=example,dc=com??sub?(objectClass=*)    ldap://new:389/ou=users,dc=example,dc=com??sub?(objectClass=*)    ${OUTPUT_DIR}${/}users.diff.ldif
+        | Should Be True    ${diff}[equal]
+        | @{operational}=    Create List    entryUUID    entryCSN    createTimestamp    modifyTimestamp    creatorsName    modifiersName
+        | Diff Subtrees    ldap://localhost:389/dc=example,dc=com??sub?(objectClass=*)    ${CURDIR}${/}golden.ldif    ${OUTPUT_DIR}${/}golden.diff.ldif    ${operational}
+        """
+        ignore_attributes = list(ignore_attributes or [])
+        urls = [Ldap3ConnectionManager.parse_uri(side) for side in (left, right) if "://" in side]
+        base = urls[0].base if urls else None
+        path = os.path.abspath(output_file)
+        counts = {"added": 0, "deleted": 0, "modified": 0, "unchanged": 0}
+        with tempfile.TemporaryDirectory(prefix="ldap3diff", dir=os.path.dirname(path)) as directory, \
+                open(path, "wb", buffering=self.WRITE_BUFFER_SIZE) as output:
+            writer = LDIFChangeWriter(output)
+            # each side is read completely before its first entry is joined, so one connection is used at a time
+            left_sorted = external_sort(self._diff_source(left, base, ignore_attributes, page_size), directory, int(chunk_size))
+            right_sorted = external_sort(self._diff_source(right, base, ignore_attributes, page_size), directory, int(chunk_size))
+
+            def deletes() -> Iterator[DiffRecord]:
+                for left_record, right_record in merge_join(left_sorted, right_sorted):
+                    if right_record is None:
+                        counts["deleted"] += 1
+                        yield DiffRecord(left_record.key, left_record.dn, b"", {})
+                    elif left_record is None:
+                        counts["added"] += 1
+                        writer.add(right_record)
+                    elif left_record.digest != right_record.digest:
+                        counts["modified"] += 1
+                        writer.modify(left_record, right_record)
+                    else:
+                        counts["unchanged"] += 1
+
+            for record in external_sort(deletes(), directory, int(chunk_size), reverse=True):
+                writer.delete(record.dn)
+        logger.info(f"Diff Subtrees: {counts['added']} added, {counts['deleted']} deleted, {counts['modified']} modified "
+                    f"and {counts['unchanged']} unchanged entries, changes written to {path}.")
+        return {**counts, "equal": not (counts["added"] or counts["deleted"] or counts["modified"]), "path": path}
+
+    @measured
+    def check_object_exists(self, ldap_url: Union[str, Ldap3Snapshot]):
+        """Check if an object exists in the LDAP directory.
+        Args:
+            ldap_url (Union[str, Ldap3Snapshot]): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter> or a snapshot of `Get Entry Snapshot`
         Returns:
             bool: True if the object exists, False otherwise.
         Raises:
@@ -104,23 +797,86 @@ class Ldap3Query():
         | Check Object Exists    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)
         """
         _url = self._is_base_scope(ldap_url)
-        entries = self.search(ldap_url, self.ENTRIES)
+        entries = self._entries(ldap_url)
         exists = ((len(entries) == 1) and
-                  (entries[0].entry_dn == _url["base"])
+                  (entries[0].entry_dn == _url.base)
                   )
         if not exists:
-            logger.info(f"Object {_url['base']} does not exist.")
+            logger.info(f"Object {_url.base} does not exist.")
             return False
-        logger.info(f"Object {_url['base']} exists: {exists}")
+        logger.info(f"Object {_url.base} exists: {exists}")
         return exists
 
-    def check_object_count(self, ldap_url: str,
+    @measured
+    def check_objects_exist(self, ldap_url: str,
+                            dns: List[str],
+                            should_exist: Optional[bool] = True,
+                            workers: int = 4,
+                            assertion_message: str = None) -> Dict[str, bool]:
+        """Check which of many objects exist in the LDAP directory in a few round trips.
+
+        The DNs are grouped by their parent entry. Every group is checked with one level searches
+        with an OR-filter of the RDNs, requesting no attributes. The groups are searched concurrently
+        over pooled connections. Base DN, scope and attributes of the URL are ignored, its filter
+        has to match as well, like with `Check Object Exists`.
+        Args:
+            ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            dns (List[str]): DNs of the objects to check.
+            should_exist (bool, optional): True asserts all objects exist, False asserts none exists,
+                None only returns the result. Defaults to True.
+            workers (int, optional): Number of concurrent searches. Defaults to 4.
+            assertion_message (str, optional): Custom message for the assertion. Defaults to None.
+        Raises:
+            AssertionError: If an object does not exist or exists against the expectation.
+        Returns:
+            Dict[str, bool]: Whether each DN exists, in the order of the given DNs.
+        Example:
+        | Check Objects Exist    ldap://localhost:389/dc=example,dc=com    ${DNS}
+        | Check Objects Exist    ldap://localhost:389/dc=example,dc=com    ${DELETED_DNS}    should_exist=False
+        | ${exists}=    Check Objects Exist    ldap://localhost:389/dc=example,dc=com    ${DNS}    should_exist=None
+        """
+        _url = Ldap3ConnectionManager.parse_uri(ldap_url)
+        groups: Dict[str, List[str]] = {}
+        for dn in dict.fromkeys(dns):
+            groups.setdefault(normalize_dn(parent_dn(dn)), []).append(dn)
+        searches = [(group[0], group[i:i + self.MAX_FILTER_DNS])
+                    for group in groups.values()
+                    for i in range(0, len(group), self.MAX_FILTER_DNS)]
+
+        def found(search):
+            parent = parent_dn(search[0])
+            rdn_filters = "".join(rdn_filter(dn) for dn in search[1])
+            group_url = _url._replace(base=parent, scope=LEVEL, filter=f"(&{_url.filter}(|{rdn_filters}))")
+            with self._connection(_url) as connection:
+                return [normalize_dn(response["dn"])
+                        for response in self._iter_search(connection, group_url, attributes=[NO_ATTRIBUTES])]
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+                existing = set(chain.from_iterable(executor.map(found, searches)))
+        finally:
+            self.slow_queries.log_pending()
+        result = {dn: normalize_dn(dn) in existing for dn in dns}
+        missing = [dn for dn, exists in result.items() if not exists]
+        logger.info(f"{len(result) - len(missing)} of {len(result)} objects exist in {len(searches)} searches.")
+        if should_exist is True and missing:
+            raise AssertionError(assertion_message or f"Objects do not exist: {missing}")
+        if should_exist is False and len(missing) < len(result):
+            raise AssertionError(assertion_message or f"Objects exist: {[dn for dn in result if result[dn]]}")
+        return result
+
+    @measured
+    def check_object_count(self, ldap_url: Union[str, Ldap3Snapshot],
                            assertion_operator: AssertionOperator,
                            expected_count: int,
                            assertion_message: str = None):
         """Check the number of objects returned by the search.
+
+        Only the entries are counted, no attributes are requested. For comparison operators
+        the search stops as soon as the assertion is decided, e.g. ``< 5`` fetches at most 6 entries, and a failure
+        reports the count found until then as lower bound. The entries of a snapshot are counted without a request.
         Args:
-            ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            ldap_url (Union[str, Ldap3Snapshot]): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter> or a snapshot of `Get Entry Snapshot`
             assertion_operator (AssertionOperator): The operator to use for the assertion.
             expected_count (int): The expected number of objects.
             assertion_message (str, optional): Custom message for the assertion. Defaults to None.
@@ -133,28 +889,55 @@ class Ldap3Query():
         | Check Object Count    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)    >    0
         | Check Object Count    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)    <=    4
         """
-        _url = Ldap3ConnectionManager.parse_uri(ldap_url)
-        entries = self.search(ldap_url, self.ENTRIES)
-        # connection: Connection = self.connection_pool.get_connection(_url["host"])
-        # connection.search(search_base=_url["base"],
-        #                   search_filter=_url["filter"],
-        #                   search_scope=_url["scope"],
-        #                   attributes=_url["attributes"])
-        actual_count = len(entries)
-        verify_assertion(actual_count, assertion_operator, expected_count,
-                         "Unexpected result count!", assertion_message)
+        _url = self._parse(ldap_url)
+        limit = None
+        if isinstance(ldap_url, Ldap3Snapshot):
+            actual_count = len(ldap_url)
+        else:
+            if assertion_operator in self._count_decidable_assertions:
+                # comparisons with the expected count are decided once one more entry than expected is found
+                limit = max(int(expected_count) + 1, 1)
+            actual_count = self._count(_url, limit)
+        at_least = "at least " if actual_count == limit else ""
+        try:
+            verify_assertion(actual_count, assertion_operator, expected_count,
+                             "Unexpected result count!", assertion_message)
+        except AssertionError as e:
+            if not at_least or assertion_message:
+                raise
+            # counting stopped at the limit, the actual count is not known
+            raise AssertionError(f"Unexpected result count! At least {actual_count} entries found, "
+                                 f"expected {assertion_operator.value} {expected_count}.") from e
         logger.info(
-            f"Expected count: {expected_count}, Actual count: {actual_count}")
+            f"Expected count: {expected_count}, Actual count: {at_least}{actual_count}")
         return True
 
-    def check_attribute_value(self, ldap_url: str,
+    def _count(self, _url: Ldap3Url, limit: Optional[int] = None) -> int:
+        """Counts the entries found for a parsed LDAP URL without requesting any attribute.
+        Args:
+            _url (Ldap3Url): Parsed LDAP URL.
+            limit (int, optional): Stop counting when this number of entries is reached. Defaults to no limit.
+        Returns:
+            int: Number of entries found, at most limit."""
+        count = 0
+        with self._connection(_url) as connection:
+            for _ in self._iter_search(connection, _url,
+                                       attributes=[NO_ATTRIBUTES],
+                                       size_limit=limit or 0):
+                count += 1
+                if count == limit:
+                    break
+        return count
+
+    @measured
+    def check_attribute_value(self, ldap_url: Union[str, Ldap3Snapshot],
                               attribute_name: str,
                               assertion_operator: AssertionOperator,
                               expected_value: Any,
                               assertion_message: str = None):
         """Check the value of an attribute in the LDAP entry.
         Args:
-            ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            ldap_url (Union[str, Ldap3Snapshot]): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter> or a snapshot of `Get Entry Snapshot`
             attribute_name (str): The name of the attribute to check.
             assertion_operator (AssertionOperator): The operator to use for the assertion.
             expected_value (Any): The expected value of the attribute.
@@ -174,9 +957,9 @@ class Ldap3Query():
         | Check Attribute Value    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)    cn    contains    dmi
         """
         result = False
-        _url = Ldap3ConnectionManager.parse_uri(ldap_url)
-        entries = self.search(ldap_url, self.ENTRIES)
-        if attribute_name not in _url["attributes"]:
+        _url = self._parse(ldap_url)
+        entries = self._entries(ldap_url)
+        if attribute_name not in _url.attributes:
             raise ValueError(
                 f"Attribute {attribute_name} not found in the LDAP URL: {ldap_url}")
         if attribute_name not in entries[0].entry_attributes:
@@ -217,14 +1000,114 @@ class Ldap3Query():
         # return actual_value == expected_value, f"Attribute value mismatch: expected {expected_value} {assertion_operator.value} {actual_value}"
         return result
 
-    def check_attribute_value_count(self, ldap_url: str,
+    def _verify_attribute_value(self, attribute_name: str, actual_value: Any,
+                                assertion_operator: AssertionOperator, expected_value: Any) -> None:
+        """Verifies an attribute value like `Check Attribute Value`, a multi-valued attribute passes if any value passes.
+        Raises:
+            AssertionError: If the assertion fails."""
+        values = actual_value if isinstance(actual_value, list) and assertion_operator not in self._multi_value_assertions else [actual_value]
+        error = None
+        for value in values:
+            try:
+                verify_assertion(value=value, operator=assertion_operator, expected=expected_value,
+                                 custom_message=f"{attribute_name}'s current value {actual_value} mismatches with expected value {expected_value}")
+                return
+            except AssertionError as e:
+                error = e
+        raise AssertionError(str(error)) from error
+
+    @classmethod
+    def _parse_assertions(cls, expected_values: Dict[str, Any]) -> Dict[str, Tuple[AssertionOperator, Any]]:
+        """Parses the assertions of `Check Attribute Values`.
+        Raises:
+            ValueError: If an assertion is not an operator and an expected value."""
+        assertions: Dict[str, Tuple[AssertionOperator, Any]] = {}
+        for attribute_name, assertion in (expected_values or {}).items():
+            if isinstance(assertion, str):
+                # operators may contain whitespace, e.g. "not contains admin", and the expected value may be empty, e.g. "== "
+                assertion = assertion.strip()
+                name = next((name for name in cls._assertion_operator_names
+                             if assertion.startswith(name) and not assertion[len(name):len(name) + 1].strip()), None)
+                assertion = (assertion.split(maxsplit=1) + [""])[:2] if name is None else [name, assertion[len(name):].strip()]
+            try:
+                operator, expected_value = assertion
+                if not isinstance(operator, AssertionOperator):
+                    operator = AssertionOperator[operator]
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(
+                    f"Invalid assertion for {attribute_name}: {assertion}. Must be an operator and an expected value.") from e
+            assertions[attribute_name] = (operator, expected_value)
+        return assertions
+
+    def _attribute_mismatches(self, entry: Entry, assertions: Dict[str, Tuple[AssertionOperator, Any]]) -> List[str]:
+        """Evaluates all assertions against an entry. Returns the messages of the failed ones."""
+        mismatches = []
+        for attribute_name, (assertion_operator, expected_value) in assertions.items():
+            if attribute_name not in entry.entry_attributes or not entry[attribute_name].values:
+                mismatches.append(f"Attribute {attribute_name} not found in the LDAP entry.")
+                continue
+            try:
+                self._verify_attribute_value(attribute_name, entry[attribute_name].value,
+                                             assertion_operator, expected_value)
+            except AssertionError as e:
+                mismatches.append(str(e))
+        return mismatches
+
+    @measured
+    def check_attribute_values(self, ldap_url: Union[str, Ldap3Snapshot],
+                               expected_values: Dict[str, Any],
+                               assertion_message: str = None):
+        """Check the values of many attributes of an LDAP entry with one search.
+
+        All attributes are requested with one base search, in addition to the attributes of the URL.
+        Every assertion is evaluated and all mismatches are reported together.
+        Args:
+            ldap_url (Union[str, Ldap3Snapshot]): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter> or a snapshot of `Get Entry Snapshot`
+            expected_values (Dict[str, Any]): Attribute names mapped to an assertion, either a list of operator and
+                expected value or a string of operator and expected value separated by whitespace.
+            assertion_message (str, optional): Custom message for the assertion. Defaults to None.
+        Raises:
+            AssertionError: If one or more assertions fail.
+            ValueError: ScopeError: Scope must be BASE for single object actions
+            ValueError: If an assertion is not an operator and an expected value.
+            ValueError: If no entry or multiple entries are found for the given LDAP URL.
+        Returns:
+            bool: True if all assertions pass.
+        Example:
+        | &{expected}=    Create Dictionary    cn=== admin    sn=!= root    description=not contains guest
+        | Check Attribute Values    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)    ${expected}
+        | ${operator_and_value}=    Create List    >=    2
+        | Check Attribute Values    ${SNAPSHOT}    ${{ {"uidNumber": $operator_and_value} }}
+        """
+        _url = self._is_base_scope(ldap_url)
+        assertions = self._parse_assertions(expected_values)
+        if isinstance(ldap_url, Ldap3Snapshot):
+            entries = self._entries(ldap_url)
+        else:
+            attributes = tuple(dict.fromkeys(chain(_url.attributes or (), assertions)))
+            entries = self._search(_url._replace(attributes=attributes), self.ENTRIES)
+        if len(entries) < 1:
+            raise ValueError(
+                f"No entries found for the given LDAP URL: {ldap_url}")
+        if len(entries) > 1:
+            raise ValueError(
+                f"Multiple entries found for the given LDAP URL: {ldap_url}. Found {len(entries)} entries.")
+        mismatches = self._attribute_mismatches(entries[0], assertions)
+        logger.info(f"{len(assertions) - len(mismatches)} of {len(assertions)} attribute assertions passed for {_url.base}.")
+        if mismatches:
+            raise AssertionError(assertion_message or
+                                 f"{len(mismatches)} attribute value mismatches in {_url.base}:\n" + "\n".join(mismatches))
+        return True
+
+    @measured
+    def check_attribute_value_count(self, ldap_url: Union[str, Ldap3Snapshot],
                                     attribute_name: str,
                                     assertion_operator: AssertionOperator,
                                     expected_value: Any,
                                     assertion_message: str = None):
         """Check the number of values for an attribute in the LDAP entry.
         Args:
-            ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            ldap_url (Union[str, Ldap3Snapshot]): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter> or a snapshot of `Get Entry Snapshot`
             attribute_name (str): The name of the attribute to check.
             assertion_operator (AssertionOperator): The operator to use for the assertion.
             expected_value (Any): The expected number of values for the attribute.
@@ -244,9 +1127,9 @@ class Ldap3Query():
         | Check Attribute Value Count    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)    cn    >    0
         """
         _url = self._is_base_scope(ldap_url)
-        entries = self.search(ldap_url, self.ENTRIES)
+        entries = self._entries(ldap_url)
         _expected = int(expected_value)
-        if attribute_name not in _url["attributes"]:
+        if attribute_name not in _url.attributes:
             raise ValueError(
                 f"Attribute {attribute_name} not found in the LDAP URL: {ldap_url}")
         if attribute_name not in entries[0].entry_attributes:
@@ -255,8 +1138,6 @@ class Ldap3Query():
         if not isinstance(_expected, int):
             raise ValueError(
                 f"Expected value must be an integer. Got {type(_expected)}")
-        self._is_base_scope(ldap_url)
-        entries = self.search(ldap_url, self.ENTRIES)
         value_cnt = len(entries[0][attribute_name].values)
         if not value_cnt or value_cnt < 1:
             raise ValueError(
@@ -268,11 +1149,12 @@ class Ldap3Query():
                          message=assertion_message)
         return True
 
-    def get_attribute_value_count(self, ldap_url: str,
+    @measured
+    def get_attribute_value_count(self, ldap_url: Union[str, Ldap3Snapshot],
                                   attribute_name: str) -> int:
         """Get the number of values for an attribute in the LDAP entry.
         Args:
-            ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            ldap_url (Union[str, Ldap3Snapshot]): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter> or a snapshot of `Get Entry Snapshot`
             attribute_name (str): The name of the attribute to check.
         Raises:
             ValueError: ScopeError: Scope must be BASE for single object actions
@@ -285,8 +1167,8 @@ class Ldap3Query():
         | Get Attribute Value Count    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)
         """
         _url = self._is_base_scope(ldap_url)
-        entries = self.search(ldap_url, self.ENTRIES)
-        if attribute_name not in _url["attributes"]:
+        entries = self._entries(ldap_url)
+        if attribute_name not in _url.attributes:
             raise ValueError(
                 f"Attribute {attribute_name} not found in the LDAP URL: {ldap_url}")
         if not attribute_name in entries[0].entry_attributes:
@@ -295,6 +1177,101 @@ class Ldap3Query():
         value_cnt = len(entries[0][attribute_name].values)
         return value_cnt
 
+    def _watch(self, _url: Ldap3Url) -> Optional[Any]:
+        """Starts a persistent search for changes of the base entry of a parsed LDAP URL on a dedicated connection.
+
+        Returns:
+            Optional[Any]: The ldap3 persistent search, None if the server does not support it."""
+        template = self.connection_pool.get_pool(_url.host, _url.bind_name).template
+        if template.strategy_type == MOCK_SYNC:
+            return None
+        with self._connection(_url) as connection:
+            info = self._server_info(_url, connection).info
+        if not info or not any(control[0] == self.PERSISTENT_SEARCH_CONTROL for control in info.supported_controls):
+            return None
+        # the entry may not exist yet, so its parent is watched for changes of entries with its RDN
+        connection = Connection(server=template.server,
+                                user=template.user,
+                                password=template.password,
+                                authentication=template.authentication,
+                                client_strategy=ASYNC_STREAM)
+        try:
+            connection.bind(read_server_info=False)
+            return connection.extend.standard.persistent_search(search_base=parent_dn(_url.base),
+                                                                search_filter=rdn_filter(_url.base),
+                                                                search_scope=LEVEL,
+                                                                attributes=[NO_ATTRIBUTES],
+                                                                streaming=False)
+        except LDAPException as e:
+            logger.debug(f"Persistent search on {_url.host} failed, polling instead: {e}")
+            connection.unbind()
+            return None
+
+    @measured
+    def wait_until_entry_matches(self, ldap_url: str,
+                                 expected_values: Optional[Dict[str, Any]] = None,
+                                 timeout: float = 30,
+                                 poll_interval: float = 0.1,
+                                 max_poll_interval: float = 5,
+                                 persistent_search: bool = True) -> Entry:
+        """Waits until an LDAP entry exists and its attributes match the expected values.
+
+        The entry is checked as soon as it changes, using a persistent search (draft-ietf-ldapext-psearch)
+        if the server supports it. Otherwise the entry is polled, starting with ``poll_interval``
+        and doubling the interval after every check up to ``max_poll_interval``.
+        The entry is always read from the server, the result cache is bypassed.
+        Args:
+            ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            expected_values (Dict[str, Any], optional): Assertions like in `Check Attribute Values`. Defaults to waiting for the entry to exist.
+            timeout (float, optional): Seconds to wait. Defaults to 30.
+            poll_interval (float, optional): Seconds between the first checks when polling. Defaults to 0.1.
+            max_poll_interval (float, optional): Maximum seconds between two checks, also with a persistent search. Defaults to 5.
+            persistent_search (bool, optional): Use a persistent search if the server supports it. Defaults to True.
+        Raises:
+            AssertionError: If the entry does not match within the timeout.
+            ValueError: ScopeError: Scope must be BASE for single object actions
+            ValueError: If an assertion is not an operator and an expected value.
+        Returns:
+            Entry: The matching entry.
+        Example:
+        | Wait Until Entry Matches    ldap://localhost:389/cn=jdoe,ou=users,dc=example,dc=com???(objectClass=*)
+        | &{expected}=    Create Dictionary    employeeType=== provisioned    mail=*= @example.com
+        | ${entry}=    Wait Until Entry Matches    ldap://localhost:389/cn=jdoe,ou=users,dc=example,dc=com???(objectClass=*)    ${expected}    timeout=60
+        """
+        _url = self._is_base_scope(ldap_url)
+        assertions = self._parse_assertions(expected_values)
+        attributes = tuple(dict.fromkeys(chain(_url.attributes or (), assertions)))
+        deadline = time.monotonic() + float(timeout)
+        interval = float(poll_interval)
+        # the watch is started before the first check, so no change is missed in between
+        watch = self._watch(_url) if persistent_search else None
+        checks = 0
+        try:
+            while True:
+                checks += 1
+                entries = self._search(_url._replace(attributes=attributes), self.ENTRIES, cache=False)
+                mismatches = (self._attribute_mismatches(entries[0], assertions) if entries
+                              else [f"No entry found for {_url.base}."])
+                if not mismatches:
+                    logger.info(f"{_url.base} matched after {checks} checks.")
+                    self._invalidate(_url, _url.base)
+                    return entries[0]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise AssertionError(f"{_url.base} did not match within {float(timeout):g} seconds:\n" + "\n".join(mismatches))
+                if watch:
+                    # every notification triggers a check, the timeout is a safety net for missed notifications
+                    if watch.next(block=True, timeout=min(remaining, float(max_poll_interval))):
+                        while watch.next():
+                            pass
+                else:
+                    time.sleep(min(remaining, interval))
+                    interval = min(interval * 2, float(max_poll_interval))
+        finally:
+            if watch:
+                watch.stop()
+
+    @measured
     def add_attribute_value(self, ldap_url: str,
                             attribute_name: str,
                             attribute_value: str
@@ -314,16 +1291,17 @@ class Ldap3Query():
         | Add Attribute Value    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)    telephoneNumber    444-123-4567
         """
         _url = self._is_base_scope(ldap_url)
-        connection: Connection = self.connection_pool.get_connection(
-            _url["host"])
-        if not connection.modify(dn=_url["base"],
-                                 changes={attribute_name: [(MODIFY_ADD, [attribute_value])]}):
-            raise ValueError(
-                f"Failed to add attribute {attribute_name} with value {attribute_value} to {ldap_url}. Error: {connection.result['description']}")
-        logger.info(
-            f"Added attribute {attribute_name} with value {attribute_value} to {ldap_url}.")
-        return True
+        with self._connection(_url) as connection:
+            if not connection.modify(dn=_url.base,
+                                     changes={attribute_name: [(MODIFY_ADD, [attribute_value])]}):
+                raise ValueError(
+                    f"Failed to add attribute {attribute_name} with value {attribute_value} to {ldap_url}. Error: {connection.result['description']}")
+            self._invalidate(_url, _url.base)
+            logger.info(
+                f"Added attribute {attribute_name} with value {attribute_value} to {ldap_url}.")
+            return True
 
+    @measured
     def remove_attribute_value(self, ldap_url: str,
                                attribute_name: str,
                                attribute_value: str):
@@ -341,16 +1319,17 @@ class Ldap3Query():
         | Remove Attribute Value    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)    telephoneNumber    444-123-4567
         """
         _url = self._is_base_scope(ldap_url)
-        connection: Connection = self.connection_pool.get_connection(
-            _url["host"])
-        if not connection.modify(_url["base"],
-                                 changes={attribute_name: [(MODIFY_DELETE, [attribute_value])]}):
-            raise ValueError(
-                f"Failed to remove attribute {attribute_name} with value {attribute_value} from {ldap_url}. Error: {connection.result['description']}")
-        logger.info(
-            f"Removed attribute {attribute_name} with value {attribute_value} from {ldap_url}.")
-        return True
+        with self._connection(_url) as connection:
+            if not connection.modify(_url.base,
+                                     changes={attribute_name: [(MODIFY_DELETE, [attribute_value])]}):
+                raise ValueError(
+                    f"Failed to remove attribute {attribute_name} with value {attribute_value} from {ldap_url}. Error: {connection.result['description']}")
+            self._invalidate(_url, _url.base)
+            logger.info(
+                f"Removed attribute {attribute_name} with value {attribute_value} from {ldap_url}.")
+            return True
 
+    @measured
     def replace_attribute_value(self, ldap_url: str,
                                 attribute_name: str,
                                 old_value: str,
@@ -363,27 +1342,26 @@ class Ldap3Query():
             new_value (str): The new value to set.
         Raises:
             ValueError: ScopeError: Scope must be BASE for single object actions
-            ValueError: If attribute could not been removed or added in the LDAP entry.
+            ValueError: If the value could not be replaced in the LDAP entry, the entry is left unchanged.
         Returns:
             bool: True if the value was replaced successfully, False otherwise.
         Example:
         | Replace Attribute Value    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)    telephoneNumber    444-123-4567    555-987-6543
         """
         _url = self._is_base_scope(ldap_url)
-        connection: Connection = self.connection_pool.get_connection(
-            _url["host"])
-        if not connection.modify(dn=_url["base"],
-                                 changes={attribute_name: [(MODIFY_DELETE, [old_value])]}):
-            raise ValueError(
-                f"Failed to add attribute {attribute_name} with value {old_value} to {ldap_url}. Error: {connection.result['description']}")
-        if not connection.modify(dn=_url["base"],
-                                 changes={attribute_name: [(MODIFY_ADD, [new_value])]}):
-            raise ValueError(
-                f"Failed to add attribute {attribute_name} with value {new_value} to {ldap_url}. Error: {connection.result['description']}")
-        logger.info(
-            f"Replaced attribute {attribute_name} from {old_value} to {new_value} in {ldap_url}.")
-        return True
+        with self._connection(_url) as connection:
+            # one modify request, so the entry is never left with the old value removed only
+            if not connection.modify(dn=_url.base,
+                                     changes={attribute_name: [(MODIFY_DELETE, [old_value]),
+                                                               (MODIFY_ADD, [new_value])]}):
+                raise ValueError(
+                    f"Failed to replace attribute {attribute_name} value {old_value} with {new_value} in {ldap_url}. Error: {connection.result['description']}")
+            self._invalidate(_url, _url.base)
+            logger.info(
+                f"Replaced attribute {attribute_name} from {old_value} to {new_value} in {ldap_url}.")
+            return True
 
+    @measured
     def overwrite_attribute_value(self, ldap_url: str,
                                   attribute_name: str,
                                   attribute_value: str):
@@ -401,16 +1379,71 @@ class Ldap3Query():
         | Overwrite Attribute Value    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)    telephoneNumber    444-123-4567
         """
         _url = self._is_base_scope(ldap_url)
-        connection: Connection = self.connection_pool.get_connection(
-            _url["host"])
-        if not connection.modify(dn=_url["base"],
-                                 changes={attribute_name: [(MODIFY_REPLACE, [attribute_value])]}):
-            raise ValueError(
-                f"Failed to overwrite {attribute_name} with value {attribute_value} to {ldap_url}. Error: {connection.result['description']}")
-        logger.info(
-            f"Replaced attribute {attribute_name} with value {attribute_value} in {ldap_url}.")
-        return True
+        with self._connection(_url) as connection:
+            if not connection.modify(dn=_url.base,
+                                     changes={attribute_name: [(MODIFY_REPLACE, [attribute_value])]}):
+                raise ValueError(
+                    f"Failed to overwrite {attribute_name} with value {attribute_value} to {ldap_url}. Error: {connection.result['description']}")
+            self._invalidate(_url, _url.base)
+            logger.info(
+                f"Replaced attribute {attribute_name} with value {attribute_value} in {ldap_url}.")
+            return True
+
+    @staticmethod
+    def _modify_changes(changes: Dict[str, Any]) -> Dict[str, List[Tuple[str, list]]]:
+        """Converts operation names and single values of `Modify Entry` changes to ldap3 modify changes.
+        Raises:
+            ValueError: If a change is not an operation and values."""
+        modify_changes: Dict[str, List[Tuple[str, list]]] = {}
+        for attribute_name, operations in changes.items():
+            if operations and isinstance(operations[0], str):
+                operations = [operations]
+            for operation in operations:
+                try:
+                    name, values = operation
+                    name = MODIFY_OPERATIONS[name.lower().removeprefix("modify_")]
+                except (KeyError, TypeError, ValueError, AttributeError) as e:
+                    raise ValueError(
+                        f"Invalid change for {attribute_name}: {operation}. Must be an operation "
+                        f"({', '.join(MODIFY_OPERATIONS)}) and values.") from e
+                values = [] if values is None else [values] if isinstance(values, (str, bytes, int)) else list(values)
+                modify_changes.setdefault(attribute_name, []).append((name, values))
+        return modify_changes
+
+    @measured
+    def modify_entry(self, ldap_url: str, changes: Dict[str, Any]):
+        """Modify many attributes of an LDAP entry with one modify request.
+
+        The changes are applied in the given order and atomically, either all or none are applied.
+        Args:
+            ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            changes (Dict[str, Any]): Attribute names mapped to an operation and values, or to a list of those.
+                Operations are add, delete, replace and increment. Delete without values removes the attribute.
+        Raises:
+            ValueError: ScopeError: Scope must be BASE for single object actions
+            ValueError: If a change is not an operation and values.
+            ValueError: If the entry could not be modified, the entry is left unchanged.
+        Returns:
+            bool: True if the entry was modified successfully.
+        Example:
+        | ${phone}=    Create List    replace    555-987-6543
+        | ${mail}=    Evaluate    [["delete", "old@example.com"], ["add", ["new@example.com", "alias@example.com"]]]
+        | ${title}=    Create List    delete    ${NONE}
+        | Modify Entry    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)
+        | ...    ${{ {"telephoneNumber": $phone, "mail": $mail, "title": $title} }}
+        """
+        _url = self._is_base_scope(ldap_url)
+        modify_changes = self._modify_changes(changes)
+        with self._connection(_url) as connection:
+            if not connection.modify(dn=_url.base, changes=modify_changes):
+                raise ValueError(
+                    f"Failed to modify {ldap_url}. Error: {connection.result['description']}")
+            self._invalidate(_url, _url.base)
+            logger.info(
+                f"Modified {', '.join(modify_changes)} in {ldap_url} with {sum(map(len, modify_changes.values()))} changes.")
+            return True
 
+    @measured
     def add_object_from_ldif(self, ldap_url: str, ldif_file: str, object_class: Optional[str] = "inetOrgPerson"):
         """Add an object from a LDIF file to the LDAP directory.
         Args:
@@ -425,22 +1458,240 @@ class Ldap3Query():
         | Add Object From LDIF    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)    ${CURDIR}${/}..${/}..${/}fake_single.ldif
         """
         _url = Ldap3ConnectionManager.parse_uri(ldap_url)
-        connection: Connection = self.connection_pool.get_connection(
-            _url["host"])
-        parser = LDIFParser(open(ldif_file, "rb"))
-        for dn, record in parser.parse():
-            if not connection.add(dn=dn,
-                                  object_class=object_class,
-                                  attributes=record):
-                raise ValueError(
-                    f"Failed to add object(s) from LIDF to {ldap_url}. Error: {connection.result['description']}")
-            logger.info(f"Added object from LIDF to {ldap_url}.")
-        return True
+        with self._connection(_url) as connection, open(ldif_file, "rb") as ldif:
+            parser = LDIFParser(ldif)
+            for dn, record in parser.parse():
+                if not connection.add(dn=dn,
+                                      object_class=object_class,
+                                      attributes=record):
+                    raise ValueError(
+                        f"Failed to add object(s) from LIDF to {ldap_url}. Error: {connection.result['description']}")
+                self._invalidate(_url, dn)
+                self.journal.record(_url, dn)
+                logger.info(f"Added object from LIDF to {ldap_url}.")
+            return True
+
+    @measured
+    def bulk_add_objects_from_ldif(self, ldap_url: str,
+                                   ldif_file: str,
+                                   object_class: Optional[str] = None,
+                                   workers: int = 8,
+                                   window: int = 256,
+                                   continue_on_error: bool = False) -> Dict[str, Any]:
+        """Add many objects from a LDIF file to the LDAP directory concurrently.
+
+        The file is streamed and the adds are sent over up to ``workers`` pooled connections, with at most
+        ``window`` adds in flight. An entry is only added after its parent entry from the same file was added,
+        so the file has to list parents before their children. Records without DN are skipped.
+        Args:
+            ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            ldif_file (str): Path to the LDIF file.
+            object_class (str, optional): Object class added to every entry. Defaults to the objectClass values of the records.
+            workers (int, optional): Number of concurrent adds. Defaults to 8.
+            window (int, optional): Maximum number of adds in flight. Defaults to 256.
+            continue_on_error (bool, optional): Add the remaining entries if an add fails. Defaults to False.
+        Raises:
+            ValueError: If an object could not be added and continue_on_error is False.
+        Returns:
+            Dict[str, Any]: Summary with the number of ``added``, ``failed`` and ``skipped`` entries, the ``errors``
+            per DN, the elapsed ``seconds`` and the throughput in ``entries_per_second``.
+        Example:
+        | ${summary}=    Bulk Add Objects From LDIF    ldap://localhost:389/dc=example,dc=com    ${CURDIR}${/}users.ldif
+        | ${summary}=    Bulk Add Objects From LDIF    ldap://localhost:389/dc=example,dc=com    ${CURDIR}${/}users.ldif
+        | ...    workers=16    continue_on_error=True
+        | Should Be Equal As Integers    ${summary}[failed]    0
+        """
+        _url = Ldap3ConnectionManager.parse_uri(ldap_url)
+        errors: Dict[str, str] = {}
+        in_flight: Dict[str, Future] = {}
+        lock = threading.Lock()
+        slots = threading.BoundedSemaphore(max(1, int(window)))
+        counts = {"added": 0, "skipped": 0}
+
+        def fail(dn: str, error: str) -> bool:
+            with lock:
+                errors[dn] = error
+            return False
+
+        def add(dn: str, record: dict, parent: Optional[Future]) -> bool:
+            if parent is not None:
+                # the server decides whether the child can be added, e.g. if the parent already existed
+                parent.result()
+            try:
+                with self._connection(_url) as connection:
+                    if not connection.add(dn=dn, object_class=object_class, attributes=record):
+                        return fail(dn, connection.result["description"])
+            except (LDAPException, ValueError) as e:
+                return fail(dn, str(e))
+            self.journal.record(_url, dn)
+            with lock:
+                counts["added"] += 1
+            return True
+
+        def done(key: str, future: Future) -> None:
+            with lock:
+                if in_flight.get(key) is future:
+                    del in_flight[key]
+            slots.release()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor, open(ldif_file, "rb") as ldif:
+            for dn, record in LDIFParser(ldif).parse():
+                if errors and not continue_on_error:
+                    break
+                if not dn:
+                    counts["skipped"] += 1
+                    continue
+                key = normalize_dn(dn)
+                slots.acquire()
+                with lock:
+                    future = executor.submit(add, dn, record, in_flight.get(normalize_dn(parent_dn(dn))))
+                    in_flight[key] = future
+                future.add_done_callback(partial(done, key))
+        self._invalidate(_url)
+        seconds = time.perf_counter() - start
+        summary = {"added": counts["added"],
+                   "failed": len(errors),
+                   "skipped": counts["skipped"],
+                   "errors": errors,
+                   "seconds": round(seconds, 3),
+                   "entries_per_second": round(counts["added"] / seconds, 1) if seconds else 0.0}
+        logger.info(f"Bulk added {summary['added']} objects from {ldif_file} in {summary['seconds']}s "
+                    f"({summary['entries_per_second']}/s), {summary['failed']} failed, {summary['skipped']} skipped.")
+        if errors and not continue_on_error:
+            dn, error = next(iter(errors.items()))
+            raise ValueError(
+                f"Failed to add object {dn} from LDIF to {ldap_url}. Error: {error}")
+        return summary
+
+    @staticmethod
+    def _apply_change(connection: Connection, change: LDIFChange) -> bool:
+        """Sends one LDIF change record as LDAP request."""
+        if change.changetype == ADD:
+            return connection.add(dn=change.dn, attributes=change.changes)
+        if change.changetype == DELETE:
+            return connection.delete(dn=change.dn)
+        if change.changetype == MODRDN:
+            return connection.modify_dn(dn=change.dn,
+                                        relative_dn=change.changes["newrdn"],
+                                        delete_old_dn=change.changes["deleteoldrdn"],
+                                        new_superior=change.changes["newsuperior"])
+        return connection.modify(dn=change.dn, changes=change.changes)
 
-    def delete_object(self, ldap_url: str):
+    @measured
+    def apply_ldif_changes(self, ldap_url: str,
+                           ldif_file: str,
+                           workers: int = 8,
+                           batch_size: int = 1000,
+                           continue_on_error: bool = False) -> Dict[str, Any]:
+        """Apply the change records of a LDIF file to the LDAP directory.
+
+        The file is streamed in batches. Within a batch all consecutive modify records of a DN are merged
+        into one modify request, and the changes of different DNs are sent concurrently over pooled connections.
+        The changes of one DN keep their order. A batch is completed before a record that depends on it,
+        i.e. an add below or a delete above a DN of the batch, and before every modrdn.
+        Records without changetype are added.
+        Args:
+            ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            ldif_file (str): Path to the LDIF file with change records.
+            workers (int, optional): Number of concurrent DNs. Defaults to 8.
+            batch_size (int, optional): Maximum number of DNs per batch. Defaults to 1000.
+            continue_on_error (bool, optional): Apply the remaining changes if a change fails. Defaults to False.
+        Raises:
+            ValueError: If a change could not be applied and continue_on_error is False.
+        Returns:
+            Dict[str, Any]: Summary with the number of change ``records`` read, LDAP ``requests`` sent and
+            ``failed`` DNs, the ``errors`` per DN and the elapsed ``seconds``.
+        Example:
+        | ${summary}=    Apply LDIF Changes    ldap://localhost:389/dc=example,dc=com    ${CURDIR}${/}migration.ldif
+        """
+        _url = Ldap3ConnectionManager.parse_uri(ldap_url)
+        errors: Dict[str, str] = {}
+        counts = {"records": 0, "requests": 0}
+        lock = threading.Lock()
+        batch: Dict[str, List[LDIFChange]] = {}
+
+        def apply(changes: List[LDIFChange]) -> None:
+            try:
+                with self._connection(_url) as connection:
+                    for change in changes:
+                        with lock:
+                            counts["requests"] += 1
+                        if not self._apply_change(connection, change):
+                            with lock:
+                                errors[change.dn] = f"{change.changetype}: {connection.result['description']}"
+                            return
+                        if change.changetype == ADD:
+                            self.journal.record(_url, change.dn)
+                        elif change.changetype == DELETE:
+                            self.journal.forget(_url.host, change.dn)
+                        elif change.changetype == MODRDN:
+                            self.journal.rename(_url.host, change.dn, renamed_dn(change.dn, change.changes["newrdn"],
+                                                                                 change.changes["newsuperior"]))
+            except (LDAPException, ValueError) as e:
+                with lock:
+                    errors[changes[0].dn] = str(e)
+
+        def flush(executor: ThreadPoolExecutor) -> None:
+            list(executor.map(apply, batch.values()))
+            batch.clear()
+
+        def depends_on_batch(change: LDIFChange, key: str) -> bool:
+            if change.changetype == ADD:
+                return normalize_dn(parent_dn(change.dn)) in batch
+            if change.changetype == DELETE:
+                return any(other != key and other.endswith("," + key) for other in batch)
+            return change.changetype == MODRDN
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor, open(ldif_file, "rb") as ldif:
+            for change in LDIFChangeParser(ldif).parse():
+                counts["records"] += 1
+                key = normalize_dn(change.dn)
+                if len(batch) >= int(batch_size) or depends_on_batch(change, key):
+                    flush(executor)
+                if errors and not continue_on_error:
+                    break
+                changes = batch.setdefault(key, [])
+                if changes and change.changetype == MODIFY == changes[-1].changetype:
+                    merge_modify_changes(changes[-1].changes, change.changes)
+                else:
+                    changes.append(change)
+                if change.changetype == MODRDN:
+                    flush(executor)
+            else:
+                flush(executor)
+        self._invalidate(_url)
+        seconds = time.perf_counter() - start
+        summary = {"records": counts["records"],
+                   "requests": counts["requests"],
+                   "failed": len(errors),
+                   "errors": errors,
+                   "seconds": round(seconds, 3)}
+        logger.info(f"Applied {summary['records']} LDIF change records from {ldif_file} with {summary['requests']} "
+                    f"requests in {summary['seconds']}s, {summary['failed']} failed.")
+        if errors and not continue_on_error:
+            dn, error = next(iter(errors.items()))
+            raise ValueError(
+                f"Failed to apply LDIF change of {dn} to {ldap_url}. Error: {error}")
+        return summary
+
+    @measured
+    def delete_object(self, ldap_url: str,
+                      recursive: bool = False,
+                      workers: int = 8,
+                      tree_delete: bool = True):
         """Delete an object from the LDAP directory.
+
+        With ``recursive`` the object is deleted with all objects below it. If the server supports the
+        Tree Delete control (1.2.840.113556.1.4.805) the subtree is deleted with one request. Otherwise the
+        DNs of the subtree are searched paged without attributes and deleted bottom-up, level by level,
+        concurrently over pooled connections. The filter of the URL is ignored for the subtree.
         Args:
             ldap_url (str): <ldap/ldaps>://<host>:<port>/<base_dn>?<attributes>?<scope>?<filter>
+            recursive (bool, optional): Delete the objects below as well. Defaults to False.
+            workers (int, optional): Number of concurrent deletes of a recursive delete. Defaults to 8.
+            tree_delete (bool, optional): Use the Tree Delete control if the server supports it. Defaults to True.
         Raises:
             ValueError: ScopeError: Scope must be BASE for single object actions
             ValueError: If the object could not be deleted from the LDAP directory.
@@ -448,14 +1699,136 @@ class Ldap3Query():
             bool: True if the object was deleted successfully, False otherwise.
         Example:
         | Delete Object    ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)
+        | Delete Object    ldap://localhost:389/ou=test,dc=example,dc=com???(objectClass=*)    recursive=True
         """
         _url = self._is_base_scope(ldap_url)
-        connection: Connection = self.connection_pool.get_connection(
-            _url["host"])
-        if not connection.delete(dn=_url["base"]):
-            logger.error(
-                f"Failed to delete object {ldap_url}. Error: {connection.result['description']}")
+        if recursive:
+            return self._delete_subtree(_url, workers, tree_delete)
+        with self._connection(_url) as connection:
+            if not connection.delete(dn=_url.base):
+                logger.error(
+                    f"Failed to delete object {ldap_url}. Error: {connection.result['description']}")
+                raise ValueError(
+                    f"Failed to delete object {ldap_url}. Error: {connection.result['description']}")
+            self._invalidate(_url, _url.base)
+            self.journal.forget(_url.host, _url.base)
+            logger.info(f"Deleted object {ldap_url}.")
+            return True
+
+    def _delete_subtree(self, _url: Ldap3Url, workers: int = 8, tree_delete: bool = True) -> bool:
+        """Deletes the base entry of a parsed LDAP URL with all entries below it, see `Delete Object`."""
+        with self._connection(_url) as connection:
+            info = self._server_info(_url, connection).info
+            if tree_delete and info and any(control[0] == self.TREE_DELETE_CONTROL for control in info.supported_controls):
+                if not connection.delete(dn=_url.base, controls=[(self.TREE_DELETE_CONTROL, True, None)]):
+                    raise ValueError(
+                        f"Failed to delete subtree {_url.base}. Error: {connection.result['description']}")
+                self._invalidate(_url, _url.base)
+                self.journal.forget(_url.host, _url.base)
+                logger.info(f"Deleted subtree {_url.base} with the Tree Delete control.")
+                return True
+            subtree = _url._replace(scope=SUBTREE, filter="(objectClass=*)")
+            dns = [response["dn"] for response in self._iter_search(connection, subtree, attributes=[NO_ATTRIBUTES],
+                                                                    page_size=self.page_size or self.STREAM_PAGE_SIZE)]
+        if not dns:
+            raise ValueError(
+                f"Failed to delete subtree {_url.base}. Error: noSuchObject")
+        start = time.perf_counter()
+        errors = self._delete_bottom_up(_url, dns, workers, f"subtree {_url.base}")
+        self._invalidate(_url, _url.base)
+        self.journal.forget(_url.host, _url.base)
+        if errors:
+            dn, error = next(iter(errors.items()))
             raise ValueError(
-                f"Failed to delete object {ldap_url}. Error: {connection.result['description']}")
-        logger.info(f"Deleted object {ldap_url}.")
+                f"Failed to delete subtree {_url.base}, {len(errors)} objects failed. Error of {dn}: {error}")
+        logger.info(f"Deleted subtree {_url.base} with {len(dns)} objects in {time.perf_counter() - start:.3f}s.")
         return True
+
+    def _delete_bottom_up(self, _url: Ldap3Url, dns: List[str], workers: int, label: str,
+                          ignore_missing: bool = False) -> Dict[str, str]:
+        """Deletes entries children first, the entries of one level concurrently over pooled connections.
+
+        Stops after the first level with errors, as their parents can not be deleted either.
+        Returns:
+            Dict[str, str]: The error per DN that could not be deleted, without the DNs of the levels above."""
+        levels: Dict[int, List[str]] = {}
+        for dn in dns:
+            levels.setdefault(dn_depth(dn), []).append(dn)
+        errors: Dict[str, str] = {}
+        lock = threading.Lock()
+
+        def delete(dns: List[str]) -> int:
+            deleted = position = 0
+            try:
+                with self._connection(_url) as connection:
+                    for position, dn in enumerate(dns):
+                        if connection.delete(dn=dn) or (ignore_missing and connection.result["description"] == "noSuchObject"):
+                            deleted += 1
+                        else:
+                            with lock:
+                                errors[dn] = connection.result["description"]
+            except (LDAPException, ValueError) as e:
+                # the entries not sent yet are not deleted either
+                with lock:
+                    errors.update(dict.fromkeys(dns[position:], str(e)))
+            return deleted
+
+        deleted = 0
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+            for depth in sorted(levels, reverse=True):
+                dns = levels[depth]
+                deleted += sum(executor.map(delete, [dns[i:i + self.DELETE_CHUNK_SIZE]
+                                                     for i in range(0, len(dns), self.DELETE_CHUNK_SIZE)]))
+                logger.info(f"Deleted {deleted} of {sum(map(len, levels.values()))} objects of {label}.")
+                if errors:
+                    break
+        return errors
+
+    @measured
+    def rollback_created_objects(self, all_scopes: bool = False, workers: int = 8) -> int:
+        """Delete all objects created by this library, children before their parents.
+
+        Objects added with `Add Object From LDIF`, `Bulk Add Objects From LDIF` and `Apply LDIF Changes` are
+        journaled, objects deleted with `Delete Object` or `Apply LDIF Changes` are removed from the journal.
+        With the ``journal_scope`` import argument SUITE or TEST the journal is scoped per suite or test, objects
+        not rolled back are handed to the enclosing suite when the scope ends. Objects that no longer exist are
+        ignored. The objects of one level are deleted concurrently over pooled connections.
+        Args:
+            all_scopes (bool, optional): Delete the objects of all scopes, not only of the current one. Defaults to False.
+            workers (int, optional): Number of concurrent deletes. Defaults to 8.
+        Raises:
+            ValueError: If objects could not be deleted, e.g. because objects not created by this library were added below them.
+                The objects not deleted stay journaled, so the rollback can be retried.
+        Returns:
+            int: The number of rolled back objects.
+        Example:
+        | Library    Ldap3Library    journal_scope=TEST
+        | ...
+        | [Teardown]    Rollback Created Objects
+        | Suite Teardown    Rollback Created Objects    all_scopes=True
+        """
+        objects = self.journal.take(all_scopes)
+        hosts: Dict[Tuple[str, Optional[str]], Tuple[Ldap3Url, List[str]]] = {}
+        for _url, dn in objects:
+            hosts.setdefault((_url.host, _url.bind_name), (_url, []))[1].append(dn)
+        errors: Dict[str, str] = {}
+        remaining = 0
+        start = time.perf_counter()
+        for _url, dns in hosts.values():
+            failed = self._delete_bottom_up(_url, dns, workers, f"created objects of {_url.host}", ignore_missing=True)
+            self._invalidate(_url)
+            if failed:
+                # the failed objects and the levels above them, which were not deleted, stay journaled for a retry
+                depth = min(map(dn_depth, failed))
+                for dn in dns:
+                    if dn in failed or dn_depth(dn) < depth:
+                        self.journal.record(_url, dn)
+                        remaining += 1
+                errors.update(failed)
+        if errors:
+            raise ValueError(
+                f"Failed to roll back {len(errors)} of {len(objects)} created objects, {remaining} objects stay journaled. "
+                + "; ".join(f"{dn}: {error}" for dn, error in errors.items()))
+        logger.info(f"Rolled back {len(objects)} created objects in {time.perf_counter() - start:.3f}s.")
+        return len(objects)
+
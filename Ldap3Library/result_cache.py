@@ -0,0 +1,92 @@
+#  Copyright (c) 2010 Franz Allan Valencia See
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Read-through cache of search results with TTL and write-based invalidation."""
+
+from collections import OrderedDict
+from typing import Any, Optional
+from ldap3 import BASE
+from Ldap3Library.connection_manager import Ldap3Url
+from Ldap3Library.dn import is_descendant
+
+import threading
+import time
+
+_MISSING = object()
+
+
+class Ldap3ResultCache():
+    """Search results keyed by the parsed LDAP URL and the return type.
+
+    Entries expire ``ttl`` seconds after they were stored. At most ``max_entries``
+    results are kept, the least recently used are dropped first. A TTL of 0 disables the cache."""
+
+    def __init__(self, ttl: float = 0, max_entries: int = 1024):
+        self.ttl = float(ttl)
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._results: "OrderedDict[Tuple[Ldap3Url, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, _url: Ldap3Url, return_type: str) -> Any:
+        """Returns the cached result or ``_MISSING``."""
+        if not self.enabled:
+            return _MISSING
+        key = (_url, return_type)
+        with self._lock:
+            expires, result = self._results.get(key, (0.0, _MISSING))
+            if result is _MISSING or expires <= time.monotonic():
+                self._results.pop(key, None)
+                self.misses += 1
+                return _MISSING
+            self._results.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, _url: Ldap3Url, return_type: str, result: Any) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._results[(_url, return_type)] = (time.monotonic() + self.ttl, result)
+            self._results.move_to_end((_url, return_type))
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+
+    def invalidate(self, host: str, dn: Optional[str] = None) -> int:
+        """Drops the results of a host a write to ``dn`` may have changed, all results of the host without DN.
+
+        These are the searches based on the DN or one of its descendants, and the
+        one level and subtree searches based on one of its ancestors.
+        Returns:
+            int: Number of dropped results."""
+        with self._lock:
+            stale = [key for key in self._results
+                     if key[0].host == host and (dn is None
+                                                 or is_descendant(key[0].base, dn)
+                                                 or (key[0].scope != BASE and is_descendant(dn, key[0].base)))]
+            for key in stale:
+                del self._results[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
@@ -0,0 +1,102 @@
+#  Copyright (c) 2010 Franz Allan Valencia See
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Log of the searches exceeding a duration threshold."""
+
+from typing import Any, List, Optional
+from Ldap3Library.connection_manager import Ldap3Url
+from robot.api import logger
+
+import json, os, threading, time
+
+SLOW_QUERY_LOG = "ldap3library_slow_queries.log"
+
+
+class Ldap3SlowQueryLog():
+    """Appends searches slower than ``threshold_ms`` as JSON lines to ``path`` and logs them as warnings.
+
+    Without a path the log is written to the Robot Framework output directory,
+    or to the current directory outside of Robot Framework. A threshold of 0 disables the log.
+    Robot Framework ignores messages of other threads than the main thread, so the warnings of searches
+    run by workers are held back until `log_pending` is called from the main thread."""
+
+    def __init__(self, threshold_ms: float = 0, path: Optional[str] = None):
+        self.threshold_ms = float(threshold_ms)
+        self.path = path
+        self.count = 0
+        self._pending: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold_ms > 0
+
+    def _resolve_path(self) -> str:
+        if not self.path:
+            try:
+                from robot.libraries.BuiltIn import BuiltIn
+                output_dir = BuiltIn().get_variable_value("${OUTPUT_DIR}")
+            except Exception:
+                output_dir = None
+            self.path = os.path.join(output_dir or os.getcwd(), SLOW_QUERY_LOG)
+        return os.path.abspath(self.path)
+
+    def record(self, _url: Ldap3Url, attributes: Any, entries: int, seconds: float, page_size: int = 0) -> bool:
+        """Logs a search if it took longer than the threshold.
+        Args:
+            _url (Ldap3Url): Parsed LDAP URL of the search.
+            attributes (Any): The requested attributes.
+            entries (int): Number of result entries.
+            seconds (float): Time spent in the search, without the time the caller spent on the results.
+            page_size (int, optional): Entries per page, 0 for an unpaged search. Defaults to 0.
+        Returns:
+            bool: Whether the search was logged."""
+        duration_ms = seconds * 1000
+        if not self.enabled or duration_ms < self.threshold_ms:
+            return False
+        attributes = [attributes] if isinstance(attributes, str) else list(attributes or [])
+        record = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "host": _url.host,
+                  "base": _url.base,
+                  "scope": _url.scope,
+                  "filter": _url.filter,
+                  "attributes": attributes,
+                  "page_size": page_size,
+                  "entries": entries,
+                  "duration_ms": round(duration_ms, 3)}
+        with self._lock:
+            self.count += 1
+            path = self._resolve_path()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a", encoding="utf-8") as log:
+                log.write(json.dumps(record) + "\n")
+        message = (f"Slow search on {_url.host} took {duration_ms:.1f} ms (threshold {self.threshold_ms:g} ms): "
+                   f"base={_url.base} scope={_url.scope} filter={_url.filter} "
+                   f"attributes={','.join(attributes) or '*'} entries={entries}")
+        if threading.current_thread() is threading.main_thread():
+            logger.warn(message)
+        else:
+            with self._lock:
+                self._pending.append(message)
+        return True
+
+    def log_pending(self) -> int:
+        """Logs the warnings of the slow searches run in worker threads, to be called from the main thread.
+        Returns:
+            int: Number of logged warnings."""
+        with self._lock:
+            messages, self._pending = self._pending, []
+        for message in messages:
+            logger.warn(message)
+        return len(messages)
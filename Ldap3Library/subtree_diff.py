@@ -0,0 +1,160 @@
+#  Copyright (c) 2010 Franz Allan Valencia See
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""Memory-bounded comparison of two entry streams by external sort and merge join."""
+
+from heapq import merge
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from ldif import UNSAFE_STRING_RE
+from Ldap3Library.dn import normalize_dn
+from Ldap3Library.ldif_changes import ADD, DELETE, MODIFY
+
+import base64, hashlib, os, pickle, tempfile
+
+SORT_CHUNK_SIZE = 100000
+
+
+class DiffRecord(NamedTuple):
+    """An entry prepared for the comparison. ``attributes`` maps the attribute names to the sorted raw values."""
+    key: str
+    dn: str
+    digest: bytes
+    attributes: Dict[str, List[bytes]]
+
+
+def dn_sort_key(dn: str) -> str:
+    """Sort key of a DN, parents sort directly before their descendants."""
+    return "\x00".join(reversed(normalize_dn(dn).split(",")))
+
+
+def diff_record(dn: str, attributes: Dict[str, list], ignore_attributes: Iterable[str] = ()) -> DiffRecord:
+    """Prepares an entry with its raw values, the attribute names are compared case-insensitively."""
+    ignored = {name.lower() for name in ignore_attributes}
+    values: Dict[str, List[bytes]] = {}
+    for name, raw_values in attributes.items():
+        if name.lower() in ignored or not raw_values:
+            continue
+        values[name] = sorted(value if isinstance(value, bytes) else str(value).encode("utf-8") for value in raw_values)
+    digest = hashlib.sha1()
+    for name in sorted(values, key=str.lower):
+        digest.update(name.lower().encode("utf-8") + b"\x00")
+        for value in values[name]:
+            digest.update(len(value).to_bytes(4, "big") + value)
+    return DiffRecord(dn_sort_key(dn), dn, digest.digest(), values)
+
+
+def _read_run(path: str) -> Iterator[DiffRecord]:
+    with open(path, "rb") as run:
+        while True:
+            try:
+                yield DiffRecord(*pickle.load(run))
+            except EOFError:
+                return
+
+
+def external_sort(records: Iterable[DiffRecord], directory: str,
+                  chunk_size: int = SORT_CHUNK_SIZE, reverse: bool = False) -> Iterator[DiffRecord]:
+    """Sorts records by their key with at most ``chunk_size`` records in memory.
+
+    Sorted runs of ``chunk_size`` records are written to ``directory`` and merged while iterating."""
+    chunk: List[DiffRecord] = []
+    runs: List[str] = []
+
+    def spill() -> None:
+        chunk.sort(key=lambda record: record.key, reverse=reverse)
+        descriptor, path = tempfile.mkstemp(prefix="run", suffix=".pickle", dir=directory)
+        with os.fdopen(descriptor, "wb") as run:
+            for record in chunk:
+                pickle.dump(tuple(record), run, protocol=pickle.HIGHEST_PROTOCOL)
+        runs.append(path)
+        chunk.clear()
+
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            spill()
+    if not runs:
+        chunk.sort(key=lambda record: record.key, reverse=reverse)
+        yield from chunk
+        return
+    if chunk:
+        spill()
+    yield from merge(*map(_read_run, runs), key=lambda record: record.key, reverse=reverse)
+
+
+def merge_join(left: Iterator[DiffRecord], right: Iterator[DiffRecord]) -> Iterator[Tuple[Optional[DiffRecord], Optional[DiffRecord]]]:
+    """Pairs the records of two streams sorted by key, a missing side is None."""
+    sentinel = None
+    left_record, right_record = next(left, sentinel), next(right, sentinel)
+    while left_record is not None or right_record is not None:
+        if right_record is None or (left_record is not None and left_record.key < right_record.key):
+            yield left_record, None
+            left_record = next(left, sentinel)
+        elif left_record is None or right_record.key < left_record.key:
+            yield None, right_record
+            right_record = next(right, sentinel)
+        else:
+            yield left_record, right_record
+            left_record, right_record = next(left, sentinel), next(right, sentinel)
+
+
+class LDIFChangeWriter():
+    """Writes LDIF change records, values that are not safe strings are base64 encoded."""
+
+    def __init__(self, output: BinaryIO):
+        self.output = output
+        self.output.write(b"version: 1\n")
+
+    def _line(self, attribute: str, value) -> None:
+        if isinstance(value, bytes):
+            try:
+                value = value.decode("utf-8")
+            except UnicodeDecodeError:
+                self.output.write(f"{attribute}:: {base64.b64encode(value).decode('ascii')}\n".encode("utf-8"))
+                return
+        if UNSAFE_STRING_RE.search(value):
+            self.output.write(f"{attribute}:: {base64.b64encode(value.encode('utf-8')).decode('ascii')}\n".encode("utf-8"))
+        else:
+            self.output.write(f"{attribute}: {value}\n".encode("utf-8"))
+
+    def _start(self, dn: str, changetype: str) -> None:
+        self.output.write(b"\n")
+        self._line("dn", dn)
+        self._line("changetype", changetype)
+
+    def add(self, record: DiffRecord) -> None:
+        self._start(record.dn, ADD)
+        for name, values in record.attributes.items():
+            for value in values:
+                self._line(name, value)
+
+    def delete(self, dn: str) -> None:
+        self._start(dn, DELETE)
+
+    def modify(self, left: DiffRecord, right: DiffRecord) -> int:
+        """Writes the modifications turning ``left`` into ``right``. Returns the number of changed attributes."""
+        left_values = {name.lower(): values for name, values in left.attributes.items()}
+        right_names = {name.lower(): name for name in right.attributes}
+        changes = [(name, values) for name, values in right.attributes.items() if left_values.get(name.lower()) != values]
+        removed = [name for name in left.attributes if name.lower() not in right_names]
+        self._start(left.dn, MODIFY)
+        for name, values in changes:
+            self._line("replace", name)
+            for value in values:
+                self._line(name, value)
+            self.output.write(b"-\n")
+        for name in removed:
+            self._line("delete", name)
+            self.output.write(b"-\n")
+        return len(changes) + len(removed)
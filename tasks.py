@@ -33,6 +33,23 @@ def atest(context):
         ]
     subprocess.run(" ".join(cmd), check=False)
 
+@task(help={"sizes": "Comma separated numbers of seeded entries, e.g. 1000,10000.",
+            "baseline": "Compare with this baseline JSON instead of test/benchmark/baseline.json.",
+            "save": "Store the results as new baseline.",
+            "fail_on_regression": "Fail if a benchmark regressed, only meaningful with a baseline of this machine."})
+def benchmark(context, sizes="1000,10000,100000", baseline=None, save=False, fail_on_regression=False):
+    """Run the keyword benchmarks against a seeded in-process directory. Fails if the benchmarks crash."""
+    baseline = baseline or f"{ROOT}/test/benchmark/baseline.json"
+    cmd = ['python',
+           f"{ROOT}/test/benchmark/benchmark.py",
+           '--sizes', *sizes.split(","),
+           '--output', baseline if save else f"{ROOT}/results/benchmark.json"]
+    if not save:
+        cmd += ['--baseline', baseline]
+    if fail_on_regression:
+        cmd += ['--fail-on-regression']
+    subprocess.run(cmd, check=True)
+
 @task(utest, atest)
 def tests(context):
     """Run all tests."""
@@ -0,0 +1,213 @@
+"""Benchmarks of the Ldap3Library keywords against a seeded in-process ldap3 MOCK_SYNC directory.
+
+Measures latency, throughput and peak memory of every benchmark for each directory size,
+writes the results as JSON and compares them with a baseline. The timings depend on the machine,
+so regressions against a baseline recorded elsewhere only fail the run with --fail-on-regression.
+
+    python test/benchmark/benchmark.py --sizes 1000 10000 --output results/benchmark.json
+    python test/benchmark/benchmark.py --baseline test/benchmark/baseline.json --threshold 0.25
+    python test/benchmark/benchmark.py --baseline results/local_baseline.json --fail-on-regression
+"""
+
+import argparse
+import gc
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+ROOT = Path(__file__).parents[2]
+sys.path.insert(0, str(ROOT))
+
+from assertionengine import AssertionOperator
+from ldap3 import Connection
+from ldif import LDIFWriter
+from Ldap3Library import Ldap3ConnectionManager, Ldap3Library
+
+HOST = "localhost"
+BASE_DN = "dc=example,dc=com"
+BENCH_DN = f"ou=bench,{BASE_DN}"
+ADMIN_DN = f"cn=admin,{BASE_DN}"
+PASSWORD = "P4ssW0rd!"
+OU_SIZE = 100
+SIZES = (1000, 10000, 100000)
+RETURN_TYPES = (Ldap3Library.LDIF, Ldap3Library.JSON, Ldap3Library.ENTRIES)
+
+
+def url(dn: str, attributes: str = "", scope: str = "", search_filter: str = "(objectClass=*)") -> str:
+    return f"ldap://{HOST}:389/{dn}?{attributes}?{scope}?{search_filter}"
+
+
+def user_dn(i: int) -> str:
+    return f"cn=user{i},ou=ou{i // OU_SIZE},{BENCH_DN}"
+
+
+def generate_entries(size: int) -> Iterator[Tuple[str, Dict[str, list]]]:
+    """Yields a deterministic directory of ``size`` users in organizational units of 100 users."""
+    yield BASE_DN, {"objectClass": ["top", "dcObject", "organization"], "dc": ["example"], "o": ["Example"]}
+    yield ADMIN_DN, {"objectClass": ["top", "person"], "cn": ["admin"], "sn": ["admin"], "userPassword": [PASSWORD]}
+    yield BENCH_DN, {"objectClass": ["top", "organizationalUnit"], "ou": ["bench"]}
+    for i in range(size):
+        if i % OU_SIZE == 0:
+            yield f"ou=ou{i // OU_SIZE},{BENCH_DN}", {"objectClass": ["top", "organizationalUnit"],
+                                                      "ou": [f"ou{i // OU_SIZE}"]}
+        yield user_dn(i), {"objectClass": ["top", "person", "organizationalPerson", "inetOrgPerson"],
+                           "cn": [f"user{i}"],
+                           "sn": [f"User {i}"],
+                           "mail": [f"user{i}@example.com"],
+                           "telephoneNumber": [f"555-{i:07d}"],
+                           "postalCode": [f"{i % 90000 + 10000}"],
+                           "title": ["Engineer" if i % 3 else "Manager"]}
+
+
+def seed(size: int, directory: Path) -> Connection:
+    """Connects the library to a mock directory loaded with ``size`` users, written to an LDIF file in ``directory``."""
+    data = directory / f"seed{size}.ldif"
+    with open(data, "wb") as ldif:
+        writer = LDIFWriter(ldif)
+        for dn, entry in generate_entries(size):
+            writer.unparse(dn, entry)
+    pool = Ldap3ConnectionManager.connection_pool
+    pool.clear()
+    Ldap3ConnectionManager().connect(ldap_url=url(BASE_DN), bind_dn=ADMIN_DN, password=PASSWORD,
+                                     backend=Ldap3ConnectionManager.MOCK_BACKEND, mock_data=str(data))
+    return pool.get_connection(HOST)
+
+
+def write_ldif_files(directory: Path, count: int) -> Iterator[str]:
+    """Writes one single-entry LDIF file per iteration of the add benchmark."""
+    for i in range(count):
+        path = directory / f"add{i}.ldif"
+        with open(path, "wb") as ldif:
+            LDIFWriter(ldif).unparse(f"cn=added{i},ou=ou0,{BENCH_DN}",
+                                     {"objectClass": ["top", "person", "organizationalPerson", "inetOrgPerson"],
+                                      "cn": [f"added{i}"], "sn": ["Added"]})
+        yield str(path)
+
+
+def benchmarks(library: Ldap3Library, size: int, ldif_files: Iterator[str]) -> Dict[str, Callable[[], object]]:
+    """Benchmark name mapped to one keyword call."""
+    entry = url(user_dn(size // 2), "cn,mail,telephoneNumber,title")
+    level = url(f"ou=ou{(size // 2) // OU_SIZE},{BENCH_DN}", "cn,mail,title", "one", "(objectClass=person)")
+    subtree = url(BENCH_DN, "", "sub", "(objectClass=person)")
+    modify = url(user_dn(size // 2 + 1))
+    toggle = iter(range(sys.maxsize))
+    cases: Dict[str, Callable[[], object]] = {}
+    for return_type in RETURN_TYPES:
+        cases[f"search_base_{return_type}"] = lambda return_type=return_type: library.search(entry, return_type)
+        cases[f"search_level_{return_type}"] = lambda return_type=return_type: library.search(level, return_type)
+    cases["check_object_exists"] = lambda: library.check_object_exists(entry)
+    cases["check_object_count_level"] = lambda: library.check_object_count(level, AssertionOperator["=="], OU_SIZE)
+    cases["check_object_count_subtree"] = lambda: library.check_object_count(subtree, AssertionOperator["=="], size)
+    cases["check_attribute_value"] = lambda: library.check_attribute_value(entry, "title", AssertionOperator["!="], "CEO")
+    cases["check_attribute_values"] = lambda: library.check_attribute_values(entry, {"title": "!= CEO", "cn": "== " + f"user{size // 2}"})
+    cases["add_and_remove_attribute_value"] = lambda: (library.add_attribute_value(modify, "description", "bench"),
+                                                       library.remove_attribute_value(modify, "description", "bench"))
+    cases["overwrite_attribute_value"] = lambda: library.overwrite_attribute_value(modify, "title", f"Title {next(toggle)}")
+    cases["replace_attribute_value"] = lambda: (library.replace_attribute_value(modify, "mail", f"user{size // 2 + 1}@example.com", "bench@example.com"),
+                                                library.replace_attribute_value(modify, "mail", "bench@example.com", f"user{size // 2 + 1}@example.com"))
+    cases["modify_entry"] = lambda: library.modify_entry(modify, {"title": ["replace", "Modified"], "description": ["replace", "bench"]})
+    cases["add_object_from_ldif"] = lambda: library.add_object_from_ldif(url(BASE_DN), next(ldif_files), object_class=None)
+    return cases
+
+
+def measure(call: Callable[[], object], iterations: int, warmup: int) -> Dict[str, float]:
+    """Latency statistics in milliseconds, throughput in calls per second and peak traced memory in KiB."""
+    for _ in range(warmup):
+        call()
+    gc.collect()
+    latencies: List[float] = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    latencies.sort()
+    total = sum(latencies)
+    return {"iterations": iterations,
+            "min_ms": round(latencies[0], 4),
+            "median_ms": round(statistics.median(latencies), 4),
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 4),
+            "max_ms": round(latencies[-1], 4),
+            "ops_per_second": round(iterations / total * 1000, 2) if total else 0.0,
+            "peak_memory_kib": round(peak / 1024, 1)}
+
+
+def run(sizes: List[int], iterations: int, warmup: int, only: List[str]) -> Dict[str, object]:
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            start = time.perf_counter()
+            seed(size, Path(directory))
+            print(f"Seeded {size} entries in {time.perf_counter() - start:.1f}s", flush=True)
+            library = Ldap3Library()
+            # every call of the add benchmark adds another entry, the files are written before timing
+            (Path(directory) / str(size)).mkdir()
+            ldif_files = iter(list(write_ldif_files(Path(directory) / str(size), iterations + warmup + 1)))
+            # large directories are searched completely by some benchmarks, fewer iterations keep the run short
+            scaled = max(3, iterations * min(sizes) // size)
+            results[str(size)] = {}
+            for name, call in benchmarks(library, size, ldif_files).items():
+                if only and not any(pattern in name for pattern in only):
+                    continue
+                count = scaled if name == "check_object_count_subtree" else iterations
+                results[str(size)][name] = measure(call, count, min(warmup, count))
+                stats = results[str(size)][name]
+                print(f"{size:>7} {name:<32} median {stats['median_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms  "
+                      f"{stats['ops_per_second']:>10.1f} ops/s  peak {stats['peak_memory_kib']:>10.1f} KiB", flush=True)
+            Ldap3ConnectionManager.connection_pool.clear()
+    return {"python": platform.python_version(),
+            "platform": platform.platform(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results}
+
+
+def compare(results: Dict[str, object], baseline: Dict[str, object], threshold: float) -> List[str]:
+    """Benchmarks whose median latency grew by more than ``threshold`` compared to the baseline."""
+    regressions = []
+    for size, cases in results["results"].items():
+        for name, stats in cases.items():
+            base = baseline["results"].get(size, {}).get(name)
+            if not base or not base["median_ms"]:
+                continue
+            ratio = stats["median_ms"] / base["median_ms"]
+            if ratio > 1 + threshold:
+                regressions.append(f"{size} {name}: median {base['median_ms']} ms -> {stats['median_ms']} ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="Numbers of seeded users.")
+    parser.add_argument("--iterations", type=int, default=50, help="Timed calls per benchmark.")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed calls per benchmark.")
+    parser.add_argument("--only", nargs="*", default=[], help="Run the benchmarks containing one of these names.")
+    parser.add_argument("--output", type=Path, help="Write the results as JSON, e.g. to store a new baseline.")
+    parser.add_argument("--baseline", type=Path, help="Baseline JSON to compare the median latencies with.")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative slowdown. Defaults to 0.25.")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with 1 if a benchmark regressed, use with a baseline recorded on the same machine.")
+    args = parser.parse_args(argv)
+    results = run(sorted(args.sizes), args.iterations, args.warmup, args.only)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"Results written to {args.output}")
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions and args.fail_on_regression else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -23,3 +23,23 @@ def mokapi():
 
     # except Exception as e:
     #     print(f"An error occurred: {e}")
+
+
+ROOT = Path(__file__).parents[2]
+
+
+@pytest.fixture
+def mock_ldap():
+    """Fixture to register an in-memory ldap3 MOCK_SYNC directory loaded from the fake LDIF files."""
+    from Ldap3Library import Ldap3ConnectionManager
+
+    pool = Ldap3ConnectionManager.connection_pool
+    pool.clear()
+    Ldap3ConnectionManager().connect(ldap_url="ldap://localhost:389/dc=example,dc=com???(objectClass=*)",
+                                     bind_dn="cn=admin,dc=example,dc=com",
+                                     password="P4ssW0rd!",
+                                     backend="mock",
+                                     mock_data=[str(ROOT / "fake_admin.ldif"), str(ROOT / "fake_ldap_data.ldif")])
+    connection = pool.get_connection("localhost")
+    yield connection
+    pool.clear()
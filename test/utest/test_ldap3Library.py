@@ -1,5 +1,6 @@
-import pytest
+import dataclasses, pytest
 from Ldap3Library import Ldap3ConnectionManager, Ldap3Query
+from ldap3 import Server, ALL, DSA, SCHEMA, NONE, MOCK_SYNC, OFFLINE_SLAPD_2_4
 from assertionengine import AssertionOperator
 from time import sleep
 
@@ -311,4 +312,835 @@ def test_add_from_ldif_and_delete_again(mokapi):
     ldap3Query.delete_object(ldap_url="ldap://localhost:389/cn=khernandez,ou=users,dc=example,dc=com???(objectClass=*)")
     exist = ldap3Query.check_object_exists(ldap_url="ldap://localhost:389/cn=jmason,ou=users,dc=example,dc=com???(objectClass=*)")
     exist = ldap3Query.check_object_exists(ldap_url="ldap://localhost:389/cn=khernandez,ou=users,dc=example,dc=com???(objectClass=*)")
-    assert not exist, "Object not deleted."
\ No newline at end of file
+    assert not exist, "Object not deleted."
+
+def test_paged_search(mock_ldap):
+    """Test if a paged search returns the same entries as a plain search."""
+    _url = "ldap://localhost:389/dc=example,dc=com?cn?sub?(objectClass=*)"
+    ldap3Query = Ldap3Query()
+    plain = ldap3Query.search(ldap_url=_url, return_type=Ldap3Query.ENTRIES)
+    paged = ldap3Query.search(ldap_url=_url, return_type=Ldap3Query.ENTRIES, page_size=3)
+    assert len(paged) == len(plain) > 3, "Paged search returned a different number of entries."
+    assert sorted(e.entry_dn for e in paged) == sorted(e.entry_dn for e in plain)
+    assert "dn: cn=tfoster,ou=users,dc=example,dc=com" in ldap3Query.search(ldap_url=_url, page_size=3)
+
+
+def test_set_page_size(mock_ldap):
+    """Test if the library page size is used by keywords searching internally."""
+    ldap3Query = Ldap3Query()
+    assert ldap3Query.set_page_size(2) == 0
+    result = ldap3Query.check_object_count(ldap_url="ldap://localhost:389/ou=users,dc=example,dc=com??one?(objectClass=*)",
+                                           assertion_operator=AssertionOperator[">"],
+                                           expected_count=2)
+    assert result is True
+    assert ldap3Query.set_page_size(0) == 2
+
+
+def test_search_to_file(mock_ldap, tmp_path):
+    """Test if search results are written to LDIF and JSON files."""
+    import json
+    _url = "ldap://localhost:389/ou=users,dc=example,dc=com?cn,postalCode?one?(objectClass=*)"
+    ldap3Query = Ldap3Query()
+    expected = len(ldap3Query.search(ldap_url=_url, return_type=Ldap3Query.ENTRIES))
+    count, path = ldap3Query.search_to_file(ldap_url=_url, output_file=str(tmp_path / "users.ldif"), page_size=2)
+    assert count == expected
+    with open(path, encoding="utf-8") as ldif:
+        content = ldif.read()
+    assert content.startswith("version: 1")
+    assert content.count("dn: ") == expected
+    count, path = ldap3Query.search_to_file(ldap_url=_url, output_file=str(tmp_path / "users.json"), file_format="JSON")
+    with open(path, encoding="utf-8") as result:
+        entries = json.load(result)["entries"]
+    assert count == len(entries) == expected
+    assert "13029" in [v for e in entries for v in e["attributes"]["postalCode"]]
+
+
+def test_parse_uri_is_cached():
+    """Test if parsed URLs are immutable, cached and accessible by name."""
+    parsed = Ldap3ConnectionManager.parse_uri(LDAP_URL_BASE)
+    assert parsed is Ldap3ConnectionManager.parse_uri(LDAP_URL_BASE)
+    assert parsed.host == parsed["host"] == "localhost"
+    assert parsed.port == 389
+    assert parsed.scope == "BASE"
+    assert parsed.attributes == ("postalCode", "telephoneNumber")
+    assert Ldap3ConnectionManager.parse_uri(LDAP_URL_SUB).scope == "SUBTREE"
+    assert Ldap3ConnectionManager.parse_uri("ldap://localhost:389/dc=example,dc=com").filter == "(objectClass=*)"
+    with pytest.raises(AttributeError):
+        parsed.host = "otherhost"
+    with pytest.raises(ValueError):
+        Ldap3ConnectionManager.parse_uri("http://localhost/dc=example,dc=com")
+
+
+def test_connection_pool_checkout(mock_ldap):
+    """Test if the pool opens further connections on demand and is bounded."""
+    pool = Ldap3ConnectionManager.connection_pool.get_pool("localhost")
+    pool.acquire_timeout = 0.1
+    pool.max_size = 2
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first is not second
+    assert second.bound
+    with pytest.raises(ValueError):
+        pool.acquire()
+    pool.release(second)
+    assert pool.acquire() is second
+    pool.release(first)
+    pool.release(second)
+
+
+def test_connection_pool_reconnects_and_evicts(mock_ldap):
+    """Test if closed connections are replaced and idle connections are evicted."""
+    pool = Ldap3ConnectionManager.connection_pool.get_pool("localhost")
+    connection = pool.acquire()
+    extra = pool.acquire()
+    pool.release(extra)
+    connection.unbind()
+    pool.release(connection)
+    reconnected = pool.acquire()
+    assert reconnected.bound and not reconnected.closed
+    pool.release(reconnected)
+    pool.idle_timeout = 0
+    pool.acquire_timeout = 0.1
+    with Ldap3ConnectionManager.connection_pool.connection("localhost") as connection:
+        assert connection is pool.template
+    assert not Ldap3ConnectionManager().is_connection_closed(LDAP_URL_BASE)
+
+
+def test_register_connection_skip_and_replace(mock_ldap):
+    """Test if a skipped duplicate connection is unbound and a replaced closed pool closes its idle connections."""
+    from ldap3 import Connection, MOCK_SYNC
+    connection_pool = Ldap3ConnectionManager.connection_pool
+    duplicate = Connection(mock_ldap.server, user=user, password=password, client_strategy=MOCK_SYNC)
+    duplicate.bind()
+    connection_pool.register_connection("localhost", duplicate)
+    assert connection_pool.get_connection("localhost") is mock_ldap
+    assert not duplicate.bound
+    pool = connection_pool.get_pool("localhost")
+    connections = [pool.acquire(), pool.acquire()]
+    for connection in connections:
+        pool.release(connection)
+    idle = next(connection for connection in connections if connection is not mock_ldap)
+    assert idle.bound
+    mock_ldap.unbind()
+    replacement = Connection(mock_ldap.server, user=user, password=password, client_strategy=MOCK_SYNC)
+    replacement.bind()
+    connection_pool.register_connection("localhost", replacement)
+    assert connection_pool.get_connection("localhost") is replacement
+    assert pool.closed and not idle.bound
+
+
+def test_connection_pool_bind_identities(mock_ldap):
+    """Test if a second bind DN on the same host is registered as own identity."""
+    from ldap3 import Connection, MOCK_SYNC
+    reader = "cn=tfoster,ou=users,dc=example,dc=com"
+    mock_ldap.strategy.add_entry(reader, {"userPassword": "Secret", "sn": "Foster"})
+    connection = Connection(mock_ldap.server, user=reader, password="Secret", client_strategy=MOCK_SYNC)
+    connection.bind()
+    connection_pool = Ldap3ConnectionManager.connection_pool
+    connection_pool.register_connection("localhost", connection)
+    assert connection_pool.get_connection("localhost") is connection
+    assert connection_pool.get_connection("localhost", "cn=admin,dc=example,dc=com") is mock_ldap
+    _url = LDAP_URL_BASE + "?bindname=cn=admin%2Cdc=example%2Cdc=com"
+    assert Ldap3ConnectionManager.parse_uri(_url).bind_name == "cn=admin,dc=example,dc=com"
+    assert Ldap3Query().check_object_exists(_url)
+    Ldap3ConnectionManager().disconnect(LDAP_URL_BASE + "?bindname=" + reader.replace(",", "%2C"))
+    assert connection_pool.get_connection("localhost") is mock_ldap
+
+
+def test_schema_cache(mock_ldap, tmp_path):
+    """Test if root DSE and schema are persisted to and loaded from the schema cache."""
+    _url = Ldap3ConnectionManager.parse_uri(LDAP_URL_BASE)
+    assert Ldap3ConnectionManager._load_server_info(str(tmp_path), _url) is None
+    Ldap3ConnectionManager._save_server_info(str(tmp_path), _url, mock_ldap.server)
+    info, schema = Ldap3ConnectionManager._load_server_info(str(tmp_path), _url)
+    assert info.vendor_name == mock_ldap.server.info.vendor_name
+    assert "inetOrgPerson" in schema.object_classes
+    with pytest.raises(ValueError):
+        Ldap3ConnectionManager().connect(ldap_url=LDAP_URL_BASE, bind_dn=user, password=password, get_info="EVERYTHING")
+
+
+@pytest.mark.parametrize("assertion_operator, expected_count, page_size", [
+                          ("==", 11, 0),
+                          ("==", 11, 3),
+                          ("!=", 3, 0),
+                          (">", 3, 2),
+                          (">=", 11, 0),
+                          ("<", 12, 0),
+                          ("<=", 11, 4),
+                          ])
+def test_check_object_count_stops_early(mock_ldap, assertion_operator, expected_count, page_size):
+    """Test if counting with a size limit decides comparisons correctly."""
+    _url = "ldap://localhost:389/ou=users,dc=example,dc=com??one?(objectClass=*)"
+    ldap3Query = Ldap3Query(page_size=page_size)
+    assert ldap3Query.check_object_count(ldap_url=_url,
+                                         assertion_operator=AssertionOperator[assertion_operator],
+                                         expected_count=expected_count)
+    with pytest.raises(AssertionError, match="At least 6 entries found, expected < 5"):
+        ldap3Query.check_object_count(ldap_url=_url,
+                                      assertion_operator=AssertionOperator["<"],
+                                      expected_count=5)
+    with pytest.raises(AssertionError, match="'11' \\(int\\) should be '12'"):
+        ldap3Query.check_object_count(ldap_url=_url,
+                                      assertion_operator=AssertionOperator["=="],
+                                      expected_count=12)
+    assert ldap3Query._count(Ldap3ConnectionManager.parse_uri(_url), limit=4) == 4
+
+
+def test_check_objects_exist(mock_ldap):
+    """Test if many objects are checked for existence in one search per parent."""
+    _url = "ldap://localhost:389/dc=example,dc=com???(objectClass=*)"
+    existing = ["cn=tfoster,ou=users,dc=example,dc=com", "CN=srodgers,OU=users,dc=example,dc=com", "ou=users,dc=example,dc=com"]
+    missing = ["cn=nobody,ou=users,dc=example,dc=com", "cn=nobody,ou=missing,dc=example,dc=com"]
+    ldap3Query = Ldap3Query()
+    assert ldap3Query.check_objects_exist(ldap_url=_url, dns=existing) == dict.fromkeys(existing, True)
+    result = ldap3Query.check_objects_exist(ldap_url=_url, dns=existing + missing, should_exist=None)
+    assert [dn for dn, exists in result.items() if not exists] == missing
+    assert ldap3Query.check_objects_exist(ldap_url=_url, dns=missing, should_exist=False)
+    with pytest.raises(AssertionError):
+        ldap3Query.check_objects_exist(ldap_url=_url, dns=existing + missing)
+    with pytest.raises(AssertionError):
+        ldap3Query.check_objects_exist(ldap_url=_url, dns=existing, should_exist=False)
+    filtered = "ldap://localhost:389/dc=example,dc=com???(postalCode=13029)"
+    assert ldap3Query.check_objects_exist(ldap_url=filtered, dns=existing, should_exist=None) == {
+        existing[0]: True, existing[1]: False, existing[2]: False}
+
+
+def _write_ldif(path, records):
+    from ldif import LDIFWriter
+    with open(path, "wb") as ldif:
+        writer = LDIFWriter(ldif)
+        for dn, record in records:
+            writer.unparse(dn, record)
+    return str(path)
+
+
+def _bulk_records(ou, count):
+    records = [(f"ou={ou},dc=example,dc=com", {"objectClass": ["top", "organizationalUnit"], "ou": [ou]})]
+    for i in range(count):
+        records.append((f"cn=user{i},ou={ou},dc=example,dc=com",
+                        {"objectClass": ["inetOrgPerson", "organizationalPerson", "person", "top"],
+                         "cn": [f"user{i}"], "sn": [f"User {i}"]}))
+    return records
+
+
+def test_bulk_add_objects_from_ldif(mock_ldap, tmp_path):
+    """Test if a LDIF file is imported concurrently with parents before children."""
+    ldif_file = _write_ldif(tmp_path / "bulk.ldif", _bulk_records("bulk", 50))
+    ldap3Query = Ldap3Query()
+    summary = ldap3Query.bulk_add_objects_from_ldif(ldap_url=LDAP_URL_SUB, ldif_file=ldif_file, workers=4, window=8)
+    assert summary["added"] == 51 and summary["failed"] == 0
+    assert summary["entries_per_second"] > 0
+    assert ldap3Query.check_object_count(ldap_url="ldap://localhost:389/ou=bulk,dc=example,dc=com??one?(objectClass=person)",
+                                         assertion_operator=AssertionOperator["=="],
+                                         expected_count=50)
+    with pytest.raises(ValueError):
+        ldap3Query.bulk_add_objects_from_ldif(ldap_url=LDAP_URL_SUB, ldif_file=ldif_file)
+
+
+def test_bulk_add_objects_continue_on_error(mock_ldap, tmp_path):
+    """Test if failed entries and their children are reported when continuing past errors."""
+    records = _bulk_records("users", 2) + _bulk_records("fresh", 3)
+    ldif_file = _write_ldif(tmp_path / "errors.ldif", records)
+    summary = Ldap3Query().bulk_add_objects_from_ldif(ldap_url=LDAP_URL_SUB, ldif_file=ldif_file, continue_on_error=True)
+    assert summary["added"] == 6
+    assert summary["failed"] == 1
+    assert "ou=users,dc=example,dc=com" in summary["errors"]
+
+
+LDIF_CHANGES = """version: 1
+dn: ou=changes,dc=example,dc=com
+changetype: add
+objectClass: top
+objectClass: organizationalUnit
+ou: changes
+
+dn: cn=tfoster,ou=users,dc=example,dc=com
+changetype: modify
+replace: title
+title: Chief Buyer
+-
+add: telephoneNumber
+telephoneNumber: 555-000-0001
+telephoneNumber: 555-000-0002
+-
+
+dn: cn=tfoster,ou=users,dc=example,dc=com
+changetype: modify
+delete: telephoneNumber
+telephoneNumber: 555-000-0001
+-
+
+dn: cn=newuser,ou=changes,dc=example,dc=com
+changetype: add
+objectClass: inetOrgPerson
+cn: newuser
+sn: User
+
+dn: cn=srodgers,ou=users,dc=example,dc=com
+changetype: delete
+
+dn: cn=newuser,ou=changes,dc=example,dc=com
+changetype: modrdn
+newrdn: cn=renamed
+deleteoldrdn: 1
+"""
+
+
+def test_parse_ldif_changes(tmp_path):
+    """Test if LDIF change records are parsed into ldap3 changes."""
+    from ldap3 import MODIFY_ADD, MODIFY_REPLACE
+    from Ldap3Library.ldif_changes import LDIFChangeParser
+    ldif_file = tmp_path / "changes.ldif"
+    ldif_file.write_text(LDIF_CHANGES)
+    with open(ldif_file, "rb") as ldif:
+        changes = list(LDIFChangeParser(ldif).parse())
+    assert [change.changetype for change in changes] == ["add", "modify", "modify", "add", "delete", "modrdn"]
+    assert changes[1].changes == {"title": [(MODIFY_REPLACE, ["Chief Buyer"])],
+                                  "telephoneNumber": [(MODIFY_ADD, ["555-000-0001", "555-000-0002"])]}
+    assert changes[5].changes == {"newrdn": "cn=renamed", "deleteoldrdn": True, "newsuperior": None}
+
+
+def test_apply_ldif_changes(mock_ldap, tmp_path):
+    """Test if LDIF change records are applied with modifies of a DN merged."""
+    ldif_file = tmp_path / "changes.ldif"
+    ldif_file.write_text(LDIF_CHANGES)
+    ldap3Query = Ldap3Query()
+    summary = ldap3Query.apply_ldif_changes(ldap_url=LDAP_URL_SUB, ldif_file=str(ldif_file))
+    assert summary["records"] == 6 and summary["failed"] == 0
+    assert summary["requests"] == 5
+    tfoster = "ldap://localhost:389/cn=tfoster,ou=users,dc=example,dc=com?title,telephoneNumber??(objectClass=*)"
+    assert ldap3Query.check_attribute_value(tfoster, "title", AssertionOperator["=="], "Chief Buyer")
+    assert ldap3Query.get_attribute_value_count(tfoster, "telephoneNumber") == 5
+    assert ldap3Query.check_objects_exist(ldap_url=LDAP_URL_SUB,
+                                          dns=["cn=srodgers,ou=users,dc=example,dc=com",
+                                               "cn=newuser,ou=changes,dc=example,dc=com"],
+                                          should_exist=False)
+    assert ldap3Query.check_object_exists("ldap://localhost:389/cn=renamed,ou=changes,dc=example,dc=com???(objectClass=*)")
+    with pytest.raises(ValueError):
+        ldap3Query.apply_ldif_changes(ldap_url=LDAP_URL_SUB, ldif_file=str(ldif_file))
+
+
+def test_search_many(mock_ldap):
+    """Test if concurrent searches return the results keyed by URL."""
+    ldap3Query = Ldap3Query()
+    urls = [LDAP_URL_SUB, LDAP_URL_BASE, "ldap://localhost:389/ou=users,dc=example,dc=com?cn?one?(objectClass=*)"]
+    results = ldap3Query.search_many(ldap_urls=urls, return_type=Ldap3Query.ENTRIES, workers=3)
+    assert list(results) == urls
+    for url in urls:
+        assert [e.entry_dn for e in results[url]] == [e.entry_dn for e in ldap3Query.search(url, Ldap3Query.ENTRIES)]
+    assert "cn=tfoster" in ldap3Query.search_many(ldap_urls=[LDAP_URL_BASE])[LDAP_URL_BASE]
+    with pytest.raises(ValueError):
+        ldap3Query.search_many(ldap_urls=urls, return_type="xml")
+
+
+def test_result_cache(mock_ldap):
+    """Test if cached search results are served until a write keyword invalidates them."""
+    from ldap3 import MODIFY_ADD
+    _url = "ldap://localhost:389/cn=tfoster,ou=users,dc=example,dc=com?telephoneNumber??(objectClass=*)"
+    _level_url = "ldap://localhost:389/ou=users,dc=example,dc=com?telephoneNumber?one?(objectClass=*)"
+    ldap3Query = Ldap3Query(cache_ttl=60)
+    count = ldap3Query.get_attribute_value_count(ldap_url=_url, attribute_name="telephoneNumber")
+    level = ldap3Query.search(ldap_url=_level_url)
+    mock_ldap.modify("cn=tfoster,ou=users,dc=example,dc=com", {"telephoneNumber": [(MODIFY_ADD, ["555-0100"])]})
+    assert ldap3Query.get_attribute_value_count(ldap_url=_url, attribute_name="telephoneNumber") == count
+    assert ldap3Query.search(ldap_url=_level_url) == level
+    assert ldap3Query.result_cache.hits == 2
+    ldap3Query.add_attribute_value(ldap_url=_url, attribute_name="telephoneNumber", attribute_value="555-0101")
+    assert len(ldap3Query.result_cache) == 0
+    assert ldap3Query.get_attribute_value_count(ldap_url=_url, attribute_name="telephoneNumber") == count + 2
+    assert "555-0101" in ldap3Query.search(ldap_url=_level_url)
+    ldap3Query.result_cache.invalidate("localhost", "cn=jmason,ou=users,dc=example,dc=com")
+    assert len(ldap3Query.result_cache) == 1, "Only the one level search of the parent should be dropped."
+    assert ldap3Query.set_result_cache(0) == 60
+    assert ldap3Query.search(ldap_url=_level_url) and len(ldap3Query.result_cache) == 0
+
+
+def test_entry_snapshot(mock_ldap):
+    """Test if the assertion keywords check a snapshot without further requests."""
+    ldap3Query = Ldap3Query()
+    snapshot = ldap3Query.get_entry_snapshot(ldap_url=LDAP_URL_BASE)
+    users = ldap3Query.get_entry_snapshot(ldap_url="ldap://localhost:389/ou=users,dc=example,dc=com??one?(objectClass=person)")
+    mock_ldap.strategy.connection.unbind()
+    ldap3Query.connection_pool.clear()
+    assert str(snapshot) == LDAP_URL_BASE
+    assert ldap3Query.check_object_exists(ldap_url=snapshot)
+    assert ldap3Query.check_attribute_value(ldap_url=snapshot, attribute_name="postalCode",
+                                            assertion_operator=AssertionOperator["=="], expected_value="13029")
+    assert ldap3Query.check_attribute_value_count(ldap_url=snapshot, attribute_name="telephoneNumber",
+                                                  assertion_operator=AssertionOperator[">"], expected_value=0)
+    assert ldap3Query.get_attribute_value_count(ldap_url=snapshot, attribute_name="postalCode") == len(snapshot.entries[0].postalCode)
+    assert ldap3Query.check_object_count(ldap_url=users, assertion_operator=AssertionOperator["=="],
+                                         expected_count=len(users.entries))
+    with pytest.raises(ValueError):
+        ldap3Query.check_object_exists(ldap_url=users)
+    assert list(users) == list(users.entries) and len(users) == len(users.entries)
+    empty = dataclasses.replace(users, entries=())
+    assert empty and len(empty) == 0 and list(empty) == []
+    assert empty.ldap_url == users.ldap_url
+
+
+def test_check_attribute_values(mock_ldap):
+    """Test if many attribute assertions are checked with one search and all mismatches are reported."""
+    ldap3Query = Ldap3Query()
+    _url = "ldap://localhost:389/cn=tfoster,ou=users,dc=example,dc=com???(objectClass=*)"
+    assert ldap3Query.check_attribute_values(ldap_url=_url, expected_values={"cn": "== tfoster",
+                                                                            "postalCode": ["==", "13029"],
+                                                                            "telephoneNumber": "!= 000"})
+    with pytest.raises(AssertionError) as mismatch:
+        ldap3Query.check_attribute_values(ldap_url=_url, expected_values={"cn": "== jmason",
+                                                                         "postalCode": "== 13029",
+                                                                         "carLicense": "== ABC"})
+    assert "2 attribute value mismatches" in str(mismatch.value)
+    assert "jmason" in str(mismatch.value) and "carLicense not found" in str(mismatch.value)
+    snapshot = ldap3Query.get_entry_snapshot(ldap_url=LDAP_URL_BASE)
+    assert ldap3Query.check_attribute_values(ldap_url=snapshot, expected_values={"postalCode": "contains 13029"})
+    assert ldap3Query.check_attribute_values(ldap_url=_url, expected_values={"cn": "should be tfoster",
+                                                                            "sn": "not contains admin",
+                                                                            "postalCode": "less than 2",
+                                                                            "telephoneNumber": "should start with "})
+    with pytest.raises(AssertionError, match="1 attribute value mismatches"):
+        ldap3Query.check_attribute_values(ldap_url=_url, expected_values={"cn": "should not be tfoster"})
+    with pytest.raises(ValueError):
+        ldap3Query.check_attribute_values(ldap_url=_url, expected_values={"cn": "~~ tfoster"})
+
+
+def test_modify_entry(mock_ldap):
+    """Test if replace and multi-attribute changes are sent as one modify request."""
+    _url = "ldap://localhost:389/cn=tfoster,ou=users,dc=example,dc=com?telephoneNumber,title,description??(objectClass=*)"
+    ldap3Query = Ldap3Query()
+    old_value = ldap3Query.get_entry_snapshot(ldap_url=_url).entries[0].telephoneNumber.values[0]
+    ldap3Query.replace_attribute_value(ldap_url=_url, attribute_name="telephoneNumber",
+                                       old_value=old_value, new_value="555-0199")
+    assert ldap3Query.modify_entry(ldap_url=_url, changes={"title": ["replace", "Chief buyer"],
+                                                           "description": [["add", ["a", "b"]], ["delete", "a"]],
+                                                           "telephoneNumber": ("MODIFY_ADD", "555-0198")})
+    entry = ldap3Query.get_entry_snapshot(ldap_url=_url).entries[0]
+    assert old_value not in entry.telephoneNumber.values
+    assert {"555-0199", "555-0198"} <= set(entry.telephoneNumber.values)
+    assert entry.title.value == "Chief buyer"
+    assert entry.description.values == ["b"]
+    with pytest.raises(ValueError):
+        ldap3Query.replace_attribute_value(ldap_url=_url, attribute_name="telephoneNumber",
+                                           old_value="000", new_value="555-0197")
+    with pytest.raises(ValueError):
+        ldap3Query.modify_entry(ldap_url=_url, changes={"title": ["rename", "x"]})
+
+
+def test_delete_object_recursive(mock_ldap):
+    """Test if a subtree is deleted bottom-up when the server has no Tree Delete control."""
+    base = "ou=cleanup,dc=example,dc=com"
+    mock_ldap.add(base, "organizationalUnit", {"ou": "cleanup"})
+    for i in range(3):
+        mock_ldap.add(f"ou=team{i},{base}", "organizationalUnit", {"ou": f"team{i}"})
+        for j in range(120):
+            mock_ldap.add(f"cn=user{j},ou=team{i},{base}", "inetOrgPerson", {"cn": f"user{j}", "sn": "User"})
+    ldap3Query = Ldap3Query()
+    assert ldap3Query.delete_object(ldap_url=f"ldap://localhost:389/{base}???(objectClass=*)", recursive=True, workers=4)
+    assert not ldap3Query.check_object_exists(ldap_url=f"ldap://localhost:389/{base}???(objectClass=*)")
+    assert not ldap3Query.check_object_exists(ldap_url=f"ldap://localhost:389/cn=user99,ou=team1,{base}???(objectClass=*)")
+    assert ldap3Query.check_object_exists(ldap_url="ldap://localhost:389/ou=users,dc=example,dc=com???(objectClass=*)")
+    with pytest.raises(ValueError):
+        ldap3Query.delete_object(ldap_url=f"ldap://localhost:389/{base}???(objectClass=*)", recursive=True)
+
+
+def test_rollback_created_objects(mock_ldap, tmp_path):
+    """Test if created objects are journaled per scope and rolled back children first."""
+    from Ldap3Library import Ldap3Library
+    library = Ldap3Library(journal_scope="TEST")
+    listener = library.ROBOT_LIBRARY_LISTENER[0]
+    _url = "ldap://localhost:389/dc=example,dc=com???(objectClass=*)"
+    library.bulk_add_objects_from_ldif(ldap_url=_url, ldif_file=_write_ldif(tmp_path / "suite.ldif", _bulk_records("suite", 5)))
+    listener.start_test(None, None)
+    library.bulk_add_objects_from_ldif(ldap_url=_url, ldif_file=_write_ldif(tmp_path / "test.ldif", _bulk_records("test", 20)))
+    library.delete_object(ldap_url="ldap://localhost:389/cn=user0,ou=test,dc=example,dc=com???(objectClass=*)")
+    assert len(library.journal) == 6 + 21 - 1
+    assert library.rollback_created_objects(workers=4) == 20
+    assert not library.check_object_exists(ldap_url="ldap://localhost:389/ou=test,dc=example,dc=com???(objectClass=*)")
+    assert library.check_object_exists(ldap_url="ldap://localhost:389/ou=suite,dc=example,dc=com???(objectClass=*)")
+    library.add_object_from_ldif(ldap_url=_url, ldif_file=_write_ldif(tmp_path / "left.ldif", _bulk_records("left", 0)),
+                                 object_class=None)
+    listener.end_test(None, None)
+    mock_ldap.delete("cn=user1,ou=suite,dc=example,dc=com")
+    assert library.rollback_created_objects() == 7
+    assert not library.check_object_exists(ldap_url="ldap://localhost:389/ou=suite,dc=example,dc=com???(objectClass=*)")
+    assert not library.check_object_exists(ldap_url="ldap://localhost:389/ou=left,dc=example,dc=com???(objectClass=*)")
+    assert len(library.journal) == 0
+    with pytest.raises(ValueError):
+        Ldap3Library(journal_scope="KEYWORD")
+
+
+def test_rollback_keeps_failed_objects(mock_ldap, tmp_path, monkeypatch):
+    """Test if objects whose delete failed, and their parents, stay journaled and are deleted by a retry."""
+    from Ldap3Library import Ldap3Library
+    from ldap3.strategy.mockBase import MockBaseStrategy
+    library = Ldap3Library()
+    _url = "ldap://localhost:389/dc=example,dc=com???(objectClass=*)"
+    library.bulk_add_objects_from_ldif(ldap_url=_url, ldif_file=_write_ldif(tmp_path / "retry.ldif", _bulk_records("retry", 3)))
+    mock_delete = MockBaseStrategy.mock_delete
+
+    def refuse_user1(strategy, request_message, controls):
+        if str(request_message).startswith("cn=user1,"):
+            return {"resultCode": 53, "matchedDN": "", "diagnosticMessage": "refused", "referral": None}
+        return mock_delete(strategy, request_message, controls)
+
+    monkeypatch.setattr(MockBaseStrategy, "mock_delete", refuse_user1)
+    with pytest.raises(ValueError, match="cn=user1,ou=retry,dc=example,dc=com: unwillingToPerform"):
+        library.rollback_created_objects()
+    assert len(library.journal) == 2
+    monkeypatch.setattr(MockBaseStrategy, "mock_delete", mock_delete)
+    assert library.rollback_created_objects() == 2
+    assert not library.check_object_exists(ldap_url="ldap://localhost:389/ou=retry,dc=example,dc=com???(objectClass=*)")
+
+
+def test_rollback_renamed_objects(mock_ldap, tmp_path):
+    """Test if created objects renamed by modrdn records stay journaled under their new DN and are rolled back."""
+    from Ldap3Library import Ldap3Library
+    library = Ldap3Library()
+    ldif_file = tmp_path / "changes.ldif"
+    ldif_file.write_text(LDIF_CHANGES)
+    library.apply_ldif_changes(ldap_url=LDAP_URL_SUB, ldif_file=str(ldif_file))
+    # the mock keeps the old RDN when moving an entry, so it is moved without renaming it
+    moved = "cn=renamed,ou=users,dc=example,dc=com"
+    ldif_file.write_text("version: 1\n"
+                         "dn: cn=renamed,ou=changes,dc=example,dc=com\n"
+                         "changetype: modrdn\n"
+                         "newrdn: cn=renamed\n"
+                         "deleteoldrdn: 1\n"
+                         "newsuperior: ou=users,dc=example,dc=com\n")
+    assert library.apply_ldif_changes(ldap_url=LDAP_URL_SUB, ldif_file=str(ldif_file))["failed"] == 0
+    assert library.check_object_exists(ldap_url=f"ldap://localhost:389/{moved}???(objectClass=*)")
+    assert library.rollback_created_objects() == 2
+    assert library.check_objects_exist(ldap_url=LDAP_URL_SUB, dns=[moved, "ou=changes,dc=example,dc=com"], should_exist=False)
+    assert len(library.journal) == 0
+
+
+def test_connect_mock_backend(tmp_path):
+    """Test if mock:// connects to an in-memory directory shared by all identities of the host."""
+    pool = Ldap3ConnectionManager.connection_pool
+    pool.clear()
+    data = _write_ldif(tmp_path / "data.ldif", _bulk_records("mock", 3))
+    ldap3ConMan.connect(ldap_url="mock://memory:389/dc=example,dc=com", bind_dn=user, password=password, mock_data=data)
+    ldap3ConMan.connect(ldap_url="ldap://memory:389/dc=example,dc=com", bind_dn="cn=reader,dc=example,dc=com",
+                        password="secret", backend="MOCK")
+    try:
+        ldap3Query = Ldap3Query()
+        reader = "?bindname=cn=reader%2Cdc=example%2Cdc=com"
+        assert ldap3Query.check_object_exists(ldap_url="ldap://memory:389/cn=user1,ou=mock,dc=example,dc=com???(objectClass=*)" + reader)
+        ldap3Query.delete_object(ldap_url="ldap://memory:389/cn=user1,ou=mock,dc=example,dc=com???(objectClass=*)")
+        assert not ldap3Query.check_object_exists(ldap_url="ldap://memory:389/cn=user1,ou=mock,dc=example,dc=com???(objectClass=*)" + reader)
+        with pytest.raises(ValueError):
+            ldap3ConMan.connect(ldap_url="ldap://memory:389/", bind_dn=user, password=password, backend="socket")
+    finally:
+        pool.clear()
+
+
+class _OfflineServer(Server):
+    """Server reading the requested parts of the OpenLDAP 2.4 offline info instead of querying the directory."""
+    reads = []
+
+    def get_info_from_server(self, connection):
+        if self.get_info == NONE:
+            return
+        _OfflineServer.reads.append(self.get_info)
+        offline = Server(self.host, get_info=OFFLINE_SLAPD_2_4)
+        if self.get_info in (ALL, DSA):
+            self._dsa_info = offline.info
+        if self.get_info in (ALL, SCHEMA):
+            self._schema_info = offline.schema
+
+
+@pytest.fixture
+def offline_server(monkeypatch):
+    """Fixture connecting the ldap backend to _OfflineServer with the mock strategy."""
+    monkeypatch.setattr("Ldap3Library.connection_manager.Server", _OfflineServer)
+    monkeypatch.setattr("Ldap3Library.connection_manager.SYNC", MOCK_SYNC)
+    _OfflineServer.reads = []
+    Ldap3ConnectionManager.connection_pool.clear()
+    yield _OfflineServer.reads
+    Ldap3ConnectionManager.connection_pool.clear()
+
+
+def test_schema_cache_on_connect(offline_server, tmp_path):
+    """Test if the server info read on connect is written to the schema cache and loaded on the next connect."""
+    import os
+    pool = Ldap3ConnectionManager.connection_pool
+    cache = tmp_path / "schema"
+    ldap3ConMan.connect(ldap_url="ldap://cached:389/dc=example,dc=com", bind_dn=user, password=password, schema_cache=str(cache))
+    assert offline_server == [ALL]
+    assert sorted(os.listdir(cache)) == ["cached_389.info.json", "cached_389.schema.json"]
+    pool.clear()
+    ldap3ConMan.connect(ldap_url="ldap://cached:389/dc=example,dc=com", bind_dn=user, password=password, schema_cache=str(cache))
+    assert offline_server == [ALL]
+    server = pool.get_connection("cached").server
+    assert server.info is not None and server.schema is not None
+    ldap3ConMan.connect(ldap_url="ldap://dsa:389/dc=example,dc=com", bind_dn=user, password=password,
+                        get_info="DSA", schema_cache=str(cache))
+    assert offline_server == [ALL, DSA]
+    assert "dsa_389.info.json" in os.listdir(cache) and "dsa_389.schema.json" not in os.listdir(cache)
+    pool.clear()
+    ldap3ConMan.connect(ldap_url="ldap://dsa:389/dc=example,dc=com", bind_dn=user, password=password,
+                        get_info="DSA", schema_cache=str(cache))
+    assert offline_server == [ALL, DSA]
+    assert pool.get_connection("dsa").server.info is not None
+    ldap3ConMan.connect(ldap_url="ldap://dsa:389/dc=example,dc=com", bind_dn="cn=reader,dc=example,dc=com",
+                        password=password, schema_cache=str(cache))
+    assert offline_server == [ALL, DSA, ALL]
+    assert "dsa_389.schema.json" in os.listdir(cache)
+
+
+def test_lazy_server_info(offline_server):
+    """Test if get_info LAZY defers reading the server info to the first keyword needing it."""
+    pool = Ldap3ConnectionManager.connection_pool
+    ldap3ConMan.connect(ldap_url="ldap://lazy:389/dc=example,dc=com", bind_dn=user, password=password, get_info="LAZY")
+    connection = pool.get_connection("lazy")
+    assert offline_server == [] and connection.server.info is None
+    assert pool.get_pool("lazy").load_server_info(connection).info is not None
+    assert offline_server == [ALL]
+    pool.get_pool("lazy").load_server_info(connection)
+    assert offline_server == [ALL]
+
+
+def test_metrics(mock_ldap, tmp_path):
+    """Test if keyword calls are recorded with round trips and entries and exported as JSON and Prometheus text."""
+    from Ldap3Library import Ldap3Library
+    import json
+    library = Ldap3Library(metrics=True)
+    try:
+        library.reset_metrics()
+        base_url = "ldap://localhost:389/ou=users,dc=example,dc=com??one?(objectClass=*)"
+        entries = library.search(base_url, library.ENTRIES)
+        library.check_object_count(base_url, AssertionOperator["=="], len(entries))
+        with pytest.raises(ValueError):
+            library.check_object_exists("ldap://localhost:389/ou=users,dc=example,dc=com??sub?(objectClass=*)")
+        metrics = {row["keyword"]: row for row in library.get_metrics()}
+        assert metrics["search"]["host"] == "localhost"
+        assert metrics["search"]["count"] == 1
+        assert metrics["search"]["round_trips"] == 1
+        assert metrics["search"]["entries"] == len(entries)
+        assert metrics["check_object_exists"]["errors"] == 1
+        # the search the count is checked with is charged to Check Object Count only
+        assert "_count" not in metrics and metrics["check_object_count"]["count"] == 1
+        exported = json.loads(open(library.export_metrics(str(tmp_path / "metrics.json"))).read())
+        assert {row["keyword"] for row in exported["keywords"]} == set(metrics)
+        prometheus = open(library.export_metrics(str(tmp_path / "metrics.prom"), "PROMETHEUS")).read()
+        assert 'ldap3library_keyword_duration_seconds_count{keyword="search",host="localhost"} 1' in prometheus
+        with pytest.raises(ValueError):
+            library.export_metrics(str(tmp_path / "metrics.xml"), "xml")
+    finally:
+        library.enable_metrics(False)
+        library.reset_metrics()
+
+
+def test_metrics_summary_in_output(tmp_path):
+    """Test if a Robot Framework run keeps the metrics summary and the exported files in output.xml."""
+    from io import StringIO
+    from robot import run
+    from robot.api import ExecutionResult
+    from Ldap3Library.metrics import METRICS_METADATA
+    from pathlib import Path
+    import os
+    suite = tmp_path / "metrics.robot"
+    suite.write_text(f"""*** Settings ***
+Library    Ldap3Library    metrics_export={tmp_path / "export"}
+
+*** Test Cases ***
+Search
+    Connect    ldap://metrics:389/dc=example,dc=com    {user}    {password}    backend=mock    mock_data={Path(__file__).parents[2] / "fake_ldap_data.ldif"}
+    Search    ldap://metrics:389/ou=users,dc=example,dc=com??one?(objectClass=*)
+""")
+    try:
+        assert run(str(suite), outputdir=str(tmp_path), log="NONE", report="NONE", stdout=StringIO(), stderr=StringIO()) == 0
+    finally:
+        Ldap3ConnectionManager.connection_pool.clear()
+        Ldap3ConnectionManager.metrics.enabled = False
+        Ldap3ConnectionManager.metrics.reset()
+    summary = ExecutionResult(str(tmp_path / "output.xml")).suite.metadata[METRICS_METADATA]
+    assert "| =keyword= | =host= |" in summary and "| search | metrics |" in summary
+    assert "ldap3library_metrics.json" in summary and "ldap3library_metrics.prom" in summary
+    assert sorted(os.listdir(tmp_path / "export")) == ["ldap3library_metrics.json", "ldap3library_metrics.prom"]
+
+
+def test_slow_query_log(mock_ldap, tmp_path):
+    """Test if searches above the threshold are logged with their query details and the others are not."""
+    import json
+    log_file = tmp_path / "slow.log"
+    ldap3Query = Ldap3Query(slow_query_ms=60000, slow_query_log=str(log_file))
+    base_url = "ldap://localhost:389/ou=users,dc=example,dc=com?cn,mail?one?(objectClass=person)"
+    ldap3Query.search(base_url)
+    assert not log_file.exists()
+    assert ldap3Query.set_slow_query_threshold(0.000001) == 60000
+    entries = ldap3Query.search(base_url, ldap3Query.ENTRIES)
+    ldap3Query.check_object_count(base_url, AssertionOperator[">"], 0)
+    records = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert len(records) == 2
+    assert records[0]["base"] == "ou=users,dc=example,dc=com"
+    assert records[0]["scope"] == "LEVEL"
+    assert records[0]["filter"] == "(objectClass=person)"
+    assert records[0]["attributes"] == ["cn", "mail"]
+    assert records[0]["entries"] == len(entries)
+    assert records[0]["duration_ms"] > 0
+    ldap3Query.set_slow_query_threshold(0)
+    ldap3Query.search(base_url)
+    assert len(log_file.read_text().splitlines()) == 2
+
+
+def test_slow_query_warnings_of_workers(mock_ldap, tmp_path, monkeypatch):
+    """Test if the warnings of slow searches run by workers are logged from the main thread."""
+    import threading
+    warnings = []
+    monkeypatch.setattr("Ldap3Library.slow_queries.logger.warn",
+                        lambda message: warnings.append((message, threading.current_thread() is threading.main_thread())))
+    ldap3Query = Ldap3Query(slow_query_ms=0.000001, slow_query_log=str(tmp_path / "slow.log"))
+    urls = ["ldap://localhost:389/ou=users,dc=example,dc=com?cn?one?(objectClass=person)", LDAP_URL_BASE]
+    ldap3Query.search_many(ldap_urls=urls, workers=2)
+    ldap3Query.check_objects_exist(ldap_url=LDAP_URL_SUB, dns=["cn=tfoster,ou=users,dc=example,dc=com"])
+    assert len(warnings) == 3
+    assert all(main_thread for _, main_thread in warnings)
+    assert ldap3Query.slow_queries.log_pending() == 0
+
+
+def test_connect_many(tmp_path):
+    """Test if connections are bound concurrently and keywords wait for the background connect of their host."""
+    pool = Ldap3ConnectionManager.connection_pool
+    pool.clear()
+    data = _write_ldif(tmp_path / "data.ldif", _bulk_records("many", 2))
+    try:
+        hosts = ldap3ConMan.connect_many([f"mock://many{i}:389/" for i in range(3)], user, password, mock_data=data)
+        assert hosts == ["many0", "many1", "many2"]
+        assert set(pool.aliases) == set(hosts)
+        ldap3ConMan.connect_many([{"ldap_url": "mock://later:389/", "bind_dn": user, "password": password, "mock_data": data},
+                                  {"ldap_url": "mock://broken:389/", "bind_dn": user}], wait=False)
+        ldap3Query = Ldap3Query()
+        assert ldap3Query.check_object_exists(ldap_url="ldap://later:389/cn=user1,ou=many,dc=example,dc=com???(objectClass=*)")
+        with pytest.raises(ValueError, match="password"):
+            ldap3Query.check_object_exists(ldap_url="ldap://broken:389/dc=example,dc=com???(objectClass=*)")
+        with pytest.raises(ValueError, match="1 of 2 hosts failed"):
+            ldap3ConMan.connect_many(["mock://again:389/", {"ldap_url": "mock://never:389/", "mock_data": str(tmp_path / "missing.ldif")}],
+                                     user, password, mock_data=data)
+    finally:
+        pool.clear()
+
+
+def test_wait_until_entry_matches(mock_ldap):
+    """Test if waiting returns once another thread wrote the expected value and fails after the timeout."""
+    import threading
+    ldap3Query = Ldap3Query(cache_ttl=60)
+    entry_url = "ldap://localhost:389/cn=admin,dc=example,dc=com???(objectClass=*)"
+    ldap3Query.check_attribute_values(entry_url, {"cn": "== admin"})
+    writer = threading.Timer(0.3, ldap3Query.overwrite_attribute_value, (entry_url, "description", "provisioned"))
+    writer.start()
+    try:
+        entry = ldap3Query.wait_until_entry_matches(entry_url, {"description": "should be provisioned", "cn": "== admin"},
+                                                    timeout=10, poll_interval=0.05)
+        assert entry.description.value == "provisioned"
+    finally:
+        writer.join()
+    entry = ldap3Query.wait_until_entry_matches(entry_url, {"description": "not contains deprovisioned",
+                                                            "cn": "should start with adm"}, timeout=1)
+    assert entry.cn.value == "admin"
+    with pytest.raises(AssertionError, match="did not match within"):
+        ldap3Query.wait_until_entry_matches(entry_url, {"description": "== deprovisioned"}, timeout=0.2, poll_interval=0.05)
+    with pytest.raises(AssertionError, match="No entry found"):
+        ldap3Query.wait_until_entry_matches("ldap://localhost:389/cn=nobody,dc=example,dc=com???(objectClass=*)", timeout=0.1)
+    ldap3Query.remove_attribute_value(entry_url, "description", "provisioned")
+
+
+def test_search_changes(mock_ldap):
+    """Test if incremental searches return only the entries modified since the watermark of the URL."""
+    ldap3Query = Ldap3Query()
+    base_url = "ldap://localhost:389/ou=users,dc=example,dc=com?cn?one?(objectClass=person)"
+    users = ldap3Query.search(base_url, ldap3Query.ENTRIES)
+    for user in users:
+        ldap3Query.modify_entry(f"ldap://localhost:389/{user.entry_dn}???(objectClass=*)",
+                                {"modifyTimestamp": ["replace", "20240101000000Z"]})
+    initial = ldap3Query.search_changes(base_url, ldap3Query.ENTRIES, watermark="modifyTimestamp")
+    assert initial["initial"] and initial["deleted"] is None
+    assert len(initial["changed"]) == len(users)
+    assert initial["value"] == "20240101000000Z"
+    assert "modifyTimestamp" not in initial["changed"][0].entry_attributes
+    assert ldap3Query.search(base_url, ldap3Query.ENTRIES, incremental=True) == []
+    changed_url = f"ldap://localhost:389/{users[0].entry_dn}???(objectClass=*)"
+    ldap3Query.modify_entry(changed_url, {"modifyTimestamp": ["replace", "20250101000000Z"]})
+    changes = ldap3Query.search_changes(base_url, ldap3Query.ENTRIES, watermark="modifyTimestamp")
+    assert [entry.entry_dn for entry in changes["changed"]] == [users[0].entry_dn]
+    assert changes["value"] == "20250101000000Z" and not changes["initial"]
+    assert ldap3Query.reset_watermarks(base_url) == 1
+    assert len(ldap3Query.search(base_url, ldap3Query.ENTRIES, incremental=True)) == len(users)
+    with pytest.raises(ValueError):
+        ldap3Query.search_changes(base_url, watermark="createTimestamp")
+
+
+def test_diff_subtrees(mock_ldap, tmp_path):
+    """Test if the differences to a golden LDIF are written as change records which make the subtree equal."""
+    base_url = "ldap://localhost:389/ou=diff,dc=example,dc=com??sub?(objectClass=*)"
+    golden = _write_ldif(tmp_path / "golden.ldif", _bulk_records("diff", 6))
+    ldap3Query = Ldap3Query()
+    ldap3Query.bulk_add_objects_from_ldif(ldap_url="ldap://localhost:389/dc=example,dc=com???(objectClass=*)", ldif_file=golden)
+    assert ldap3Query.diff_subtrees(base_url, golden, str(tmp_path / "equal.ldif"))["equal"]
+    ldap3Query.overwrite_attribute_value("ldap://localhost:389/cn=user1,ou=diff,dc=example,dc=com???(objectClass=*)", "sn", "Changed")
+    ldap3Query.add_attribute_value("ldap://localhost:389/cn=user2,ou=diff,dc=example,dc=com???(objectClass=*)", "description", "extra")
+    ldap3Query.delete_object("ldap://localhost:389/cn=user3,ou=diff,dc=example,dc=com???(objectClass=*)")
+    extra = _write_ldif(tmp_path / "extra.ldif", [("cn=extra,ou=diff,dc=example,dc=com",
+                                                   {"objectClass": ["inetOrgPerson", "organizationalPerson", "person", "top"], "cn": ["extra"], "sn": ["Extra"]})])
+    ldap3Query.add_object_from_ldif("ldap://localhost:389/dc=example,dc=com???(objectClass=*)", extra)
+    diff = ldap3Query.diff_subtrees(base_url, golden, str(tmp_path / "diff.ldif"), chunk_size=2)
+    assert (diff["added"], diff["deleted"], diff["modified"], diff["unchanged"]) == (1, 1, 2, 4)
+    result = ldap3Query.apply_ldif_changes("ldap://localhost:389/dc=example,dc=com???(objectClass=*)", diff["path"])
+    assert result["failed"] == 0
+    assert ldap3Query.diff_subtrees(base_url, golden, str(tmp_path / "after.ldif"), chunk_size=2)["equal"]
+    ldap3Query.delete_object("ldap://localhost:389/ou=diff,dc=example,dc=com???(objectClass=*)", recursive=True)
+
+
+def test_search_sort_and_vlv(mock_ldap):
+    """Test if sorted searches and windows are returned in order, sorted on the client as the mock has no sort control."""
+    ldap3Query = Ldap3Query()
+    base_url = "ldap://localhost:389/ou=users,dc=example,dc=com?cn?one?(objectClass=person)"
+    names = sorted((entry.sn.value for entry in ldap3Query.search(base_url.replace("?cn?", "?sn?"), ldap3Query.ENTRIES)), key=str.lower)
+    entries = ldap3Query.search(base_url, ldap3Query.ENTRIES, sort_by="sn")
+    assert [entry.sn.value for entry in entries] == names
+    entries = ldap3Query.search(base_url, ldap3Query.ENTRIES, sort_by="-sn", vlv_offset=2, vlv_count=2)
+    assert [entry.sn.value for entry in entries] == list(reversed(names))[1:3]
+    entries = ldap3Query.search(base_url + "?x-sort=sn,x-vlv=1%2C1", ldap3Query.ENTRIES)
+    assert [entry.sn.value for entry in entries] == names[:1]
+    with pytest.raises(ValueError, match="requires sort keys"):
+        ldap3Query.search(base_url, vlv_count=5)
+    with pytest.raises(ValueError, match="Invalid VLV window"):
+        ldap3Query.search(base_url, sort_by="sn", vlv_offset=0, vlv_count=5)
+
+
+def test_search_server_side_sort(mock_ldap, monkeypatch):
+    """Test if the order of a server-sorted search is kept and not paged, with a mock server supporting the sort control."""
+    from ldap3.strategy.mockBase import MockBaseStrategy
+    from ldap3.operation.search import search_request_to_dict
+    from pyasn1.codec.ber import decoder, encoder
+    from Ldap3Library import controls
+
+    requests = []
+
+    def mock_search(strategy, request_message, request_controls):
+        request_controls = {control[0]: control[2] for control in request_controls or ()}
+        requests.append(request_controls)
+        responses, result = strategy._execute_search(search_request_to_dict(request_message))
+        keys = decoder.decode(request_controls[controls.SORT_CONTROL], asn1Spec=controls._SortKeyList())[0]
+        attribute, reverse = str(keys[0]["attributeType"]).lower(), bool(keys[0]["reverseOrder"])
+        responses.sort(key=lambda response: next(str(a["vals"][0]) for a in response["attributes"] if a["type"].lower() == attribute),
+                       reverse=reverse)
+        sort_result = controls._SortResult()
+        sort_result["sortResult"] = 0
+        result["controls"] = [(controls.SORT_RESPONSE_CONTROL, {"value": encoder.encode(sort_result)})]
+        return responses, result
+
+    def client_sort(*args):
+        raise AssertionError("The server-sorted result was sorted on the client.")
+
+    monkeypatch.setattr(MockBaseStrategy, "mock_search", mock_search)
+    monkeypatch.setattr(mock_ldap.server.info, "supported_controls",
+                        list(mock_ldap.server.info.supported_controls) + [(controls.SORT_CONTROL, "CONTROL", None, None)])
+    monkeypatch.setattr("Ldap3Library.query.sort_responses", client_sort)
+    ldap3Query = Ldap3Query(page_size=2)
+    base_url = "ldap://localhost:389/ou=users,dc=example,dc=com?sn?one?(objectClass=person)"
+    entries = ldap3Query.search(base_url, ldap3Query.ENTRIES, sort_by="-sn")
+    names = [entry.sn.value for entry in entries]
+    assert len(names) > 2
+    assert names == sorted(names, reverse=True)
+    assert set(requests[-1]) == {controls.SORT_CONTROL}